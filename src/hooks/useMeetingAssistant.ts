@@ -113,6 +113,21 @@ export const useMeetingAssistant = (): UseMeetingAssistantReturn => {
             });
             setIsProcessing(false);
             setRecordingStatus('stopped');
+          } else if (data.type === 'insights' && Array.isArray(data.insights)) {
+            // Insights that finished after their recording's transcripts were sent
+            setRecordings(prev => {
+              if (prev.length === 0) return prev;
+              const updated = [...prev];
+              const recIdx = typeof data.recording_id === 'number' && data.recording_id >= 0 && data.recording_id < updated.length
+                ? data.recording_id
+                : updated.length - 1;
+              updated[recIdx] = {
+                ...updated[recIdx],
+                insights: [...updated[recIdx].insights, ...data.insights],
+              };
+              return updated;
+            });
+            return;
           } else if (data.type === 'insight') {
             setRecordings(prev => {
               if (prev.length === 0) return prev;
@@ -110,7 +110,7 @@ const Meeting = () => {
     wsRef,
   } = useMeetingAssistant();
 
-  const [sourceLanguage, setSourceLanguage] = useState("en");
+  const [sourceLanguage, setSourceLanguage] = useState("auto");
   const [targetLanguage, setTargetLanguage] = useState("en");
   const [meetingTitle, setMeetingTitle] = useState("Please Enter Your Meeting Title Here");
   const { toast } = useToast();
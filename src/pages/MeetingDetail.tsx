@@ -203,7 +203,8 @@ const MeetingDetail = () => {
       'en': 'English',
       'es': 'Spanish',
       'fr': 'French',
-      'zh': 'Chinese'
+      'zh': 'Chinese',
+      'auto': 'Auto-detect'
     };
     return languageMap[code] || code;
   };
@@ -72,7 +72,8 @@ const MeetingHistory = () => {
       'en': 'English',
       'es': 'Spanish',
       'fr': 'French',
-      'zh': 'Chinese'
+      'zh': 'Chinese',
+      'auto': 'Auto-detect'
     };
     return languageMap[code] || code;
   };
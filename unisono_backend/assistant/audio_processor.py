@@ -1,16 +1,122 @@
-import torch
-from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, AutoTokenizer, AutoModelForSeq2SeqLM
 from pyannote.audio import Pipeline as PyannotePipeline
 import numpy as np
 import logging
+import re
+from collections import Counter
 from django.conf import settings
+from .diarization import WindowedDiarizer, run_pyannote
+from .inference_backends import create_transcription_backend, create_translation_backend
+from .inference_service import InferenceService
+from .pretranslation import PretranslationScheduler
+from .profiles import get_profile, load_monitor
+from .speaker_registry import SpeakerRegistry, SpeakerRegistryStore
+from .translation_cache import TranslationCache
+from .segments import TurnIntervalIndex, plan_segments, split_into_windows, stitch_chunk_texts, timestamped_window_chunks
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Whisper pads (or cuts) every input to a 30 second window
+WHISPER_WINDOW_SECONDS = 30.0
+
+
+def detect_speech_regions(audio, sample_rate=16000, frame_seconds=0.03, floor_db=-55.0,
+                          dynamic_range_db=50.0, min_silence_seconds=1.0, padding_seconds=0.25):
+    """
+    Framewise energy gate over the whole buffer.
+    A frame is speech when its energy is above both `floor_db` and the loudest frame
+    minus `dynamic_range_db`. Speech is padded on both sides and silences shorter than
+    `min_silence_seconds` are kept. Returns a list of (start, end) sample offsets.
+    """
+    frame = max(1, int(frame_seconds * sample_rate))
+    num_frames = -(-len(audio) // frame)
+    if num_frames == 0:
+        return []
+    padded = np.zeros(num_frames * frame, dtype=np.float32)
+    padded[:len(audio)] = audio
+    frames = padded.reshape(num_frames, frame)
+    energy_db = 10.0 * np.log10(np.einsum('ij,ij->i', frames, frames) / frame + 1e-10)
+    speech = energy_db > max(floor_db, energy_db.max() - dynamic_range_db)
+    if not speech.any():
+        return []
+
+    # Pad speech frames on both sides
+    pad_frames = int(padding_seconds / frame_seconds)
+    if pad_frames > 0:
+        speech = np.convolve(speech, np.ones(2 * pad_frames + 1), mode='same') > 0
+
+    # Run boundaries: starts and ends of speech runs, in frames
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Bridge silences shorter than the minimum
+    gaps = starts[1:] - ends[:-1]
+    keep = gaps >= int(min_silence_seconds / frame_seconds)
+    starts = np.concatenate((starts[:1], starts[1:][keep]))
+    ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+    return [(int(s * frame), min(int(e * frame), len(audio))) for s, e in zip(starts, ends)]
+
+
+# Sentence boundaries for Latin and CJK punctuation
+# Latin terminators only end a sentence before whitespace, so '3.5', 'www.example.com'
+# and '...' stay whole; CJK terminators need no space after them.
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])\s*')
+
+
+def split_sentences(text, max_chars=400):
+    """
+    Split text into sentences for translation. Sentences longer than `max_chars` are
+    cut further at word boundaries (or every `max_chars` characters for unspaced
+    scripts) so nothing is lost to the translation model's max length.
+    """
+    pieces = []
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+        elif ' ' in sentence:
+            current = ''
+            for word in sentence.split():
+                if current and len(current) + 1 + len(word) > max_chars:
+                    pieces.append(current)
+                    current = word
+                else:
+                    current = f"{current} {word}" if current else word
+            if current:
+                pieces.append(current)
+        else:
+            pieces.extend(sentence[k:k + max_chars] for k in range(0, len(sentence), max_chars))
+    return pieces
+
+
+class TimestampRemap:
+    """Maps times in compacted (speech-only) audio back to original-recording time."""
+
+    def __init__(self, regions, sample_rate=16000):
+        self.sample_rate = sample_rate
+        self.original_starts = np.array([start for start, _ in regions], dtype=np.float64) / sample_rate
+        lengths = np.array([end - start for start, end in regions], dtype=np.float64) / sample_rate
+        self.compact_starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1])) if len(regions) else np.zeros(0)
+
+    def to_original(self, t):
+        if len(self.compact_starts) == 0:
+            return t
+        k = max(0, int(np.searchsorted(self.compact_starts, t, side='right')) - 1)
+        return float(self.original_starts[k] + (t - self.compact_starts[k]))
+
 class AudioProcessor:
-    def __init__(self):
+    def __init__(self, transcription_backend=None, translation_backend=None):
+        """
+        Backends default to the configured ASR_BACKEND / TRANSLATION_BACKEND; passing
+        instances lets benchmarks run different engines side by side.
+        """
+        # Opt-in int8 dynamic quantization for the Whisper and translation models
+        self.quantization = getattr(settings, 'MODEL_QUANTIZATION', '')
+
         try:
             # Load pyannote speaker diarization model
             logger.info("Loading pyannote speaker diarization model...")
@@ -19,224 +125,638 @@ class AudioProcessor:
                 'pyannote/speaker-diarization-3.1',
                 use_auth_token=hf_token
             )
-            self.speaker_embeddings = {}
-            self.speaker_counter = 1
             logger.info("Speaker diarization model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load speaker diarization model: {e}")
             self.speaker_diarization = None
 
         try:
-            # Load Whisper model and processor for transcription
-            logger.info("Loading Whisper model...")
-            # Get HuggingFace API token from Django settings
-            hf_token = getattr(settings, 'HUGGINGFACE_API_KEY', None)
-            self.whisper_processor = AutoProcessor.from_pretrained(
-                'distil-whisper/distil-large-v3',
-                token=hf_token
-            )
-            self.whisper_model = AutoModelForSpeechSeq2Seq.from_pretrained(
-                'distil-whisper/distil-large-v3',
-                token=hf_token
-            )
-            logger.info("Whisper model loaded successfully")
+            # Load the speech-to-text backend (ASR_BACKEND)
+            logger.info("Loading transcription backend...")
+            self.asr_backend = transcription_backend or create_transcription_backend(quantization=self.quantization)
+            logger.info(f"Transcription backend '{self.asr_backend.name}' loaded successfully")
         except Exception as e:
-            logger.error(f"Failed to load Whisper model: {e}")
-            self.whisper_processor = None
-            self.whisper_model = None
+            logger.error(f"Failed to load transcription backend: {e}")
+            self.asr_backend = None
 
         try:
-            # Load translation models and tokenizers
+            # Load the translation backend (TRANSLATION_BACKEND)
             logger.info("Loading translation models...")
-            self.translation_models = {}
-            translation_model_names = {
-                ('en', 'es'): 'Helsinki-NLP/opus-mt-en-es',
-                ('en', 'fr'): 'Helsinki-NLP/opus-mt-en-fr',
-                ('en', 'zh'): 'Helsinki-NLP/opus-mt-en-zh',
-                ('zh', 'en'): 'Helsinki-NLP/opus-mt-zh-en',
-                ('es', 'en'): 'Helsinki-NLP/opus-mt-es-en',
-                ('fr', 'en'): 'Helsinki-NLP/opus-mt-fr-en',
-            }
-            for (src, tgt), model_name in translation_model_names.items():
-                try:
-                    # Get HuggingFace API token from Django settings
-                    hf_token = getattr(settings, 'HUGGINGFACE_API_KEY', None)
-                    model = AutoModelForSeq2SeqLM.from_pretrained(
-                        model_name,
-                        token=hf_token
-                    )
-                    tokenizer = AutoTokenizer.from_pretrained(
-                        model_name,
-                        token=hf_token
-                    )
-                    self.translation_models[(src, tgt)] = {
-                        'model': model,
-                        'tokenizer': tokenizer
-                    }
-                    logger.info(f"Translation model {src}->{tgt} loaded successfully")
-                except Exception as e:
-                    logger.error(f"Failed to load translation model {src}->{tgt}: {e}")
-            logger.info("Translation models loading completed")
+            self.translation_backend = translation_backend or create_translation_backend(quantization=self.quantization)
+            logger.info(f"Translation backend '{self.translation_backend.name}' loading completed")
         except Exception as e:
             logger.error(f"Failed to load translation models: {e}")
-            self.translation_models = {}
+            self.translation_backend = None
+
+        # Cross-connection micro-batching of model calls
+        self.inference_service = None
+        if getattr(settings, 'INFERENCE_SERVICE_ENABLED', True):
+            self.inference_service = InferenceService(self.asr_backend, self.translation_backend)
+            logger.info("Inference micro-batching service enabled")
 
-        # Persistent speaker mapping state
-        self.speaker_map = {}
-        self.next_speaker_id = 1
+        # Memoized translations, optionally persisted to TRANSLATION_CACHE_PATH
+        self.translation_cache = None
+        if getattr(settings, 'TRANSLATION_CACHE_ENABLED', True):
+            self.translation_cache = TranslationCache(
+                max_entries=int(getattr(settings, 'TRANSLATION_CACHE_MAX_ENTRIES', 50000)),
+                max_bytes=int(getattr(settings, 'TRANSLATION_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+                path=getattr(settings, 'TRANSLATION_CACHE_PATH', None),
+                max_disk_entries=int(getattr(settings, 'TRANSLATION_CACHE_MAX_DISK_ENTRIES', 500000))
+            )
+
+        # Speculative pre-translation of finished recordings while no foreground job runs
+        self.pretranslation = None
+        if getattr(settings, 'PRETRANSLATION_ENABLED', False):
+            self.pretranslation = PretranslationScheduler(
+                self.translate_transcripts,
+                load_monitor.is_idle,
+                chunk_size=int(getattr(settings, 'PRETRANSLATION_CHUNK_SEGMENTS', 16))
+            )
+
+        # Translation: sentences longer than this are split before batching
+        self.translation_max_sentence_chars = int(getattr(settings, 'TRANSLATION_MAX_SENTENCE_CHARS', 400))
+
+        # Windowed diarization for long recordings
+        self.diarization_window_seconds = float(getattr(settings, 'DIARIZATION_WINDOW_SECONDS', 600.0))
+        self.diarization_overlap_seconds = float(getattr(settings, 'DIARIZATION_OVERLAP_SECONDS', 30.0))
+        self.diarization_similarity_threshold = float(getattr(settings, 'DIARIZATION_SIMILARITY_THRESHOLD', 0.6))
+
+        # Per-meeting speaker identities, matched by embedding similarity
+        self.speaker_registries = SpeakerRegistryStore(
+            float(getattr(settings, 'SPEAKER_SIMILARITY_THRESHOLD', 0.6))
+        )
+
+        # Batched ASR limits
+        self.asr_max_batch_size = max(1, int(getattr(settings, 'ASR_MAX_BATCH_SIZE', 8)))
+        self.asr_max_padded_seconds = float(getattr(settings, 'ASR_MAX_PADDED_SECONDS', 240.0))
+
+        # Energy-based speech gate ahead of diarization and ASR (opt-in)
+        self.vad_enabled = bool(getattr(settings, 'VAD_ENABLED', False))
+        self.vad_floor_db = float(getattr(settings, 'VAD_FLOOR_DB', -55.0))
+        self.vad_dynamic_range_db = float(getattr(settings, 'VAD_DYNAMIC_RANGE_DB', 50.0))
+        self.vad_min_silence_seconds = float(getattr(settings, 'VAD_MIN_SILENCE_SECONDS', 1.0))
+        self.vad_padding_seconds = float(getattr(settings, 'VAD_PADDING_SECONDS', 0.25))
+        self.vad_min_skip_fraction = float(getattr(settings, 'VAD_MIN_SKIP_FRACTION', 0.05))
+
+        # Language identification: 'speaker' once per persistent speaker, 'segment'
+        # once per ASR segment, 'recording' once per recording (single-language meetings),
+        # 'window' once per long-form window (otherwise long-form detects per speaker)
+        self.language_id_scope = getattr(settings, 'LANGUAGE_ID_SCOPE', 'speaker')
+        self.supported_languages = {'en', 'es', 'fr', 'zh'}
+
+        # Default ASR mode, meetings can override it
+        self.asr_mode = getattr(settings, 'ASR_MODE', 'segments')
+
+        # Long-form chunking for turns longer than the Whisper window
+        self.asr_window_seconds = WHISPER_WINDOW_SECONDS
+        self.asr_chunk_overlap_seconds = float(getattr(settings, 'ASR_CHUNK_OVERLAP_SECONDS', 3.0))
+
+        # Segment planning between diarization and ASR
+        self.asr_merge_gap_seconds = float(getattr(settings, 'ASR_MERGE_GAP_SECONDS', 0.5))
+        self.asr_min_segment_seconds = float(getattr(settings, 'ASR_MIN_SEGMENT_SECONDS', 0.5))
 
     # Remove process_chunk and process_chunk_for_transcription
-    def enrich_transcript_batch(self, audio_chunk, transcript_list, target_language, sample_rate=16000):
+    def enrich_transcript_batch(self, audio_chunk, transcript_list, target_language, sample_rate=16000, asr_mode=None, source_language=None, profile=None, speaker_registry=None):
         """
-        Batch: Diarization, transcription, translation, and Gemini insights on a batch of audio.
-        If transcript_list is None, generate transcripts from diarization segments.
+        Batch: Diarization, transcription and translation on a batch of audio.
+        Runs transcribe_recording and then translate_transcripts; see those stages.
         """
+        profile = load_monitor.choose_profile(profile)  # One profile for both stages, also under 'auto'
+        result = self.transcribe_recording(audio_chunk, transcript_list, sample_rate, asr_mode, source_language, profile, speaker_registry)
+        if result is None:
+            return None
         try:
+            result['enriched_transcripts'] = self.translate_transcripts(result['enriched_transcripts'], target_language, profile)
+            return result
+        except Exception as e:
+            logger.error(f"Batch audio processing failed: {e}")
+            return None
+
+    def transcribe_recording(self, audio_chunk, transcript_list=None, sample_rate=16000, asr_mode=None, source_language=None, profile=None, speaker_registry=None):
+        """
+        Transcription stage: speech gate, diarization and ASR, without translation.
+        If transcript_list is None, generate transcripts from diarization segments, either
+        per planned segment ('segments') or with one long-form pass ('longform').
+        A declared source_language is forced in the decoder and skips language detection.
+        `profile` is a processing profile name (see profiles.py) controlling decoding and diarization.
+        `speaker_registry` (from speaker_registries, usually per meeting) keeps labels
+        consistent across recordings; without it labels are local to this call. Callers
+        fetch it up front, so a worker thread never recreates a discarded meeting's registry.
+        Returns the result dict with untranslated 'enriched_transcripts', or None on failure.
+        """
+        try:
+            profile_settings = get_profile(profile)
+            if speaker_registry is None:
+                speaker_registry = SpeakerRegistry(self.speaker_registries.similarity_threshold)
             diarization_result = []
-            pyannote_to_persistent = {}
-            enriched_transcripts = []
-            if self.speaker_diarization is not None:
+            segment_plan = None
+            generated_transcripts = transcript_list is None
+            audio_chunk, remap, vad_stats = self._apply_speech_gate(audio_chunk, sample_rate)
+            if len(audio_chunk) == 0:
+                logger.info("[VAD] No speech detected in recording")
+            elif not profile_settings['diarization']:
+                # Profile skips diarization: the whole recording is one speaker turn
+                diarization_result.append({
+                    'start': 0.0,
+                    'end': len(audio_chunk) / sample_rate,
+                    'pyannote_label': None,
+                    'speaker': 'SPEAKER_1'
+                })
+            elif self.speaker_diarization is not None:
                 try:
-                    diarization = self.speaker_diarization({'waveform': torch.tensor(audio_chunk).unsqueeze(0), 'sample_rate': sample_rate})
-                    for turn, _, pyannote_label in diarization.itertracks(yield_label=True):
-                        if pyannote_label not in self.speaker_map:
-                            persistent_label = f"SPEAKER_{self.next_speaker_id}"
-                            self.speaker_map[pyannote_label] = persistent_label
-                            self.next_speaker_id += 1
-                        else:
-                            persistent_label = self.speaker_map[pyannote_label]
-                        pyannote_to_persistent[pyannote_label] = persistent_label
+                    turns, embeddings = self._diarize(audio_chunk, sample_rate)
+                    durations = {}
+                    for turn_start, turn_end, pyannote_label in turns:
+                        durations[pyannote_label] = durations.get(pyannote_label, 0.0) + (turn_end - turn_start)
+                    pyannote_to_persistent = speaker_registry.assign(embeddings, durations)
+                    for turn_start, turn_end, pyannote_label in turns:
                         diarization_result.append({
-                            'start': turn.start,
-                            'end': turn.end,
+                            'start': turn_start,
+                            'end': turn_end,
                             'pyannote_label': pyannote_label,
-                            'speaker': persistent_label
+                            'speaker': pyannote_to_persistent[pyannote_label]
                         })
                 except Exception as e:
                     logger.error(f"Speaker diarization failed: {e}")
             else:
                 logger.warning("Speaker diarization model not available")
             # If no transcript_list, generate transcripts from diarization segments
-            if transcript_list is None:
-                transcript_list = []
+            asr_mode = asr_mode or profile_settings['asr_mode'] or self.asr_mode
+            num_beams = profile_settings['asr_num_beams']
+            if transcript_list is None and asr_mode == 'longform':
+                # Registry languages are cached only for real (diarized) speakers
+                speaker_languages = speaker_registry.languages if profile_settings['diarization'] else None
+                transcript_list = self._transcribe_longform(audio_chunk, diarization_result, sample_rate, source_language, num_beams, speaker_languages)
+            elif transcript_list is None:
+                segments, segment_plan = plan_segments(
+                    diarization_result,
+                    merge_gap=self.asr_merge_gap_seconds,
+                    min_duration=self.asr_min_segment_seconds
+                )
+                logger.info(f"[SEGMENTS] Planned {segment_plan['asr_segments']} ASR segments from {segment_plan['diarization_turns']} turns, saved {segment_plan['asr_calls_saved']} Whisper calls")
+                transcript_list = self._transcribe_segments(audio_chunk, segments, sample_rate, source_language, num_beams, speaker_registry.languages)
+            # Report everything in original-recording time
+            if remap is not None:
                 for seg in diarization_result:
-                    seg_start = int(seg['start'] * sample_rate)
-                    seg_end = int(seg['end'] * sample_rate)
-                    segment_audio = audio_chunk[seg_start:seg_end]
-                    transcript = {
-                        'start': seg['start'],
-                        'end': seg['end'],
-                        'speaker_label': seg['speaker']
-                    }
-                    if self.whisper_processor is not None and self.whisper_model is not None:
-                        try:
-                            inputs = self.whisper_processor(segment_audio, sampling_rate=sample_rate, return_tensors="pt")
-                            with torch.no_grad():
-                                generated_ids = self.whisper_model.generate(
-                                    **inputs,
-                                    task="transcribe",
-                                    language=None,
-                                    return_timestamps=False
-                                )
-                            decoded_result = self.whisper_processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-                            language_tokens = self.whisper_processor.tokenizer.convert_ids_to_tokens(generated_ids[0])
-                            detected_source_language = 'en'
-                            for token in language_tokens:
-                                if token.startswith('<|') and token.endswith('|>') and len(token) > 4:
-                                    detected_source_language = token[2:-2]
-                                    break
-                            transcript['original_transcript'] = decoded_result.strip()
-                            transcript['detected_language'] = detected_source_language
-                            logger.info(f"[TRANSCRIBE] Speaker: {transcript['speaker_label']}, Detected Language: {detected_source_language}, Transcript: {decoded_result.strip()}")
-                        except Exception as e:
-                            logger.error(f"Whisper transcription failed: {e}")
-                            transcript['original_transcript'] = ''
-                            transcript['detected_language'] = 'en'
-                    else:
-                        transcript['original_transcript'] = ''
-                        transcript['detected_language'] = 'en'
-                    transcript_list.append(transcript)
-            # Translation
-            for t in transcript_list:
-                orig = t.get('original_transcript', '')
-                src_lang = t.get('detected_language', 'en')
-                if src_lang == target_language:
-                    t['translated_transcript'] = orig
-                else:
-                    t['translated_transcript'] = self._perform_intelligent_translation(orig, src_lang, target_language)
-                enriched_transcripts.append(t)
+                    seg['start'] = remap.to_original(seg['start'])
+                    seg['end'] = remap.to_original(seg['end'])
+                if generated_transcripts:
+                    for t in transcript_list:
+                        t['start'] = remap.to_original(t['start'])
+                        t['end'] = remap.to_original(t['end'])
             return {
-                'enriched_transcripts': enriched_transcripts,
+                'enriched_transcripts': list(transcript_list),
                 'diarization_result': diarization_result,
+                'segment_plan': segment_plan,
+                'vad': vad_stats,
             }
         except Exception as e:
             logger.error(f"Batch audio processing failed: {e}")
             return None
 
-    def _perform_intelligent_translation(self, original_transcript, detected_source_language, target_language):
+    def stats(self):
+        """Runtime metrics of the shared processing services."""
+        stats = {}
+        if self.inference_service is not None:
+            stats['inference_service'] = self.inference_service.stats()
+        if self.translation_cache is not None:
+            stats['translation_cache'] = self.translation_cache.stats()
+        if self.translation_backend is not None:
+            stats['translation_models'] = self.translation_backend.stats()
+        if self.pretranslation is not None:
+            stats['pretranslation'] = self.pretranslation.stats()
+        return stats
+
+    def _diarize(self, audio_chunk, sample_rate=16000):
         """
-        Implements intelligent translation logic with three scenarios:
-        A) No translation needed
-        B) Direct translation possible
-        C) Pivot translation via English required
+        Speaker diarization. Recordings longer than DIARIZATION_WINDOW_SECONDS go through
+        the windowed diarizer so peak memory does not grow with recording length.
+        Returns (turns, embeddings) with turns as (start, end, label).
         """
-        logger.info(f"[TRANSLATION] Inputs: original_transcript='{original_transcript}', detected_source_language='{detected_source_language}', target_language='{target_language}'")
-        try:
-            # Scenario A: No Translation Needed
-            if detected_source_language == target_language:
-                logger.info("[TRANSLATION] Entering Scenario A: No Translation Needed.")
-                logger.debug(f"No translation needed: {detected_source_language} -> {target_language}")
-                return original_transcript
-
-            # Scenario B: Direct Translation is Possible
-            direct_key = (detected_source_language, target_language)
-            if direct_key in self.translation_models:
-                logger.info("[TRANSLATION] Entering Scenario B: Direct Translation.")
-                logger.info(f"Using direct translation: {detected_source_language} -> {target_language}")
-                return self._translate_text(original_transcript, direct_key)
-
-            # Scenario C: Pivot Translation via English Required
-            logger.info("[TRANSLATION] Entering Scenario C: Pivot Translation via English.")
-            logger.info(f"Using pivot translation via English: {detected_source_language} -> en -> {target_language}")
-            # Step 1: Translate from source language to English
-            source_to_en_key = (detected_source_language, 'en')
-            if source_to_en_key in self.translation_models:
-                english_text = self._translate_text(original_transcript, source_to_en_key)
-                if english_text is None:
-                    logger.error(f"Failed to translate {detected_source_language} -> en")
-                    return original_transcript
-            else:
-                logger.warning(f"No translation model available for {detected_source_language} -> en")
-                return original_transcript
-            # Step 2: Translate from English to target language
-            en_to_target_key = ('en', target_language)
-            if en_to_target_key in self.translation_models:
-                final_translation = self._translate_text(english_text, en_to_target_key)
-                if final_translation is None:
-                    logger.error(f"Failed to translate en -> {target_language}")
-                    return english_text  # Return English as fallback
-                return final_translation
-            else:
-                logger.warning(f"No translation model available for en -> {target_language}")
-                return english_text  # Return English as fallback
-        except Exception as e:
-            logger.error(f"Translation pipeline failed: {e}", exc_info=True)
-            return original_transcript
+        if len(audio_chunk) <= self.diarization_window_seconds * sample_rate:
+            return run_pyannote(self.speaker_diarization, audio_chunk, sample_rate)
+        diarizer = WindowedDiarizer(
+            self.speaker_diarization,
+            sample_rate,
+            window_seconds=self.diarization_window_seconds,
+            overlap_seconds=self.diarization_overlap_seconds,
+            similarity_threshold=self.diarization_similarity_threshold
+        )
+        diarizer.feed(audio_chunk)
+        return diarizer.finalize()
 
-    def _translate_text(self, text, translation_key):
-        logger.info(f"[TRANSLATE] About to translate: '{text[:50]}...' with key {translation_key}")
+    def _apply_speech_gate(self, audio_chunk, sample_rate=16000):
+        """
+        Drop non-speech regions before diarization and ASR.
+        Returns (audio, remap, stats); remap is None when the audio was left untouched.
+        """
+        total_seconds = len(audio_chunk) / sample_rate
+        if not self.vad_enabled or len(audio_chunk) == 0:
+            return audio_chunk, None, {'enabled': False, 'skipped_fraction': 0.0, 'speech_seconds': total_seconds, 'total_seconds': total_seconds}
+        regions = detect_speech_regions(
+            audio_chunk,
+            sample_rate,
+            floor_db=self.vad_floor_db,
+            dynamic_range_db=self.vad_dynamic_range_db,
+            min_silence_seconds=self.vad_min_silence_seconds,
+            padding_seconds=self.vad_padding_seconds
+        )
+        speech_samples = sum(end - start for start, end in regions)
+        skipped_fraction = 1.0 - speech_samples / len(audio_chunk)
+        stats = {
+            'enabled': True,
+            'skipped_fraction': round(skipped_fraction, 4),
+            'speech_seconds': speech_samples / sample_rate,
+            'total_seconds': total_seconds
+        }
+        logger.info(f"[VAD] Kept {len(regions)} speech regions, skipped {skipped_fraction:.1%} of {total_seconds:.1f}s")
+        if skipped_fraction < self.vad_min_skip_fraction:
+            # Not worth a copy, keep the original buffer
+            stats['skipped_fraction'] = 0.0
+            stats['speech_seconds'] = total_seconds
+            return audio_chunk, None, stats
+        if not regions:
+            return audio_chunk[:0], None, stats
+        compact = np.concatenate([audio_chunk[start:end] for start, end in regions])
+        return compact, TimestampRemap(regions, sample_rate), stats
+
+    def _transcribe_segments(self, audio_chunk, segments, sample_rate=16000, source_language=None, num_beams=1, speaker_languages=None):
+        """
+        Transcribe diarization segments with batched Whisper decoding.
+        Returns one transcript dict per segment, in the same order as `segments`.
+        """
+        transcripts = []
+        segment_audio = []
+        for seg in segments:
+            transcripts.append({
+                'start': seg['start'],
+                'end': seg['end'],
+                'speaker_label': seg['speaker'],
+                'original_transcript': '',
+                'detected_language': 'en'
+            })
+            seg_start = int(seg['start'] * sample_rate)
+            seg_end = int(seg['end'] * sample_rate)
+            segment_audio.append(audio_chunk[seg_start:seg_end])
+        if self.asr_backend is None:
+            logger.warning("Transcription backend not available")
+            return transcripts
+
+        # Long turns are split into overlapping windows so nothing past Whisper's
+        # 30 second input is lost. Empty slices are skipped, they would only
+        # produce hallucinated text.
+        pieces = []
+        for i, audio in enumerate(segment_audio):
+            for window in split_into_windows(len(audio), int(self.asr_window_seconds * sample_rate), int(self.asr_chunk_overlap_seconds * sample_rate)):
+                pieces.append((i, audio[window[0]:window[1]]))
+        segment_languages = self._resolve_languages(segments, segment_audio, source_language, sample_rate, speaker_languages)
+        logger.info(f"[TRANSCRIBE] Decoding {len(pieces)} windows from {len(segments)} segments")
+        piece_results = self._decode_pieces(
+            [audio for _, audio in pieces],
+            sample_rate,
+            languages=[segment_languages[i] for i, _ in pieces],
+            num_beams=num_beams
+        )
+
+        # Stitch window texts back together per segment, in order
+        segment_results = [[] for _ in segments]
+        for (i, _), result in zip(pieces, piece_results):
+            if result is not None:
+                segment_results[i].append(result)
+        for i, results in enumerate(segment_results):
+            if not results:
+                continue
+            text = stitch_chunk_texts([result['text'] for result in results])
+            language = Counter(result['language'] for result in results).most_common(1)[0][0]
+            transcripts[i]['original_transcript'] = text
+            transcripts[i]['detected_language'] = language
+            logger.info(f"[TRANSCRIBE] Speaker: {transcripts[i]['speaker_label']}, Detected Language: {language}, Transcript: {text}")
+        return transcripts
+
+    def _transcribe_longform(self, audio_chunk, diarization_result, sample_rate=16000, source_language=None, num_beams=1, speaker_languages=None):
+        """
+        Single-pass long-form transcription: decode the whole recording once in batched
+        30 second windows (overlapping by ASR_CHUNK_OVERLAP_SECONDS) with timestamps,
+        then give each timestamped chunk to the diarization turn it overlaps most (or
+        the nearest turn). Consecutive chunks of the same speaker become one transcript
+        entry, stitched so words repeated across a window boundary appear once.
+        Language ID is a separate encoder pass, so it runs per speaker (see
+        _window_languages) rather than per window, unless LANGUAGE_ID_SCOPE='window'.
+        """
+        if self.asr_backend is None:
+            logger.warning("Transcription backend not available")
+            return []
+        windows = split_into_windows(len(audio_chunk), int(self.asr_window_seconds * sample_rate), int(self.asr_chunk_overlap_seconds * sample_rate))
+        window_audio = [audio_chunk[start:end] for start, end in windows]
+        if source_language in self.supported_languages:
+            languages = [source_language] * len(window_audio)
+        elif self.language_id_scope == 'window':
+            languages = [self._detect_language(audio, sample_rate) for audio in window_audio]
+        elif self.language_id_scope == 'recording' and window_audio:
+            languages = [self._detect_language(max(window_audio, key=len), sample_rate)] * len(window_audio)
+        else:
+            languages = self._window_languages(windows, audio_chunk, diarization_result, sample_rate, speaker_languages)
+        logger.info(f"[TRANSCRIBE] Long-form pass over {len(windows)} windows, languages: {sorted(set(language or 'auto' for language in languages))}")
+        window_results = self._decode_pieces(
+            window_audio,
+            sample_rate,
+            return_timestamps=True,
+            languages=languages,
+            num_beams=num_beams
+        )
+
+        turn_index = TurnIntervalIndex(diarization_result)
+        transcripts = []
+        for chunk_start, chunk_end, text, language in timestamped_window_chunks(windows, window_results, sample_rate):
+            turn = turn_index.lookup(chunk_start, chunk_end)
+            speaker = turn['speaker'] if turn else 'SPEAKER_1'
+            if transcripts and transcripts[-1]['speaker_label'] == speaker:
+                transcripts[-1]['end'] = max(transcripts[-1]['end'], chunk_end)
+                transcripts[-1]['original_transcript'] = stitch_chunk_texts([transcripts[-1]['original_transcript'], text])
+                continue
+            transcripts.append({
+                'start': chunk_start,
+                'end': chunk_end,
+                'speaker_label': speaker,
+                'original_transcript': text,
+                'detected_language': language
+            })
+        for transcript in transcripts:
+            logger.info(f"[TRANSCRIBE] Speaker: {transcript['speaker_label']}, Detected Language: {transcript['detected_language']}, Transcript: {transcript['original_transcript']}")
+        return transcripts
+
+    def _window_languages(self, windows, audio_chunk, diarization_result, sample_rate=16000, speaker_languages=None):
+        """
+        Decoder language of each long-form window: language ID once per speaker on the
+        diarization turns, then a window gets the language its speakers share. Windows
+        whose speakers differ (or whose detection failed) get None and are left to the
+        decoder, which detects from the encoder pass it runs anyway.
+        """
+        turns = [turn for turn in diarization_result if turn['end'] > turn['start']]
+        if not turns:
+            return [None] * len(windows)
+        turn_audio = [audio_chunk[int(turn['start'] * sample_rate):int(turn['end'] * sample_rate)] for turn in turns]
+        turn_languages = self._resolve_languages(turns, turn_audio, None, sample_rate, speaker_languages, scope='speaker')
+        languages = []
+        for start, end in windows:
+            found = {
+                language for turn, language in zip(turns, turn_languages)
+                if turn['start'] * sample_rate < end and turn['end'] * sample_rate > start
+            }
+            languages.append(found.pop() if len(found) == 1 else None)
+        return languages
+
+    def _resolve_languages(self, segments, segment_audio, source_language, sample_rate=16000, speaker_languages=None, scope=None):
+        """
+        Decide the decoder language for each segment. A declared source language wins;
+        otherwise language ID runs once per speaker (cached across recordings in
+        `speaker_languages`), once per segment, or once per recording depending on
+        `scope` (default LANGUAGE_ID_SCOPE). None means detection failed.
+        """
+        scope = scope or self.language_id_scope
+        if source_language in self.supported_languages:
+            return [source_language] * len(segments)
+        if not segments:
+            return []
+        if scope == 'segment':
+            return [self._detect_language(audio, sample_rate) for audio in segment_audio]
+        if scope == 'recording':
+            longest = max(range(len(segments)), key=lambda i: len(segment_audio[i]))
+            language = self._detect_language(segment_audio[longest], sample_rate)
+            return [language] * len(segments)
+        speaker_languages = speaker_languages if speaker_languages is not None else {}
+        detected = {}
+        languages = []
+        for seg, audio in zip(segments, segment_audio):
+            speaker = seg['speaker']
+            if speaker not in speaker_languages and speaker not in detected:
+                longest = max(
+                    (a for s, a in zip(segments, segment_audio) if s['speaker'] == speaker),
+                    key=len
+                )
+                detected[speaker] = self._detect_language(longest, sample_rate)
+                if detected[speaker] is not None:
+                    # Failed detections are retried on the speaker's next recording
+                    speaker_languages[speaker] = detected[speaker]
+            languages.append(speaker_languages.get(speaker, detected.get(speaker)))
+        return languages
+
+    def _detect_language(self, audio, sample_rate=16000):
+        """
+        Language ID on (at most) one Whisper window.
+        Returns None when detection is not possible, which leaves it to the decoder.
+        """
+        if len(audio) == 0:
+            return None
         try:
-            translation_model = self.translation_models[translation_key]['model']
-            translation_tokenizer = self.translation_models[translation_key]['tokenizer']
-            
-            inputs = translation_tokenizer(text, return_tensors="pt", padding=True, truncation=True)
-            inputs = inputs.to(translation_model.device)
-            with torch.no_grad():
-                translated_ids = translation_model.generate(**inputs)
-            translated_text = translation_tokenizer.batch_decode(translated_ids, skip_special_tokens=True)[0]
-            
-            return translated_text.strip()
-            
+            language = self.asr_backend.detect_language(audio[:int(self.asr_window_seconds * sample_rate)], sample_rate)
+            logger.info(f"[LANGUAGE] Detected language: {language}")
+            return language
         except Exception as e:
-            logger.error(f"Translation failed for {translation_key}", exc_info=True)
-            return None 
\ No newline at end of file
+            logger.error(f"Language identification failed: {e}")
+            return None
+
+    def _decode_pieces(self, audios, sample_rate=16000, return_timestamps=False, languages=None, num_beams=1):
+        """
+        Decode a list of audio arrays (each at most one Whisper window) in planned batches.
+        Arrays are batched only with arrays of the same forced language. Arrays without
+        a language (None = detect in generate) are decoded alone, since Whisper cannot
+        decode a batch whose detected languages differ.
+        With the inference service enabled, batching happens there across connections.
+        Returns one result dict per array, or None where its batch failed.
+        """
+        results = [None] * len(audios)
+        languages = languages or [None] * len(audios)
+        if self.inference_service is not None:
+            # The shared service batches these windows with other meetings' windows
+            futures = [
+                self.inference_service.transcribe(audio, sample_rate, language, return_timestamps, num_beams)
+                for audio, language in zip(audios, languages)
+            ]
+            for k, future in enumerate(futures):
+                try:
+                    results[k] = future.result()
+                except Exception as e:
+                    logger.error(f"Whisper transcription failed for window {k}: {e}")
+            return results
+        batches = []
+        for language in dict.fromkeys(languages):
+            group = [k for k in range(len(audios)) if languages[k] == language]
+            if language is None:
+                batches.extend((None, [k]) for k in group)
+                continue
+            for batch in self._plan_asr_batches(group, [len(audios[k]) for k in group], sample_rate):
+                batches.append((language, batch))
+        for language, batch in batches:
+            try:
+                decoded = self.asr_backend.transcribe_batch(
+                    [audios[k] for k in batch],
+                    sample_rate,
+                    language=language,
+                    return_timestamps=return_timestamps,
+                    num_beams=num_beams
+                )
+            except Exception as e:
+                logger.error(f"Whisper transcription failed for batch of {len(batch)} windows: {e}")
+                continue
+            for k, result in zip(batch, decoded):
+                results[k] = result
+        return results
+
+    def _plan_asr_batches(self, indices, lengths, sample_rate=16000):
+        """
+        Group segment indices into length-sorted batches.
+        Each batch respects the max batch size and the max padded seconds, where every
+        segment is padded to the longest segment in its batch (at least the Whisper window).
+        """
+        order = sorted(range(len(indices)), key=lambda k: lengths[k])
+        batches = []
+        batch = []
+        batch_longest = 0.0
+        for k in order:
+            seconds = lengths[k] / sample_rate
+            longest = max(batch_longest, seconds, WHISPER_WINDOW_SECONDS)
+            padded_seconds = (len(batch) + 1) * longest
+            if batch and (len(batch) >= self.asr_max_batch_size or padded_seconds > self.asr_max_padded_seconds):
+                batches.append(batch)
+                batch = []
+                longest = max(seconds, WHISPER_WINDOW_SECONDS)
+            batch.append(indices[k])
+            batch_longest = longest
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def translate_transcripts(self, transcripts, target_language, profile=None):
+        """
+        Translation stage only: translate existing enriched transcripts (for example a
+        stored recording) to another language. Uses 'pivot_transcript' where present, so
+        non-English segments only pay for the en -> target hop.
+        The translation is also added to each segment's 'translations' (language -> text).
+        Returns new transcript dicts; the input is not modified.
+        """
+        profile_settings = get_profile(profile)
+        translations, pivots = self._translate_segments(
+            transcripts,
+            target_language,
+            num_beams=profile_settings['translation_num_beams'],
+            batch_size=profile_settings['translation_batch_size']
+        )
+        results = []
+        for t, translation, pivot in zip(transcripts, translations, pivots):
+            t = dict(t, translated_transcript=translation, translations={**t.get('translations', {}), target_language: translation})
+            if pivot is not None:
+                t['pivot_transcript'] = pivot
+            results.append(t)
+        return results
+
+    def _translate_segments(self, transcripts, target_language, num_beams=None, batch_size=16):
+        """
+        Translate all segments of a recording together.
+        Segments are split into sentences and grouped by (src, tgt) pair; each pair runs
+        through its model in length-sorted batches, then sentences are reassembled per
+        segment in order. Each segment is routed to no translation, a direct pair, or
+        a pivot through English (English is the fallback when the second hop is missing
+        or fails). A segment that already carries a
+        'pivot_transcript' (English text of a non-English segment) starts from it, so
+        only the en -> target hop runs.
+        Returns (translations, pivots): one translation per transcript, and the English
+        pivot text of each non-English segment when known (else None).
+        """
+        translations = [t.get('original_transcript', '') for t in transcripts]
+        pivots = [t.get('pivot_transcript') if t.get('detected_language', 'en') != 'en' else None for t in transcripts]
+        if self.translation_backend is None:
+            logger.warning("Translation backend not available")
+            return translations, pivots
+
+        # Pairs are loaded while routing, so a pair that fails to load is routed around
+        loaded = {}
+
+        def available(translation_key):
+            if translation_key not in loaded:
+                loaded[translation_key] = self.translation_backend.supports(translation_key) and self.translation_backend.load(translation_key)
+            return loaded[translation_key]
+
+        # Route per segment: list of (src, tgt) hops
+        routes = []
+        for i, t in enumerate(transcripts):
+            src = t.get('detected_language', 'en')
+            if src == target_language or not t.get('original_transcript', '').strip():
+                routes.append([])
+            elif pivots[i] is not None and (target_language == 'en' or not available((src, target_language))):
+                translations[i] = pivots[i]
+                routes.append([('en', target_language)] if target_language != 'en' and available(('en', target_language)) else [])
+            elif available((src, target_language)):
+                routes.append([(src, target_language)])
+            elif src != 'en' and available((src, 'en')):
+                second_hop = [('en', target_language)] if available(('en', target_language)) else []
+                routes.append([(src, 'en')] + second_hop)
+            else:
+                logger.warning(f"No translation route for {src} -> {target_language}")
+                routes.append([])
+
+        for hop in range(max((len(route) for route in routes), default=0)):
+            # Sentences of every segment still on the road, grouped by language pair
+            groups = {}
+            for i, route in enumerate(routes):
+                if hop < len(route):
+                    sentences = split_sentences(translations[i], self.translation_max_sentence_chars)
+                    groups.setdefault(route[hop], []).append((i, sentences))
+            for translation_key, segments in groups.items():
+                texts = [sentence for _, sentences in segments for sentence in sentences]
+                logger.info(f"[TRANSLATION] {translation_key}: {len(texts)} sentences from {len(segments)} segments")
+                translated = self._translate_many(texts, translation_key, num_beams, batch_size)
+                joiner = '' if translation_key[1] == 'zh' else ' '
+                k = 0
+                for i, sentences in segments:
+                    pieces = translated[k:k + len(sentences)]
+                    k += len(sentences)
+                    if any(piece is None for piece in pieces):
+                        logger.error(f"Failed to translate segment {i} {translation_key[0]} -> {translation_key[1]}")
+                        routes[i] = routes[i][:hop]
+                        continue
+                    translations[i] = joiner.join(pieces)
+                    if translation_key[1] == 'en':
+                        pivots[i] = translations[i]
+        return translations, pivots
+
+    def _translate_many(self, texts, translation_key, num_beams=None, batch_size=16):
+        """
+        Translate texts for one pair in length-sorted batches. Cached texts are served
+        from the translation cache and duplicates are translated once. Failed texts
+        come back as None.
+        """
+        results = [None] * len(texts)
+        pending = {}  # Text -> indices still to translate
+        for k, text in enumerate(texts):
+            cached = self.translation_cache.get(text, translation_key, num_beams) if self.translation_cache else None
+            if cached is not None:
+                results[k] = cached
+            else:
+                pending.setdefault(text, []).append(k)
+        unique = list(pending)
+        translated = [None] * len(unique)
+        if self.inference_service is not None:
+            futures = [self.inference_service.translate(text, translation_key, num_beams, batch_size) for text in unique]
+            for k, future in enumerate(futures):
+                try:
+                    translated[k] = future.result()
+                except Exception as e:
+                    logger.error(f"Translation failed for {translation_key}: {e}")
+        else:
+            order = sorted(range(len(unique)), key=lambda k: len(unique[k]))
+            for start in range(0, len(order), max(1, batch_size)):
+                batch = order[start:start + batch_size]
+                try:
+                    outputs = self.translation_backend.translate_batch([unique[k] for k in batch], translation_key, num_beams)
+                except Exception as e:
+                    logger.error(f"Translation failed for {translation_key} batch of {len(batch)}: {e}")
+                    continue
+                for k, output in zip(batch, outputs):
+                    translated[k] = output
+        if self.translation_cache is not None:
+            self.translation_cache.put_many(zip(unique, translated), translation_key, num_beams)
+        for text, output in zip(unique, translated):
+            for k in pending[text]:
+                results[k] = output
+        return results
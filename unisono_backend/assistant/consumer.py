@@ -4,12 +4,13 @@ import asyncio
 from datetime import datetime, timedelta
 from channels.generic.websocket import AsyncWebsocketConsumer
 from .audio_processor import AudioProcessor
+from .insights import extract_meeting_insights, get_insights_engine
 import google.generativeai as genai
-from google.generativeai.types import FunctionDeclaration, Tool
 import os
 import logging
 from django.conf import settings
-from .mongodb_client import mongodb_client
+from .mongodb_client import mongodb_client, transcripts_in_language
+from .profiles import AUTO_PROFILE, PROCESSING_PROFILES, get_profile, load_monitor
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -53,158 +54,6 @@ logger.info("🔄 Consumer module imported - AudioProcessor singleton will be cr
 
 # Gemini API will be configured when the singleton is first created
 
-# --- Tool Definitions for Gemini ---
-
-# 1. Key Point Extraction
-extract_key_point_func = FunctionDeclaration(
-    name="extract_key_point",
-    description="Extracts a key point or important topic from the meeting discussion.",
-    parameters={
-        "type": "OBJECT",
-        "properties": {
-            "point": {
-                "type": "STRING",
-                "description": "A concise summary of the key point or topic."
-            },
-        },
-        "required": ["point"]
-    },
-)
-
-# 2. Decision Extraction
-extract_decision_func = FunctionDeclaration(
-    name="extract_decision",
-    description="Extracts a final decision made by the meeting participants.",
-    parameters={
-        "type": "OBJECT",
-        "properties": {
-            "decision": {
-                "type": "STRING",
-                "description": "A clear statement of the decision that was made."
-            },
-        },
-        "required": ["decision"]
-    },
-)
-
-# 3. Action Item Extraction
-extract_action_item_func = FunctionDeclaration(
-    name="extract_action_item",
-    description="Extracts a specific task or action item, its assignee, and due date.",
-    parameters={
-        "type": "OBJECT",
-        "properties": {
-            "task": {
-                "type": "STRING",
-                "description": "The specific task or action to be completed."
-            },
-            "assignee": {
-                "type": "STRING",
-                "description": "Optional. The person or team responsible for the task."
-            },
-            "due_date": {
-                "type": "STRING",
-                "description": "Optional. The deadline for the action item (e.g., 'Next Friday', 'July 15, 2025')."
-            },
-        },
-        "required": ["task"]
-    },
-)
-
-# Combine all functions into a single Tool object
-meeting_tools = Tool(
-    function_declarations=[
-        extract_key_point_func,
-        extract_decision_func,
-        extract_action_item_func,
-    ],
-)
-
-async def extract_insights_with_gemini(transcript_text: str) -> list:
-    """
-    Extract insights from transcript text using Gemini API with function calling.
-    
-    Args:
-        transcript_text: The transcript text to analyze
-        
-    Returns:
-        List of extracted insights
-    """
-    try:
-        logger.info(f"[GEMINI] Starting insights extraction for transcript: {transcript_text[:100]}...")
-        # Check if API key is configured
-        api_key = getattr(settings, 'GEMINI_API_KEY', None)
-        if not api_key:
-            logger.error("GEMINI_API_KEY not configured in Django settings")
-            return []
-            
-        # Initialize Gemini model
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Prepare the prompt
-        prompt = f"""
-        Analyze this meeting transcript and extract insights using the available tools.
-        Look for key points, decisions, and action items.
-        
-        Transcript:
-        {transcript_text}
-        
-        Please extract any relevant insights from this conversation.
-        """
-        
-        logger.info(f"[GEMINI] Making API call with prompt: {prompt[:100]}...")
-        # Make API call with function calling
-        response = await asyncio.to_thread(
-            model.generate_content,
-            prompt,
-            tools=[meeting_tools],
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.1,
-                max_output_tokens=1024,
-            )
-        )
-        
-        logger.info(f"[GEMINI] Received response: {response}")
-        # Parse the response
-        insights = []
-        
-        if response.candidates and response.candidates[0].content:
-            content = response.candidates[0].content
-            
-            # Check for function calls in the response
-            if hasattr(content, 'parts') and content.parts:
-                for part in content.parts:
-                    if hasattr(part, 'function_call') and part.function_call:
-                        function_call = part.function_call
-                        
-                        # Extract function name and arguments
-                        function_name = function_call.name
-                        function_args = function_call.args
-                        
-                        logger.info(f"[GEMINI] Found function call: {function_name} with args: {function_args}")
-                        
-                        # Create insight object
-                        insight = {
-                            "type": "insight",
-                            "data": {
-                                "insight_type": function_name.replace("extract_", ""),
-                                **function_args
-                            }
-                        }
-                        
-                        insights.append(insight)
-            else:
-                logger.warning("[GEMINI] No function calls found in response")
-        else:
-            logger.warning("[GEMINI] No candidates or content in response")
-        
-        logger.info(f"[GEMINI] Final insights: {insights}")
-        return insights
-        
-    except Exception as e:
-        logger.error(f"Error extracting insights with Gemini: {e}")
-        return []
-
 LANGUAGE_MAP = {
     "English": "en",
     "Spanish": "es",
@@ -221,8 +70,14 @@ class MeetingConsumer(AsyncWebsocketConsumer):
             self.target_languages = {}  # Dict: recording_id -> target_language
             self.is_processing = False  # Prevent concurrent jobs
             self.audio_chunks = []  # Store all audio chunks for multi-recording
+            self.recording_transcripts = {}  # Dict: recording_id -> enriched transcripts, for retranslation
+            self.late_insights = {}  # Dict: recording_id -> insights task that missed the deadline
+            self.background_tasks = set()  # Pipeline, retranslation and insights tasks of this connection
             self.meeting_id = None  # Track current meeting ID
             self.meeting_title = "Untitled Meeting"  # Default meeting title
+            self.asr_mode = None  # Per-meeting ASR mode, None uses the server default
+            self.source_language = None  # Declared meeting language, None means auto-detect
+            self.profile = None  # Requested processing profile, None uses the server default
             logger.info("MeetingConsumer initialized for batch processing")
         except Exception as e:
             logger.error(f"Failed to initialize MeetingConsumer: {e}")
@@ -241,6 +96,29 @@ class MeetingConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         logger.info(f"[MEETING] User closed the meeting (WebSocket disconnected, code: {close_code})")
+        if self.audio_processor is not None and self.audio_processor.pretranslation is not None:
+            self.audio_processor.pretranslation.cancel(self.channel_name)
+        # Stop in-flight work first, so it cannot recreate the state discarded below
+        tasks = list(self.background_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # State may live under the connection (before start_meeting) and under the meeting id
+        for key in {self.channel_name, self.meeting_key}:
+            self.discard_meeting_state(key)
+
+    def spawn(self, coro):
+        """Run a coroutine as a background task of this connection; disconnect cancels it."""
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    def discard_meeting_state(self, key):
+        """Drop the insights state and speaker registry kept under a meeting key."""
+        get_insights_engine().discard(key)
+        if self.audio_processor is not None:
+            self.audio_processor.speaker_registries.discard(key)
 
     async def receive(self, text_data=None, bytes_data=None):
         try:
@@ -288,7 +166,7 @@ class MeetingConsumer(AsyncWebsocketConsumer):
                 # Set default target language for this recording
                 self.target_languages[recording_id] = 'en'
                 # Start background task for processing
-                asyncio.create_task(self.process_audio_in_background(audio_chunk, self.target_languages[recording_id], recording_id))
+                self.spawn(self.process_audio_in_background(audio_chunk, self.target_languages[recording_id], recording_id))
 
             elif text_data:
                 try:
@@ -304,52 +182,9 @@ class MeetingConsumer(AsyncWebsocketConsumer):
                             else:
                                 logger.warning(f"Unknown language received: {lang_value}, defaulting to 'en'")
                                 self.target_languages[recording_id] = 'en'
-                        # Re-translate the selected recording
-                        if self.audio_processor and recording_id is not None and 0 <= recording_id < len(self.audio_chunks):
-                            target_lang = self.target_languages.get(recording_id, 'en')
-                            logger.info(f"[RETRANSLATE] Re-translating recording {recording_id} to {target_lang}")
-                            audio_chunk = self.audio_chunks[recording_id]
-                            result = await asyncio.to_thread(self.audio_processor.enrich_transcript_batch, audio_chunk, None, target_lang)
-                            
-                            # Update the recording in the database with the new translation
-                            if self.meeting_id and result.get('enriched_transcripts'):
-                                logger.info(f"[RETRANSLATE] Attempting to update database for recording {recording_id}")
-                                try:
-                                    # Find the recording by its recording_id field, not by array index
-                                    existing_recording = mongodb_client.get_recording_by_recording_id(self.meeting_id, str(recording_id))
-                                    if existing_recording:
-                                        logger.info(f"[RETRANSLATE] Found recording in database: {existing_recording['_id']}")
-                                        # Update the transcripts with new translations
-                                        updated_transcripts = result['enriched_transcripts']
-                                        logger.info(f"[RETRANSLATE] Updated transcripts: {updated_transcripts}")
-                                        
-                                        # Update the recording in database
-                                        success = mongodb_client.update_recording_transcripts(
-                                            existing_recording['_id'], 
-                                            updated_transcripts, 
-                                            target_lang
-                                        )
-                                        if success:
-                                            logger.info(f"[RETRANSLATE] Successfully updated recording {recording_id} in database with {target_lang} translation")
-                                        else:
-                                            logger.error(f"[RETRANSLATE] Failed to update recording {recording_id} in database")
-                                    else:
-                                        logger.warning(f"[RETRANSLATE] Could not find recording with recording_id {recording_id} in database")
-                                        # Debug: let's see what recordings exist for this meeting
-                                        all_recordings = mongodb_client.get_recordings_by_meeting_id(self.meeting_id)
-                                        logger.info(f"[RETRANSLATE] All recordings for meeting {self.meeting_id}: {[r.get('recording_id') for r in all_recordings]}")
-                                except Exception as e:
-                                    logger.error(f"[RETRANSLATE] Error updating recording in database: {e}")
-                                    import traceback
-                                    logger.error(f"[RETRANSLATE] Full traceback: {traceback.format_exc()}")
-                            else:
-                                logger.warning(f"[RETRANSLATE] No meeting_id or enriched_transcripts found. meeting_id: {self.meeting_id}, result: {result}")
-                            
-                            await self.send(text_data=json.dumps({
-                                'type': 'enriched_transcripts',
-                                'data': result,
-                                'recording_id': recording_id
-                            }))
+                        # Re-translate the selected recording in the background
+                        if self.audio_processor and recording_id is not None:
+                            self.spawn(self.retranslate_in_background(recording_id, self.target_languages.get(recording_id, 'en')))
                         else:
                             await self.send(text_data=json.dumps({
                                 'error': 'No audio to retranslate for this recording.'
@@ -359,11 +194,21 @@ class MeetingConsumer(AsyncWebsocketConsumer):
                         # Create a new meeting in MongoDB
                         meeting_data = {
                             'title': data.get('title', 'Untitled Meeting'),
-                            'source_language': data.get('source_language', 'en'),
+                            'source_language': data.get('source_language', 'auto'),
                             'target_language': data.get('target_language', 'en'),
                         }
+                        if data.get('asr_mode') in ('segments', 'longform'):
+                            meeting_data['asr_mode'] = data['asr_mode']
+                        if data.get('profile') in PROCESSING_PROFILES or data.get('profile') == AUTO_PROFILE:
+                            meeting_data['profile'] = data['profile']
+                        if self.meeting_id:
+                            # A new meeting on the same connection, the previous one's state is done
+                            self.discard_meeting_state(self.meeting_id)
                         self.meeting_id = mongodb_client.save_meeting(meeting_data)
                         self.meeting_title = meeting_data['title']
+                        self.asr_mode = meeting_data.get('asr_mode')
+                        self.profile = meeting_data.get('profile')
+                        self.source_language = meeting_data['source_language'] if meeting_data['source_language'] in LANGUAGE_CODES else None
                         logger.info(f"[MEETING] Created new meeting with ID: {self.meeting_id}")
                         await self.send(text_data=json.dumps({
                             'type': 'meeting_created',
@@ -453,14 +298,24 @@ class MeetingConsumer(AsyncWebsocketConsumer):
             except:
                 pass
 
+    @property
+    def meeting_key(self):
+        """Key of per-meeting state (speaker registry, insights): the meeting, or this connection before a meeting exists."""
+        return self.meeting_id or self.channel_name
+
     async def process_audio_in_background(self, audio_chunk, target_language, recording_id=None):
         try:
             logger.info("[PROCESSING] System started processing the recording (background task).")
-            result = await asyncio.to_thread(self.run_full_pipeline, audio_chunk, target_language)
-            logger.info("[PROCESSING] System finished processing the recording (background task).")
+            profile = load_monitor.choose_profile(self.profile)
+            result = await self.run_full_pipeline(audio_chunk, target_language, profile, recording_id)
+            result['profile'] = profile
+            logger.info(f"[PROCESSING] System finished processing the recording (background task) with profile {profile}.")
             # Always include recording_id in the response for frontend mapping
+            saved_recording_id = None
             if recording_id is not None:
                 result['recording_id'] = recording_id
+                if result.get('data', {}).get('enriched_transcripts'):
+                    self.recording_transcripts[recording_id] = result['data']['enriched_transcripts']
                 
                 # Save recording to MongoDB if meeting exists
                 if self.meeting_id and result.get('data', {}).get('enriched_transcripts'):
@@ -481,8 +336,13 @@ class MeetingConsumer(AsyncWebsocketConsumer):
                             logger.warning(f"[MONGODB] Failed to save recording {recording_id}")
                     except Exception as e:
                         logger.error(f"[MONGODB] Error saving recording: {e}")
+                if result.get('data', {}).get('enriched_transcripts'):
+                    self.schedule_pretranslation(recording_id, target_language, saved_recording_id)
             
             await self.send(text_data=json.dumps(result))
+            late = self.late_insights.pop(recording_id, None)
+            if late is not None:
+                self.spawn(self.deliver_late_insights(late, recording_id, saved_recording_id))
         except Exception as e:
             logger.error(f"Error in batch processing (background task): {e}")
             await self.send(text_data=json.dumps({
@@ -492,48 +352,171 @@ class MeetingConsumer(AsyncWebsocketConsumer):
         finally:
             self.is_processing = False
 
-    def run_full_pipeline(self, audio_chunk, target_language):
+    async def retranslate_in_background(self, recording_id, target_language):
+        """
+        Retranslate a recording. A language translated before is served from the stored
+        per-language translations without running any model. Otherwise only the
+        translation stage runs, on the recording's transcripts kept by this connection
+        or stored in MongoDB; the full pipeline runs only when neither exists but the
+        audio does.
+        """
+        try:
+            logger.info(f"[RETRANSLATE] Re-translating recording {recording_id} to {target_language}")
+            existing_recording = None
+            if self.meeting_id:
+                existing_recording = await asyncio.to_thread(mongodb_client.get_recording_by_recording_id, self.meeting_id, str(recording_id))
+            transcripts = self.recording_transcripts.get(recording_id) or (existing_recording or {}).get('transcripts')
+            stored = None
+            if transcripts:
+                stored_language = (existing_recording or {}).get('target_language') if recording_id not in self.recording_transcripts else None
+                stored = transcripts_in_language(transcripts, target_language, stored_language)
+            profile = load_monitor.choose_profile(self.profile)
+            if stored is not None:
+                logger.info(f"[RETRANSLATE] Serving stored {target_language} translation of recording {recording_id}")
+                result = {'enriched_transcripts': stored}
+            elif transcripts or (isinstance(recording_id, int) and 0 <= recording_id < len(self.audio_chunks)):
+                # Foreground work: pre-translation pauses while this runs
+                load_monitor.job_started()
+                try:
+                    if transcripts:
+                        enriched_transcripts = await asyncio.to_thread(self.audio_processor.translate_transcripts, transcripts, target_language, profile)
+                        result = {'enriched_transcripts': enriched_transcripts}
+                    else:
+                        logger.info(f"[RETRANSLATE] No transcripts for recording {recording_id}, running the full pipeline")
+                        result = await asyncio.to_thread(self.audio_processor.enrich_transcript_batch, self.audio_chunks[recording_id], None, target_language, asr_mode=self.asr_mode, source_language=self.source_language, profile=profile, speaker_registry=self.audio_processor.speaker_registries.get(self.meeting_key))
+                finally:
+                    load_monitor.job_finished(0, 0)
+            else:
+                await self.send(text_data=json.dumps({
+                    'error': 'No audio to retranslate for this recording.'
+                }))
+                return
+
+            if self.target_languages.get(recording_id, target_language) != target_language:
+                # A newer retranslation of this recording was requested meanwhile
+                logger.info(f"[RETRANSLATE] Dropping stale {target_language} result for recording {recording_id}")
+                return
+            if result.get('enriched_transcripts'):
+                self.recording_transcripts[recording_id] = result['enriched_transcripts']
+
+            # Update the recording in the database with the new translation
+            if existing_recording and result.get('enriched_transcripts'):
+                success = await asyncio.to_thread(
+                    mongodb_client.update_recording_translation,
+                    existing_recording['_id'],
+                    result['enriched_transcripts'],
+                    target_language
+                )
+                if success:
+                    logger.info(f"[RETRANSLATE] Successfully updated recording {recording_id} in database with {target_language} translation")
+                else:
+                    logger.error(f"[RETRANSLATE] Failed to update recording {recording_id} in database")
+            elif self.meeting_id:
+                logger.warning(f"[RETRANSLATE] Could not find recording with recording_id {recording_id} in database")
+
+            await self.send(text_data=json.dumps({
+                'type': 'enriched_transcripts',
+                'data': result,
+                'recording_id': recording_id
+            }))
+        except Exception as e:
+            logger.error(f"[RETRANSLATE] Error retranslating recording {recording_id}: {e}")
+            await self.send(text_data=json.dumps({
+                'error': 'Failed to retranslate recording',
+                'details': str(e)
+            }))
+
+    def likely_languages(self, current_language):
+        """
+        Languages a recording is likely to be switched to: the ones this meeting already
+        used (most recent first), then PRETRANSLATION_LANGUAGES, up to
+        PRETRANSLATION_MAX_LANGUAGES.
         """
-        Sequentially process the audio chunk: transcription, diarization, translation, Gemini insights.
+        used = list(self.target_languages.values())[::-1]
+        candidates = dict.fromkeys(used + list(getattr(settings, 'PRETRANSLATION_LANGUAGES', [])))
+        languages = [lang for lang in candidates if lang != current_language and lang in LANGUAGE_CODES]
+        return languages[:int(getattr(settings, 'PRETRANSLATION_MAX_LANGUAGES', 2))]
+
+    def schedule_pretranslation(self, recording_id, current_language, saved_recording_id=None):
+        """Queue idle-time translation of a finished recording into its likely languages."""
+        scheduler = self.audio_processor.pretranslation if self.audio_processor else None
+        transcripts = self.recording_transcripts.get(recording_id)
+        if scheduler is None or not transcripts:
+            return
+        languages = [lang for lang in self.likely_languages(current_language) if transcripts_in_language(transcripts, lang) is None]
+        loop = asyncio.get_running_loop()
+
+        def on_done(translated, language):
+            # Runs on the scheduler thread
+            loop.call_soon_threadsafe(self._store_pretranslation, recording_id, translated, language)
+            if saved_recording_id:
+                mongodb_client.update_recording_translation(saved_recording_id, translated, language, display=False)
+
+        logger.info(f"[PRETRANSLATE] Scheduling recording {recording_id} for {languages}")
+        scheduler.submit(self.channel_name, transcripts, languages, on_done)
+
+    def _store_pretranslation(self, recording_id, translated, language):
+        """Merge a pre-translated language into the recording's kept transcripts."""
+        current = self.recording_transcripts.get(recording_id)
+        if not current or len(current) != len(translated):
+            return
+        for t, done in zip(current, translated):
+            t.setdefault('translations', {})[language] = done['translated_transcript']
+            if done.get('pivot_transcript') is not None:
+                t.setdefault('pivot_transcript', done['pivot_transcript'])
+
+    async def run_full_pipeline(self, audio_chunk, target_language, profile=None, recording_id=None):
+        """
+        Per-recording stage graph. Diarization + ASR come first; translation and Gemini
+        insights both depend only on the transcripts and run concurrently. Blocking model
+        stages run in worker threads.
+        Insights get INSIGHTS_DEADLINE_SECONDS from the end of ASR: if they are not ready
+        once translation is done and the deadline passed, the result goes out without
+        them ('insights_pending') and the task is kept in late_insights[recording_id].
+        `profile` is the processing profile name chosen for this job.
+        The load monitor counts the job, and its real-time factor, from the start of
+        diarization to the end of translation; waiting for insights is not model work.
         Returns a single dictionary with all results.
         """
         try:
-            # 1. Transcription + Diarization + Translation (enrich_transcript_batch)
-            enriched = self.audio_processor.enrich_transcript_batch(
-                audio_chunk=audio_chunk,
-                transcript_list=None,  # Let the processor generate transcripts from scratch
-                target_language=target_language
-            )
+            loop = asyncio.get_running_loop()
+            insights_task = None
+            load_monitor.job_started()
+            started_at = loop.time()
+            try:
+                # 1. Diarization + transcription
+                enriched = await asyncio.to_thread(
+                    self.audio_processor.transcribe_recording,
+                    audio_chunk,
+                    asr_mode=self.asr_mode,
+                    source_language=self.source_language,
+                    profile=profile,
+                    speaker_registry=self.audio_processor.speaker_registries.get(self.meeting_key)
+                )
+                if enriched is not None:
+                    # 2. Translation || Gemini insights
+                    deadline = loop.time() + float(getattr(settings, 'INSIGHTS_DEADLINE_SECONDS', 10.0))
+                    insights_task = self.spawn(self.extract_recording_insights(enriched['enriched_transcripts'], profile))
+                    enriched['enriched_transcripts'] = await asyncio.to_thread(
+                        self.audio_processor.translate_transcripts, enriched['enriched_transcripts'], target_language, profile
+                    )
+            finally:
+                load_monitor.job_finished(len(audio_chunk) / 16000, loop.time() - started_at)
             insights = []
-            if enriched and enriched.get('enriched_transcripts'):
-                transcript_text = '\n'.join([
-                    t.get('original_transcript', '')
-                    for t in enriched['enriched_transcripts']
-                ])
-                if transcript_text.strip():
-                    # Gemini insights (sync call in thread)
-                    try:
-                        logger.info(f"[INSIGHTS] Extracting AI insights from transcript: {transcript_text[:100]}...")
-                        # Create a new event loop for this thread
-                        import asyncio
-                        try:
-                            loop = asyncio.get_event_loop()
-                        except RuntimeError:
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                        
-                        insights = loop.run_until_complete(extract_insights_with_gemini(transcript_text))
-                        logger.info(f"[INSIGHTS] Extracted {len(insights)} AI insights: {insights}")
-                    except Exception as e:
-                        logger.error(f"Gemini insights extraction failed: {e}")
-                        insights = []
+            insights_pending = False
+            if insights_task is not None:
+                done, _ = await asyncio.wait({insights_task}, timeout=max(0.0, deadline - loop.time()))
+                if insights_task in done:
+                    insights = insights_task.result()
                 else:
-                    logger.warning("[INSIGHTS] No transcript text to extract insights from")
-                    insights = []
+                    logger.info(f"[INSIGHTS] Deadline passed for recording {recording_id}, sending transcripts first")
+                    self.late_insights[recording_id] = insights_task
+                    insights_pending = True
             return {
                 'type': 'enriched_transcripts',
                 'data': enriched,
-                'insights': insights
+                'insights': insights,
+                'insights_pending': insights_pending
             }
         except Exception as e:
             logger.error(f"Full pipeline failed: {e}")
@@ -541,3 +524,39 @@ class MeetingConsumer(AsyncWebsocketConsumer):
                 'error': 'Full pipeline failed',
                 'details': str(e)
             }
+
+    async def deliver_late_insights(self, insights_task, recording_id, saved_recording_id=None):
+        """Send insights that missed the pipeline deadline as an 'insights' message and store them with the recording."""
+        try:
+            insights = await insights_task
+            if saved_recording_id and insights:
+                await asyncio.to_thread(mongodb_client.update_recording_insights, saved_recording_id, insights)
+            await self.send(text_data=json.dumps({
+                'type': 'insights',
+                'recording_id': recording_id,
+                'insights': insights
+            }))
+        except Exception as e:
+            logger.error(f"[INSIGHTS] Failed to deliver late insights for recording {recording_id}: {e}")
+
+    async def extract_recording_insights(self, transcripts, profile=None):
+        """
+        Insights stage on the original transcripts of one recording. The meeting's
+        insights engine keeps the rolling summary and earlier insights, so only new
+        insights are returned; the local extractor answers while Gemini is failing.
+        """
+        if not get_profile(profile)['insights']:
+            logger.info(f"[INSIGHTS] Skipped by processing profile {profile}")
+            return []
+        transcript_text = '\n'.join([t.get('original_transcript', '') for t in transcripts])
+        if not transcript_text.strip():
+            logger.warning("[INSIGHTS] No transcript text to extract insights from")
+            return []
+        try:
+            logger.info(f"[INSIGHTS] Extracting AI insights from transcript: {transcript_text[:100]}...")
+            insights = await extract_meeting_insights(self.meeting_key, transcript_text)
+            logger.info(f"[INSIGHTS] Extracted {len(insights)} AI insights: {insights}")
+            return insights
+        except Exception as e:
+            logger.error(f"Gemini insights extraction failed: {e}")
+            return []
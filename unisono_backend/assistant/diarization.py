@@ -0,0 +1,136 @@
+import logging
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def run_pyannote(pipeline, audio, sample_rate=16000):
+    """
+    Run the pyannote pipeline on one buffer without copying it.
+    Returns (turns, embeddings): turns as (start, end, label) and one embedding per label
+    (None entries when the pipeline could not embed a speaker).
+    """
+    waveform = torch.from_numpy(audio).unsqueeze(0)
+    diarization, embeddings = pipeline({'waveform': waveform, 'sample_rate': sample_rate}, return_embeddings=True)
+    turns = [(turn.start, turn.end, label) for turn, _, label in diarization.itertracks(yield_label=True)]
+    speaker_embeddings = {}
+    for k, label in enumerate(diarization.labels()):
+        embedding = embeddings[k] if embeddings is not None and k < len(embeddings) else None
+        if embedding is not None and np.all(np.isfinite(embedding)):
+            speaker_embeddings[label] = np.asarray(embedding, dtype=np.float32)
+        else:
+            speaker_embeddings[label] = None
+    return turns, speaker_embeddings
+
+
+class WindowedDiarizer:
+    """
+    Memory-bounded diarization for long recordings.
+
+    Audio is fed incrementally; every complete window (of `window_seconds`, overlapping
+    the previous one by `overlap_seconds`) is diarized as soon as it is available and
+    only the audio still needed by the next window is kept. Each window keeps the turns
+    in the part it owns (up to the middle of each overlap) and one embedding per local
+    speaker. finalize() clusters the local speakers globally by cosine similarity and
+    returns turns with stitched labels.
+    """
+
+    def __init__(self, pipeline, sample_rate=16000, window_seconds=600.0, overlap_seconds=30.0, similarity_threshold=0.6):
+        self.pipeline = pipeline
+        self.sample_rate = sample_rate
+        self.window = int(window_seconds * sample_rate)
+        self.overlap = min(int(overlap_seconds * sample_rate), self.window // 2)
+        self.similarity_threshold = similarity_threshold
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # Sample offset of _buffer[0] in the recording
+        self._windows_done = 0
+        # Per window: turns (start, end, local label) in recording time, local embeddings
+        self._local_turns = []
+        self._local_speakers = []
+
+    def feed(self, audio):
+        """Add audio and diarize every window that is now complete."""
+        audio = np.asarray(audio, dtype=np.float32)
+        # Windows are views into the buffer, a whole recording fed at once is never copied
+        self._buffer = np.concatenate((self._buffer, audio)) if len(self._buffer) else audio
+        step = self.window - self.overlap
+        while len(self._buffer) >= self.window:
+            # A full window with more audio possibly following: not the last one
+            self._process_window(self._buffer[:self.window], is_last=False)
+            self._buffer = self._buffer[step:]
+            self._buffer_start += step
+
+    def finalize(self):
+        """Diarize the remaining audio and return (turns, embeddings) with global labels."""
+        self._process_window(self._buffer, is_last=True)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        return self._cluster()
+
+    def _process_window(self, audio, is_last):
+        if len(audio) == 0:
+            return
+        offset = self._buffer_start / self.sample_rate
+        duration = len(audio) / self.sample_rate
+        half_overlap = self.overlap / 2 / self.sample_rate
+        owned_start = offset + (half_overlap if self._windows_done > 0 else 0.0)
+        owned_end = offset + duration - (0.0 if is_last else half_overlap)
+        turns, embeddings = run_pyannote(self.pipeline, audio, self.sample_rate)
+        kept = []
+        for start, end, label in turns:
+            start, end = max(offset + start, owned_start), min(offset + end, owned_end)
+            if end > start:
+                kept.append((start, end, label))
+        logger.info(f"[DIARIZATION] Window {self._windows_done} at {offset:.0f}s: {len(kept)} turns, {len(embeddings)} speakers")
+        self._local_turns.append(kept)
+        self._local_speakers.append(embeddings)
+        self._windows_done += 1
+
+    def _cluster(self):
+        """
+        Greedy global clustering of local speakers. A local speaker joins the most
+        similar global centroid above the threshold, unless another speaker of the same
+        window already took it; centroids are duration-weighted means. Speakers
+        without an embedding always start a new global speaker.
+        """
+        centroids = []  # Normalized centroid per global speaker, None if not embedded
+        weights = []
+        mapping = []  # Per window: local label -> global index
+        for turns, embeddings in zip(self._local_turns, self._local_speakers):
+            durations = {}
+            for start, end, label in turns:
+                durations[label] = durations.get(label, 0.0) + (end - start)
+            window_map = {}
+            # Longest local speakers claim centroids first
+            for label in sorted(embeddings, key=lambda l: -durations.get(l, 0.0)):
+                weight = durations.get(label, 0.0)
+                vector = embeddings[label]
+                best = None
+                if vector is not None:
+                    vector = vector / (np.linalg.norm(vector) + 1e-8)
+                    taken = set(window_map.values())
+                    candidates = [k for k, c in enumerate(centroids) if c is not None and k not in taken]
+                    if candidates:
+                        similarities = np.stack([centroids[k] for k in candidates]) @ vector
+                        j = int(np.argmax(similarities))
+                        if similarities[j] >= self.similarity_threshold:
+                            best = candidates[j]
+                if best is None:
+                    centroids.append(vector)
+                    weights.append(weight)
+                    best = len(centroids) - 1
+                else:
+                    merged = centroids[best] * weights[best] + vector * weight
+                    centroids[best] = merged / (np.linalg.norm(merged) + 1e-8)
+                    weights[best] += weight
+                window_map[label] = best
+            mapping.append(window_map)
+
+        turns = []
+        for window_turns, window_map in zip(self._local_turns, mapping):
+            for start, end, label in window_turns:
+                turns.append((start, end, f"SPEAKER_{window_map[label]:02d}"))
+        turns.sort()
+        embeddings = {f"SPEAKER_{k:02d}": centroid for k, centroid in enumerate(centroids)}
+        logger.info(f"[DIARIZATION] Clustered {sum(len(m) for m in mapping)} window speakers into {len(centroids)} speakers")
+        return turns, embeddings
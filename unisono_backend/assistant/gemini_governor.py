@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes and google.api_core exception names worth retrying
+RETRYABLE_CODES = {429, 500, 503, 504}
+RETRYABLE_ERRORS = {'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded'}
+
+
+def is_retryable(error):
+    code = getattr(error, 'code', None)
+    return (isinstance(code, int) and code in RETRYABLE_CODES) or type(error).__name__ in RETRYABLE_ERRORS
+
+
+class InsightsGovernor:
+    """
+    Process-wide admission control for Gemini requests.
+
+    Requests wait in per-meeting queues served round robin, so one meeting's burst
+    cannot starve the others; at most `max_concurrency` run at once. Each attempt
+    takes a token from a bucket refilled at `rate_per_minute` (up to `burst`).
+    Rate-limit and server errors are retried with full-jitter exponential backoff.
+    Used from the server's event loop; stats() may be called from other threads.
+    """
+
+    def __init__(self, rate_per_minute=60, burst=5, max_concurrency=4, max_retries=4, base_delay=1.0, max_delay=30.0):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1.0, float(burst))
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._waiting = OrderedDict()  # meeting key -> deque of futures, in round-robin order
+        # Metrics
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled = 0
+        self._latencies = deque(maxlen=200)
+        self._queue_waits = deque(maxlen=200)
+        self._metrics_lock = threading.Lock()  # Guards the deques against stats() readers
+
+    async def run(self, meeting_key, request):
+        """Run `request()` (a coroutine factory) under the governor's limits."""
+        self.requests += 1
+        enqueued_at = time.monotonic()
+        await self._acquire(meeting_key)
+        with self._metrics_lock:
+            self._queue_waits.append(time.monotonic() - enqueued_at)
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self._take_token()
+                started = time.monotonic()
+                try:
+                    result = await request()
+                    with self._metrics_lock:
+                        self._latencies.append(time.monotonic() - started)
+                    return result
+                except Exception as e:
+                    if not is_retryable(e) or attempt == self.max_retries:
+                        self.failures += 1
+                        raise
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                    self.retries += 1
+                    logger.warning(f"[GEMINI] {type(e).__name__} for meeting {meeting_key}, retry {attempt + 1} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        finally:
+            self._release()
+
+    async def _acquire(self, meeting_key):
+        if self._in_flight < self.max_concurrency and not self._waiting:
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(meeting_key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before cancellation, hand it on
+                self._release()
+            raise
+
+    def _release(self):
+        self._in_flight -= 1
+        while self._in_flight < self.max_concurrency and self._waiting:
+            meeting_key, queue = next(iter(self._waiting.items()))
+            future = queue.popleft()
+            # Rotate: the meeting goes to the back of the line
+            del self._waiting[meeting_key]
+            if queue:
+                self._waiting[meeting_key] = queue
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            self.throttled += 1
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def stats(self):
+        with self._metrics_lock:
+            latencies = sorted(self._latencies)
+            queue_waits = list(self._queue_waits)
+        # One-call copy: the event loop may reshape the wait queues meanwhile
+        waiting = list(self._waiting.values())
+        return {
+            'queue_depth': sum(len(queue) for queue in waiting),
+            'queued_meetings': len(waiting),
+            'in_flight': self._in_flight,
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'throttled': self.throttled,
+            'mean_queue_wait_ms': round(1000 * sum(queue_waits) / len(queue_waits), 1) if queue_waits else 0.0,
+            'mean_latency_ms': round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            'p95_latency_ms': round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else 0.0,
+        }
+
+
+class GovernedInsightsClient:
+    """InsightsClient wrapper sending every request through an InsightsGovernor."""
+
+    def __init__(self, client, governor):
+        self.client = client
+        self.governor = governor
+        self.model_name = client.model_name
+
+    async def generate(self, prompt, tools, max_output_tokens=1024, temperature=0.1, meeting_key=None):
+        return await self.governor.run(
+            meeting_key,
+            lambda: self.client.generate(prompt, tools, max_output_tokens=max_output_tokens, temperature=temperature, meeting_key=meeting_key)
+        )
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing service. After `failure_threshold` consecutive failures the
+    circuit opens and allow() refuses calls; after `reset_seconds` one trial call is let
+    through (half-open), and its success closes the circuit again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_seconds=60.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        # Metrics
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+            # Let one trial call through
+            self.state = 'half_open'
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self.state != 'closed':
+            logger.info("[GEMINI] Circuit closed, service recovered")
+        self.state = 'closed'
+        self._failures = 0
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == 'half_open' or self._failures >= self.failure_threshold:
+            if self.state != 'open':
+                self.trips += 1
+                logger.warning(f"[GEMINI] Circuit open after {self._failures} failures, retrying in {self.reset_seconds:.0f}s")
+            self.state = 'open'
+            self._opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self._failures,
+            'trips': self.trips,
+            'rejected': self.rejected,
+        }
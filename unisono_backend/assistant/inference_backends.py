@@ -0,0 +1,371 @@
+import logging
+import os
+from typing import List, Optional, Protocol
+import torch
+from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, AutoTokenizer, AutoModelForSeq2SeqLM
+from django.conf import settings
+from .model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+WHISPER_MODEL_NAME = 'distil-whisper/distil-large-v3'
+
+TRANSLATION_MODEL_NAMES = {
+    ('en', 'es'): 'Helsinki-NLP/opus-mt-en-es',
+    ('en', 'fr'): 'Helsinki-NLP/opus-mt-en-fr',
+    ('en', 'zh'): 'Helsinki-NLP/opus-mt-en-zh',
+    ('zh', 'en'): 'Helsinki-NLP/opus-mt-zh-en',
+    ('es', 'en'): 'Helsinki-NLP/opus-mt-es-en',
+    ('fr', 'en'): 'Helsinki-NLP/opus-mt-fr-en',
+}
+
+
+class TranscriptionBackend(Protocol):
+    """Speech-to-text engine used by AudioProcessor."""
+    name: str
+
+    def transcribe_batch(self, audio_batch, sample_rate=16000, language=None, return_timestamps=False, num_beams=1) -> List[dict]:
+        """
+        Transcribe a batch of audio arrays (each at most one 30 second window).
+        Returns one dict per array with 'text', 'language' and 'offsets'
+        (timestamped chunks, only filled when return_timestamps is set).
+        """
+        ...
+
+    def detect_language(self, audio, sample_rate=16000) -> Optional[str]:
+        """Language code spoken in (the first window of) `audio`, or None."""
+        ...
+
+
+class TranslationBackend(Protocol):
+    """Machine translation engine used by AudioProcessor."""
+    name: str
+
+    def supports(self, translation_key) -> bool:
+        """Whether a (src, tgt) language pair can be translated."""
+        ...
+
+    def load(self, translation_key) -> bool:
+        """Load a pair ahead of use; False when it cannot be loaded now."""
+        ...
+
+    def translate_batch(self, texts, translation_key, num_beams=None) -> List[str]:
+        """Translate a list of texts for one (src, tgt) pair, in order."""
+        ...
+
+    def stats(self) -> dict:
+        """Model residency metrics."""
+        ...
+
+
+def quantize_dynamic_int8(model):
+    """
+    Dynamic int8 quantization of a model's Linear layers for CPU inference.
+    Weights are stored as int8 and activations are quantized on the fly.
+    """
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _translation_registry(name, model_names, load, size):
+    """
+    Model registry for translation pairs: pairs load on first use within
+    TRANSLATION_MODEL_MEMORY_MB (0 = unlimited); TRANSLATION_PINNED_PAIRS are loaded
+    at startup and never unloaded.
+    """
+    pinned = [tuple(pair.split('-')) for pair in getattr(settings, 'TRANSLATION_PINNED_PAIRS', [])]
+    registry = ModelRegistry(
+        name,
+        model_names.keys(),
+        load,
+        size,
+        max_bytes=int(float(getattr(settings, 'TRANSLATION_MODEL_MEMORY_MB', 0)) * 2 ** 20),
+        pinned=pinned
+    )
+    registry.preload(registry.pinned)
+    return registry
+
+
+def _torch_model_bytes(model):
+    return sum(t.numel() * t.element_size() for t in list(model.parameters()) + list(model.buffers()))
+
+
+def _directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def _language_codes(lang_to_id):
+    """Map Whisper language token ids to language codes ('<|en|>' -> 'en')."""
+    return {token_id: token[2:-2] for token, token_id in lang_to_id.items()}
+
+
+class TransformersWhisperBackend:
+    """Whisper through transformers AutoModelForSpeechSeq2Seq.generate."""
+    name = 'transformers'
+
+    def __init__(self, model_name=WHISPER_MODEL_NAME, quantization=''):
+        hf_token = getattr(settings, 'HUGGINGFACE_API_KEY', None)
+        self.processor = AutoProcessor.from_pretrained(model_name, token=hf_token)
+        self.model = AutoModelForSpeechSeq2Seq.from_pretrained(model_name, token=hf_token)
+        if quantization == 'int8':
+            self.model = quantize_dynamic_int8(self.model)
+            logger.info("Whisper model quantized to int8")
+        self.lang_to_id = getattr(self.model.generation_config, 'lang_to_id', None) or {}
+        self.id_to_lang = _language_codes(self.lang_to_id)
+
+    def transcribe_batch(self, audio_batch, sample_rate=16000, language=None, return_timestamps=False, num_beams=1):
+        inputs = self.processor(audio_batch, sampling_rate=sample_rate, return_tensors="pt")
+        with torch.no_grad():
+            generated_ids = self.model.generate(
+                **inputs,
+                task="transcribe",
+                language=language,
+                return_timestamps=return_timestamps,
+                num_beams=num_beams
+            )
+        results = []
+        for ids in generated_ids:
+            if return_timestamps:
+                decoded = self.processor.tokenizer.decode(ids, skip_special_tokens=True, output_offsets=True)
+                text, offsets = decoded['text'], decoded['offsets']
+            else:
+                text, offsets = self.processor.tokenizer.decode(ids, skip_special_tokens=True), []
+            results.append({
+                'text': text.strip(),
+                'language': language or self._language_from_ids(ids),
+                'offsets': offsets
+            })
+        return results
+
+    def detect_language(self, audio, sample_rate=16000):
+        """A single decoder step from <|startoftranscript|>, restricted to the language tokens."""
+        if len(audio) == 0 or not self.lang_to_id:
+            return None
+        inputs = self.processor(audio, sampling_rate=sample_rate, return_tensors="pt")
+        decoder_input_ids = torch.tensor([[self.model.generation_config.decoder_start_token_id]])
+        with torch.no_grad():
+            logits = self.model(**inputs, decoder_input_ids=decoder_input_ids).logits[0, -1]
+        tokens = list(self.lang_to_id.keys())
+        lang_ids = torch.tensor([self.lang_to_id[token] for token in tokens])
+        return tokens[int(torch.argmax(logits[lang_ids]))][2:-2]
+
+    def _language_from_ids(self, generated_ids):
+        """Read the language token Whisper emits right after <|startoftranscript|>."""
+        for token_id in generated_ids[:4].tolist():
+            if token_id in self.id_to_lang:
+                return self.id_to_lang[token_id]
+        return 'en'
+
+
+class TransformersTranslationBackend:
+    """
+    MarianMT pairs through transformers AutoModelForSeq2SeqLM.generate.
+    Pairs are loaded on first use and unloaded under memory pressure (see ModelRegistry).
+    """
+    name = 'transformers'
+
+    def __init__(self, model_names=None, quantization=''):
+        self.model_names = model_names or TRANSLATION_MODEL_NAMES
+        self.quantization = quantization
+        self.models = _translation_registry(
+            'translation',
+            self.model_names,
+            self._load,
+            lambda entry: _torch_model_bytes(entry['model'])
+        )
+
+    def _load(self, translation_key):
+        hf_token = getattr(settings, 'HUGGINGFACE_API_KEY', None)
+        model_name = self.model_names[translation_key]
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name, token=hf_token)
+        tokenizer = AutoTokenizer.from_pretrained(model_name, token=hf_token)
+        if self.quantization == 'int8':
+            model = quantize_dynamic_int8(model)
+        logger.info(f"Translation model {translation_key[0]}->{translation_key[1]} loaded successfully")
+        return {
+            'model': model,
+            'tokenizer': tokenizer
+        }
+
+    def supports(self, translation_key):
+        return self.models.supports(translation_key)
+
+    def load(self, translation_key):
+        try:
+            self.models.get(translation_key)
+            return True
+        except KeyError:
+            return False
+
+    def stats(self):
+        return self.models.stats()
+
+    def translate_batch(self, texts, translation_key, num_beams=None):
+        entry = self.models.get(translation_key)
+        translation_model = entry['model']
+        translation_tokenizer = entry['tokenizer']
+        inputs = translation_tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+        inputs = inputs.to(translation_model.device)
+        with torch.no_grad():
+            if num_beams:
+                translated_ids = translation_model.generate(**inputs, num_beams=num_beams)
+            else:
+                translated_ids = translation_model.generate(**inputs)
+        return [text.strip() for text in translation_tokenizer.batch_decode(translated_ids, skip_special_tokens=True)]
+
+
+class CTranslate2WhisperBackend:
+    """
+    Whisper on CTranslate2 (optional dependency). Needs a model converted with
+    ct2-transformers-converter in CT2_WHISPER_MODEL_DIR; features and tokens still
+    come from the transformers processor.
+    """
+    name = 'ctranslate2'
+
+    def __init__(self, model_name=WHISPER_MODEL_NAME, quantization=''):
+        import ctranslate2
+        self.ctranslate2 = ctranslate2
+        hf_token = getattr(settings, 'HUGGINGFACE_API_KEY', None)
+        model_dir = getattr(settings, 'CT2_WHISPER_MODEL_DIR', '')
+        if not model_dir:
+            raise ValueError("CT2_WHISPER_MODEL_DIR is not configured")
+        self.processor = AutoProcessor.from_pretrained(model_name, token=hf_token)
+        self.model = ctranslate2.models.Whisper(
+            model_dir,
+            device='cpu',
+            compute_type='int8' if quantization == 'int8' else 'default'
+        )
+        tokenizer = self.processor.tokenizer
+        self.sot_id = tokenizer.convert_tokens_to_ids('<|startoftranscript|>')
+        self.transcribe_id = tokenizer.convert_tokens_to_ids('<|transcribe|>')
+        self.no_timestamps_id = tokenizer.convert_tokens_to_ids('<|notimestamps|>')
+
+    def _features(self, audio_batch, sample_rate):
+        inputs = self.processor(audio_batch, sampling_rate=sample_rate, return_tensors="np")
+        return self.ctranslate2.StorageView.from_array(inputs.input_features)
+
+    def transcribe_batch(self, audio_batch, sample_rate=16000, language=None, return_timestamps=False, num_beams=1):
+        features = self._features(audio_batch, sample_rate)
+        if language:
+            languages = [language] * len(audio_batch)
+        else:
+            languages = [pairs[0][0][2:-2] for pairs in self.model.detect_language(features)]
+        tokenizer = self.processor.tokenizer
+        prompts = []
+        for lang in languages:
+            prompt = [self.sot_id, tokenizer.convert_tokens_to_ids(f'<|{lang}|>'), self.transcribe_id]
+            if not return_timestamps:
+                prompt.append(self.no_timestamps_id)
+            prompts.append(prompt)
+        generated = self.model.generate(features, prompts, beam_size=num_beams, return_scores=False)
+        results = []
+        for lang, prompt, result in zip(languages, prompts, generated):
+            ids = prompt + result.sequences_ids[0]
+            if return_timestamps:
+                decoded = tokenizer.decode(ids, skip_special_tokens=True, output_offsets=True)
+                text, offsets = decoded['text'], decoded['offsets']
+            else:
+                text, offsets = tokenizer.decode(ids, skip_special_tokens=True), []
+            results.append({'text': text.strip(), 'language': lang, 'offsets': offsets})
+        return results
+
+    def detect_language(self, audio, sample_rate=16000):
+        if len(audio) == 0:
+            return None
+        return self.model.detect_language(self._features([audio], sample_rate))[0][0][0][2:-2]
+
+
+class CTranslate2TranslationBackend:
+    """
+    MarianMT pairs on CTranslate2 (optional dependency). CT2_TRANSLATION_MODEL_DIRS
+    maps 'src-tgt' to a converted model directory; tokenizers come from the hub.
+    """
+    name = 'ctranslate2'
+
+    def __init__(self, model_names=None, quantization=''):
+        import ctranslate2
+        self.ctranslate2 = ctranslate2
+        self.quantization = quantization
+        self.model_dirs = {}
+        self.model_names = {}
+        model_dirs = getattr(settings, 'CT2_TRANSLATION_MODEL_DIRS', {})
+        for (src, tgt), model_name in (model_names or TRANSLATION_MODEL_NAMES).items():
+            model_dir = model_dirs.get(f'{src}-{tgt}')
+            if not model_dir:
+                logger.warning(f"No CTranslate2 model directory configured for {src}->{tgt}")
+                continue
+            self.model_dirs[(src, tgt)] = model_dir
+            self.model_names[(src, tgt)] = model_name
+        # Converted weights are memory mapped from the model directory, its size approximates residency
+        self.models = _translation_registry(
+            'ctranslate2 translation',
+            self.model_names,
+            self._load,
+            lambda entry: _directory_bytes(entry['model_dir'])
+        )
+
+    def _load(self, translation_key):
+        hf_token = getattr(settings, 'HUGGINGFACE_API_KEY', None)
+        model_dir = self.model_dirs[translation_key]
+        entry = {
+            'model': self.ctranslate2.Translator(
+                model_dir,
+                device='cpu',
+                compute_type='int8' if self.quantization == 'int8' else 'default'
+            ),
+            'tokenizer': AutoTokenizer.from_pretrained(self.model_names[translation_key], token=hf_token),
+            'model_dir': model_dir
+        }
+        logger.info(f"CTranslate2 translation model {translation_key[0]}->{translation_key[1]} loaded successfully")
+        return entry
+
+    def supports(self, translation_key):
+        return self.models.supports(translation_key)
+
+    def load(self, translation_key):
+        try:
+            self.models.get(translation_key)
+            return True
+        except KeyError:
+            return False
+
+    def stats(self):
+        return self.models.stats()
+
+    def translate_batch(self, texts, translation_key, num_beams=None):
+        entry = self.models.get(translation_key)
+        translator = entry['model']
+        tokenizer = entry['tokenizer']
+        source_tokens = [tokenizer.convert_ids_to_tokens(tokenizer.encode(text)) for text in texts]
+        results = translator.translate_batch(source_tokens, beam_size=num_beams or 1)
+        return [
+            tokenizer.decode(tokenizer.convert_tokens_to_ids(result.hypotheses[0]), skip_special_tokens=True).strip()
+            for result in results
+        ]
+
+
+TRANSCRIPTION_BACKENDS = {
+    'transformers': TransformersWhisperBackend,
+    'ctranslate2': CTranslate2WhisperBackend,
+}
+
+TRANSLATION_BACKENDS = {
+    'transformers': TransformersTranslationBackend,
+    'ctranslate2': CTranslate2TranslationBackend,
+}
+
+
+def create_transcription_backend(name=None, quantization=''):
+    """Build the configured transcription backend (ASR_BACKEND)."""
+    name = name or getattr(settings, 'ASR_BACKEND', 'transformers')
+    if name not in TRANSCRIPTION_BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return TRANSCRIPTION_BACKENDS[name](quantization=quantization)
+
+
+def create_translation_backend(name=None, quantization=''):
+    """Build the configured translation backend (TRANSLATION_BACKEND)."""
+    name = name or getattr(settings, 'TRANSLATION_BACKEND', 'transformers')
+    if name not in TRANSLATION_BACKENDS:
+        raise ValueError(f"Unknown translation backend: {name}")
+    return TRANSLATION_BACKENDS[name](quantization=quantization)
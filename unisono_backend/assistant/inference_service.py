@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching for one shared model.
+
+    Requests are submitted from any thread with a batch key (requests only share a
+    batch when their keys match, e.g. same forced language) and resolve a Future.
+    A single worker thread forms a batch as soon as `max_batch_size` requests are
+    waiting or the oldest request has waited `max_wait_ms`, then runs
+    `run_batch(key, payloads)`, which must return one result per payload.
+
+    A batch holds the oldest waiting request plus the requests closest to it in
+    `length(payload)`, so little padding is wasted. Every member is padded to the
+    longest one (at least `min_padded_length`) and the padded total stays within
+    `max_padded_length` (0 = unlimited). A request may lower the batch size it
+    can share (1 = run alone).
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=8, max_wait_ms=20, length=len, max_padded_length=0, min_padded_length=0):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.length = length
+        self.max_padded_length = max_padded_length
+        self.min_padded_length = min_padded_length
+        self._queues = {}
+        self._cond = threading.Condition()
+        self._worker = None
+        # Metrics
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    def submit(self, key, payload, max_batch_size=None, length=None):
+        """
+        Queue one request. `max_batch_size` caps the size of the batch it runs in and
+        `length` overrides `length(payload)`.
+        """
+        future = Future()
+        limit = max(1, min(self.max_batch_size, max_batch_size or self.max_batch_size))
+        length = self.length(payload) if length is None else length
+        with self._cond:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self._worker.start()
+            self._queues.setdefault(key, deque()).append((payload, future, time.monotonic(), limit, length))
+            self.requests += 1
+            self._cond.notify()
+        return future
+
+    def _next_batch(self):
+        """Block until a batch is due, then pop it. Called with the condition held."""
+        while True:
+            waiting = [(queue[0][2], key) for key, queue in self._queues.items() if queue]
+            if not waiting:
+                self._cond.wait()
+                continue
+            # Serve the key holding the oldest request first
+            oldest, key = min(waiting, key=lambda item: item[0])
+            queue = self._queues[key]
+            remaining = oldest + self.max_wait - time.monotonic()
+            if len(queue) >= queue[0][3] or remaining <= 0:
+                batch = self._take_batch(queue)
+                if not queue:
+                    del self._queues[key]
+                return key, batch
+            self._cond.wait(timeout=remaining)
+
+    def _take_batch(self, queue):
+        """
+        Pop the oldest request and the waiting requests closest to it in length, within
+        the batch size and padded length limits. Called with the condition held.
+        """
+        first = queue[0]
+        batch = [first]
+        limit = first[3]
+        longest = max(first[4], self.min_padded_length)
+        for item in sorted(list(queue)[1:], key=lambda item: abs(item[4] - first[4])):
+            if len(batch) >= limit:
+                break
+            item_longest = max(longest, item[4])
+            if item[3] <= len(batch) or (self.max_padded_length and (len(batch) + 1) * item_longest > self.max_padded_length):
+                continue
+            batch.append(item)
+            limit = min(limit, item[3])
+            longest = item_longest
+        taken = {id(item) for item in batch}
+        rest = [item for item in queue if id(item) not in taken]
+        queue.clear()
+        queue.extend(rest)
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                key, batch = self._next_batch()
+                now = time.monotonic()
+                for _, _, enqueued_at, _, _ in batch:
+                    wait = now - enqueued_at
+                    self.total_wait += wait
+                    self.max_wait_seen = max(self.max_wait_seen, wait)
+                self.batches += 1
+                self.batched_requests += len(batch)
+            try:
+                results = list(self.run_batch(key, [item[0] for item in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"expected {len(batch)} results, got {len(results)}")
+            except Exception as e:
+                logger.error(f"[BATCHER] {self.name} batch of {len(batch)} failed: {e}")
+                for item in batch:
+                    item[1].set_exception(e)
+                continue
+            for item, result in zip(batch, results):
+                item[1].set_result(result)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queue_depth': sum(len(queue) for queue in self._queues.values()),
+                'requests': self.requests,
+                'batches': self.batches,
+                'batch_fill_ratio': round(self.batched_requests / (self.batches * self.max_batch_size), 3) if self.batches else 0.0,
+                'mean_wait_ms': round(1000 * self.total_wait / self.batched_requests, 2) if self.batched_requests else 0.0,
+                'max_wait_ms': round(1000 * self.max_wait_seen, 2),
+            }
+
+
+class InferenceService:
+    """
+    In-process inference service shared by all connections. Whisper windows and
+    translation requests from concurrent meetings are batched together instead of
+    running as uncoordinated generate calls.
+    """
+
+    def __init__(self, asr_backend, translation_backend):
+        self.asr_backend = asr_backend
+        self.translation_backend = translation_backend
+        max_wait_ms = float(getattr(settings, 'INFERENCE_MAX_WAIT_MS', 20))
+        # ASR lengths are in seconds; Whisper pads every window to 30 s
+        self.asr_batcher = MicroBatcher(
+            'asr',
+            self._run_asr_batch,
+            max_batch_size=int(getattr(settings, 'ASR_MAX_BATCH_SIZE', 8)),
+            max_wait_ms=max_wait_ms,
+            max_padded_length=float(getattr(settings, 'ASR_MAX_PADDED_SECONDS', 240.0)),
+            min_padded_length=30.0
+        )
+        self.translation_batcher = MicroBatcher(
+            'translation',
+            self._run_translation_batch,
+            max_batch_size=int(getattr(settings, 'TRANSLATION_MAX_BATCH_SIZE', 16)),
+            max_wait_ms=max_wait_ms
+        )
+
+    def transcribe(self, audio, sample_rate=16000, language=None, return_timestamps=False, num_beams=1):
+        """
+        Queue one audio window (at most 30 s); the Future resolves to a transcription dict.
+        Without a language the window runs alone: Whisper cannot decode a batch whose
+        detected languages differ.
+        """
+        return self.asr_batcher.submit(
+            (sample_rate, language, return_timestamps, num_beams),
+            audio,
+            max_batch_size=1 if language is None else None,
+            length=len(audio) / sample_rate
+        )
+
+    def translate(self, text, translation_key, num_beams=None, batch_size=None):
+        """Queue one text; the Future resolves to its translation. `batch_size` caps its batch (profile setting)."""
+        return self.translation_batcher.submit((translation_key, num_beams), text, max_batch_size=batch_size)
+
+    def _run_asr_batch(self, key, audios):
+        sample_rate, language, return_timestamps, num_beams = key
+        return self.asr_backend.transcribe_batch(
+            audios,
+            sample_rate,
+            language=language,
+            return_timestamps=return_timestamps,
+            num_beams=num_beams
+        )
+
+    def _run_translation_batch(self, key, texts):
+        translation_key, num_beams = key
+        return self.translation_backend.translate_batch(texts, translation_key, num_beams)
+
+    def stats(self):
+        return {
+            'asr': self.asr_batcher.stats(),
+            'translation': self.translation_batcher.stats(),
+        }
@@ -0,0 +1,623 @@
+import asyncio
+import logging
+import re
+from typing import Dict, List, Protocol
+import google.generativeai as genai
+from google.generativeai.types import FunctionDeclaration, Tool
+from django.conf import settings
+from .gemini_governor import CircuitBreaker, GovernedInsightsClient, InsightsGovernor
+from .insights_cache import CachedInsightsClient, InsightsResponseCache
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+
+# --- Tool Definitions for Gemini ---
+
+# 1. Key Point Extraction
+extract_key_point_func = FunctionDeclaration(
+    name="extract_key_point",
+    description="Extracts a key point or important topic from the meeting discussion.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "point": {
+                "type": "STRING",
+                "description": "A concise summary of the key point or topic."
+            },
+        },
+        "required": ["point"]
+    },
+)
+
+# 2. Decision Extraction
+extract_decision_func = FunctionDeclaration(
+    name="extract_decision",
+    description="Extracts a final decision made by the meeting participants.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "decision": {
+                "type": "STRING",
+                "description": "A clear statement of the decision that was made."
+            },
+        },
+        "required": ["decision"]
+    },
+)
+
+# 3. Action Item Extraction
+extract_action_item_func = FunctionDeclaration(
+    name="extract_action_item",
+    description="Extracts a specific task or action item, its assignee, and due date.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "task": {
+                "type": "STRING",
+                "description": "The specific task or action to be completed."
+            },
+            "assignee": {
+                "type": "STRING",
+                "description": "Optional. The person or team responsible for the task."
+            },
+            "due_date": {
+                "type": "STRING",
+                "description": "Optional. The deadline for the action item (e.g., 'Next Friday', 'July 15, 2025')."
+            },
+        },
+        "required": ["task"]
+    },
+)
+
+# 4. Rolling summary (incremental extraction only)
+update_summary_func = FunctionDeclaration(
+    name="update_summary",
+    description="Replaces the running summary of the whole meeting so far.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "summary": {
+                "type": "STRING",
+                "description": "A concise summary of everything discussed in the meeting so far."
+            },
+        },
+        "required": ["summary"]
+    },
+)
+
+# Tool sets: insights with the rolling summary, and the summary alone
+incremental_meeting_tools = Tool(
+    function_declarations=[
+        extract_key_point_func,
+        extract_decision_func,
+        extract_action_item_func,
+        update_summary_func,
+    ],
+)
+
+summary_tools = Tool(
+    function_declarations=[
+        update_summary_func,
+    ],
+)
+
+INCREMENTAL_INSIGHTS_PROMPT = """
+        Analyze the new part of an ongoing meeting transcript and extract insights using the available tools.
+        Look for key points, decisions, and action items that are not already listed below.
+        Then call update_summary once with a concise summary of the whole meeting so far, in at most {summary_words} words.
+
+        Summary of the meeting so far:
+        {summary}
+
+        Insights already extracted (do not repeat them):
+        {known}
+
+        New transcript:
+        {transcript}
+        """
+
+# Map step of a long transcript delta: one part, summarized on its own
+CHUNK_INSIGHTS_PROMPT = """
+        Analyze one part of an ongoing meeting transcript and extract insights using the available tools.
+        Look for key points, decisions, and action items that are not already listed below.
+        Then call update_summary once with a concise summary of this part only, in at most {summary_words} words.
+
+        Summary of the meeting before this part:
+        {summary}
+
+        Insights already extracted (do not repeat them):
+        {known}
+
+        Transcript part:
+        {transcript}
+        """
+
+# Reduce step: fold the part summaries into the rolling summary
+REDUCE_SUMMARY_PROMPT = """
+        Merge the summary of a meeting so far with the summaries of its newest parts into one
+        concise summary of the whole meeting, in at most {summary_words} words.
+        Return it by calling update_summary.
+
+        Summary of the meeting so far:
+        {summary}
+
+        Newest parts, in order:
+        {parts}
+        """
+
+# Main text field of each insight type, used for display in prompts and deduplication
+INSIGHT_TEXT_FIELDS = {
+    'key_point': 'point',
+    'decision': 'decision',
+    'action_item': 'task',
+}
+
+# Local fallback extractor (English, Spanish, French, Chinese cues)
+DECISION_CUE = re.compile(
+    r"\b(?:we(?:'ve| have)? (?:decided|agreed)|the decision is|let's go with|approved|"
+    r"decidimos|acordamos|nous avons décidé|on a décidé|convenu)\b|决定|同意",
+    re.IGNORECASE
+)
+ACTION_CUE = re.compile(
+    r"\b(?:will|needs? to|has to|have to|must|should|is going to|are going to|action item|to-?do|follow up|"
+    r"vamos a|tengo que|hay que|je vais|il faut|doit)\b|负责|需要|将会",
+    re.IGNORECASE
+)
+ASSIGNEE = re.compile(r"^(?P<who>[A-Z][a-z]+)\s+(?:will|needs? to|has to|must|should|is going to)\b")
+DUE_DATE = re.compile(
+    r"\b(?:by|before|until|due)\s+(?P<due>(?:next\s+)?(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|week|month)|"
+    r"tomorrow|today|tonight|end of (?:the )?(?:day|week|month)|[A-Z][a-z]+ \d{1,2}(?:st|nd|rd|th)?)",
+    re.IGNORECASE
+)
+# Latin terminators end a sentence only before whitespace ('3.5%' stays whole)
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])\s*')
+NOT_A_NAME = {'We', 'You', 'They', 'It', 'This', 'That', 'There', 'Everyone', 'Someone'}
+
+CJK_CHARACTER = re.compile(r'[\u2e80-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+
+def estimate_tokens(text):
+    """Rough token count: one per CJK character, one per four other characters."""
+    cjk = len(CJK_CHARACTER.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to about `max_tokens` tokens, at a word boundary when there is one."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text
+    while cut and estimate_tokens(cut) > max_tokens:
+        cut = cut[:max(1, len(cut) * max_tokens // estimate_tokens(cut))]
+        if len(cut) == 1:
+            break
+    head = cut.rsplit(' ', 1)[0]
+    return head if head.strip() else cut
+
+
+def chunk_lines(text, max_tokens):
+    """
+    Split text into chunks of at most ~`max_tokens` tokens at line (speaker turn)
+    boundaries. A single line over the budget is cut on its own.
+    """
+    chunks, current, current_tokens = [], [], 0
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        tokens = estimate_tokens(line)
+        while tokens > max_tokens:
+            head = truncate_to_tokens(line, max_tokens)
+            if current:
+                chunks.append('\n'.join(current))
+                current, current_tokens = [], 0
+            chunks.append(head)
+            line = line[len(head):].strip()
+            tokens = estimate_tokens(line)
+        if not line:
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append('\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+def insight_text(insight):
+    data = insight.get('data', {})
+    return str(data.get(INSIGHT_TEXT_FIELDS.get(data.get('insight_type'), ''), ''))
+
+
+def insight_key(insight):
+    """Normalized (type, text) used to recognise an insight that was already extracted."""
+    text = re.sub(r'[^\w\s]', '', insight_text(insight).lower())
+    return insight.get('data', {}).get('insight_type'), ' '.join(text.split())
+
+
+def merge_insights(insight_lists, seen=None):
+    """
+    Reduce step: concatenate per-chunk insights in order, dropping repeats (by
+    insight_key) of each other and of `seen`. A repeated action item fills in the
+    assignee/due date the first occurrence lacks. Adds the new keys to `seen`.
+    """
+    seen = set() if seen is None else seen
+    merged, by_key = [], {}
+    for insights in insight_lists:
+        for insight in insights:
+            key = insight_key(insight)
+            if key in by_key:
+                first = by_key[key]['data']
+                for field, value in insight['data'].items():
+                    if value and not first.get(field):
+                        first[field] = value
+                continue
+            if key in seen:
+                continue
+            by_key[key] = insight
+            merged.append(insight)
+    seen.update(by_key)
+    return merged
+
+
+async def gather_bounded(coroutines, max_parallel):
+    """Await coroutines with at most `max_parallel` running at once; results in order."""
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+
+def calls_to_insights(calls):
+    """Turn extract_* function calls into insight objects; other calls are ignored."""
+    insights = []
+    for call in calls:
+        if not call['name'].startswith('extract_'):
+            continue
+        insights.append({
+            "type": "insight",
+            "data": {
+                "insight_type": call['name'].replace("extract_", ""),
+                **call['args']
+            }
+        })
+    return insights
+
+
+def summary_from_calls(calls):
+    """Text of the last update_summary call, or None."""
+    summaries = [str(call['args'].get('summary', '')) for call in calls if call['name'] == 'update_summary']
+    return summaries[-1] if summaries and summaries[-1] else None
+
+
+def extract_insights_locally(transcript_text):
+    """
+    Fast rule-based extractor for decisions and action items, used while Gemini is
+    unavailable. Insights carry "source": "local".
+    """
+    insights = []
+    for line in transcript_text.split('\n'):
+        for sentence in SENTENCE_END.split(line.strip()):
+            sentence = sentence.strip()
+            if len(sentence) < 4 or sentence.endswith(('?', '？')):
+                continue
+            if DECISION_CUE.search(sentence):
+                insights.append({"type": "insight", "source": "local", "data": {"insight_type": "decision", "decision": sentence}})
+            elif ACTION_CUE.search(sentence):
+                data = {"insight_type": "action_item", "task": sentence}
+                assignee = ASSIGNEE.match(sentence)
+                if assignee and assignee.group('who') not in NOT_A_NAME:
+                    data['assignee'] = assignee.group('who')
+                due = DUE_DATE.search(sentence)
+                if due:
+                    data['due_date'] = due.group('due')
+                insights.append({"type": "insight", "source": "local", "data": data})
+    return merge_insights([insights])
+
+
+class InsightsClient(Protocol):
+    """LLM used for insights extraction. Implementations can be swapped for a local fake."""
+    model_name: str
+
+    async def generate(self, prompt, tools, max_output_tokens=1024, temperature=0.1, meeting_key=None) -> List[Dict]:
+        """
+        Run one prompt with function-calling tools; returns the calls as {'name', 'args'} dicts.
+        `meeting_key` identifies the requesting meeting for fair scheduling.
+        """
+        ...
+
+
+class GeminiInsightsClient:
+    """InsightsClient backed by the Gemini API."""
+
+    def __init__(self, model_name=GEMINI_MODEL_NAME):
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt, tools, max_output_tokens=1024, temperature=0.1, meeting_key=None):
+        if not getattr(settings, 'GEMINI_API_KEY', None):
+            raise RuntimeError("GEMINI_API_KEY not configured in Django settings")
+        logger.info(f"[GEMINI] Making API call with prompt: {prompt[:100]}...")
+        response = await asyncio.to_thread(
+            self.model.generate_content,
+            prompt,
+            tools=[tools],
+            generation_config=genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            )
+        )
+        calls = []
+        if response.candidates and response.candidates[0].content:
+            content = response.candidates[0].content
+            # Check for function calls in the response
+            if hasattr(content, 'parts') and content.parts:
+                for part in content.parts:
+                    if hasattr(part, 'function_call') and part.function_call:
+                        function_call = part.function_call
+                        logger.info(f"[GEMINI] Found function call: {function_call.name} with args: {function_call.args}")
+                        calls.append({'name': function_call.name, 'args': dict(function_call.args)})
+            else:
+                logger.warning("[GEMINI] No function calls found in response")
+        else:
+            logger.warning("[GEMINI] No candidates or content in response")
+        return calls
+
+
+class StubInsightsClient:
+    """
+    Local stand-in for Gemini in tests and benchmarks. Every transcript line becomes a
+    key point (lines mentioning 'decide'/'agreed' a decision, 'will'/'todo' an action
+    item) and the first line is returned as summary, after `latency` seconds.
+    """
+    model_name = 'stub'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def generate(self, prompt, tools, max_output_tokens=1024, temperature=0.1, meeting_key=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        transcript = re.split(r'(?:Transcript|New transcript|Transcript part|Newest parts, in order):\n', prompt)[-1]
+        lines = [line.strip() for line in transcript.split('\n') if line.strip()]
+        calls = []
+        for line in lines:
+            lowered = line.lower()
+            if 'decide' in lowered or 'agreed' in lowered:
+                calls.append({'name': 'extract_decision', 'args': {'decision': line}})
+            elif 'will' in lowered or 'todo' in lowered:
+                calls.append({'name': 'extract_action_item', 'args': {'task': line}})
+            else:
+                calls.append({'name': 'extract_key_point', 'args': {'point': line}})
+        if lines:
+            calls.append({'name': 'update_summary', 'args': {'summary': lines[0]}})
+        return calls
+
+
+class MeetingInsightsState:
+    """What the engine remembers about one meeting."""
+
+    def __init__(self):
+        self.summary = ''
+        self.insights = []
+        self.seen = set()
+        self.lock = asyncio.Lock()
+
+
+class InsightsEngine:
+    """
+    Incremental insights extraction per meeting.
+
+    Each call sends only the new transcript plus a bounded state: the rolling summary
+    (at most `summary_tokens`) and the most recent already-extracted insights (at most
+    `known_tokens`), so the prompt size stays constant however long the meeting gets.
+    New transcript longer than `delta_tokens` is split at speaker turns and map-reduced:
+    the parts are extracted concurrently (at most `max_parallel` calls at once), their
+    insights merged and their summaries folded into the rolling summary by one more
+    call. Returned insights that repeat a known one are dropped.
+    """
+
+    def __init__(self, client, summary_tokens=300, known_tokens=400, delta_tokens=3000, max_output_tokens=1024, max_parallel=4):
+        self.client = client
+        self.summary_tokens = summary_tokens
+        self.known_tokens = known_tokens
+        self.delta_tokens = delta_tokens
+        self.max_output_tokens = max_output_tokens
+        self.max_parallel = max_parallel
+        self._meetings = {}
+
+    def state(self, meeting_key):
+        if meeting_key not in self._meetings:
+            self._meetings[meeting_key] = MeetingInsightsState()
+        return self._meetings[meeting_key]
+
+    def discard(self, meeting_key):
+        self._meetings.pop(meeting_key, None)
+
+    def record(self, meeting_key, insights):
+        """Add insights found elsewhere (local extractor) to the meeting state; returns the new ones."""
+        state = self.state(meeting_key)
+        new_insights = merge_insights([insights], state.seen)
+        state.insights.extend(new_insights)
+        return new_insights
+
+    async def extract(self, meeting_key, transcript_text):
+        """Extract the insights of new transcript text of a meeting. Returns only new insights."""
+        state = self.state(meeting_key)
+        chunks = chunk_lines(transcript_text, self.delta_tokens)
+        if not chunks:
+            return []
+        async with state.lock:
+            # Keys are committed with the insights, so a failed or cancelled call
+            # leaves the state untouched
+            seen = set(state.seen)
+            if len(chunks) == 1:
+                calls = await self.client.generate(
+                    self._prompt(INCREMENTAL_INSIGHTS_PROMPT, state, chunks[0], self.summary_tokens),
+                    incremental_meeting_tools,
+                    max_output_tokens=self.max_output_tokens,
+                    meeting_key=meeting_key
+                )
+                new_insights = merge_insights([calls_to_insights(calls)], seen)
+                summary = summary_from_calls(calls)
+            else:
+                # Map: parts concurrently, each against the same prior state
+                part_tokens = max(20, self.summary_tokens // len(chunks))
+                results = await gather_bounded([
+                    self.client.generate(
+                        self._prompt(CHUNK_INSIGHTS_PROMPT, state, chunk, part_tokens),
+                        incremental_meeting_tools,
+                        max_output_tokens=self.max_output_tokens,
+                        meeting_key=meeting_key
+                    )
+                    for chunk in chunks
+                ], self.max_parallel)
+                # Reduce: merge insights locally, fold part summaries into the rolling summary
+                new_insights = merge_insights([calls_to_insights(calls) for calls in results], seen)
+                summary = await self._reduce_summary(meeting_key, state.summary, [summary_from_calls(calls) for calls in results])
+                logger.info(f"[INSIGHTS] Map-reduced {len(chunks)} transcript parts")
+            state.seen = seen
+            state.insights.extend(new_insights)
+            if summary:
+                state.summary = truncate_to_tokens(summary, self.summary_tokens)
+        logger.info(f"[INSIGHTS] Meeting {meeting_key}: {len(new_insights)} new insights, {len(state.insights)} total")
+        return new_insights
+
+    async def _reduce_summary(self, meeting_key, summary, part_summaries):
+        parts = [part for part in part_summaries if part]
+        if not parts:
+            return summary
+        calls = await self.client.generate(
+            REDUCE_SUMMARY_PROMPT.format(
+                summary_words=self.summary_tokens * 3 // 4,
+                summary=summary or '(start of the meeting)',
+                parts='\n'.join(f"- {part}" for part in parts)
+            ),
+            summary_tools,
+            max_output_tokens=self.max_output_tokens,
+            meeting_key=meeting_key
+        )
+        return summary_from_calls(calls) or ' '.join([summary] + parts)
+
+    def _prompt(self, template, state, delta, summary_tokens):
+        known, budget = [], self.known_tokens
+        for insight in reversed(state.insights):
+            line = f"- {insight['data'].get('insight_type')}: {insight_text(insight)}"
+            budget -= estimate_tokens(line)
+            if budget < 0:
+                break
+            known.append(line)
+        return template.format(
+            summary_words=summary_tokens * 3 // 4,
+            summary=state.summary or '(start of the meeting)',
+            known='\n'.join(reversed(known)) or '(none yet)',
+            transcript=delta
+        )
+
+
+_insights_client = None
+_insights_cache = None
+_insights_governor = None
+_insights_engine = None
+_circuit_breaker = None
+
+
+def get_insights_client():
+    """
+    Shared insights client: one Gemini model client behind the request governor and
+    the response cache (INSIGHTS_CACHE_ENABLED), so cache hits skip the governor.
+    """
+    global _insights_client, _insights_cache, _insights_governor
+    if _insights_client is None:
+        _insights_governor = InsightsGovernor(
+            rate_per_minute=float(getattr(settings, 'GEMINI_RATE_PER_MINUTE', 60)),
+            burst=float(getattr(settings, 'GEMINI_BURST', 5)),
+            max_concurrency=int(getattr(settings, 'GEMINI_MAX_CONCURRENCY', 4)),
+            max_retries=int(getattr(settings, 'GEMINI_MAX_RETRIES', 4)),
+            base_delay=float(getattr(settings, 'GEMINI_BACKOFF_BASE_SECONDS', 1.0)),
+            max_delay=float(getattr(settings, 'GEMINI_BACKOFF_MAX_SECONDS', 30.0))
+        )
+        client = GovernedInsightsClient(
+            GeminiInsightsClient(getattr(settings, 'GEMINI_MODEL_NAME', GEMINI_MODEL_NAME)),
+            _insights_governor
+        )
+        if getattr(settings, 'INSIGHTS_CACHE_ENABLED', True):
+            _insights_cache = InsightsResponseCache(
+                max_entries=int(getattr(settings, 'INSIGHTS_CACHE_MAX_ENTRIES', 1000)),
+                ttl_seconds=float(getattr(settings, 'INSIGHTS_CACHE_TTL_SECONDS', 7 * 24 * 3600)),
+                path=getattr(settings, 'INSIGHTS_CACHE_PATH', None)
+            )
+            client = CachedInsightsClient(client, _insights_cache)
+        _insights_client = client
+    return _insights_client
+
+
+def insights_stats():
+    """Runtime metrics of the shared insights services."""
+    stats = {}
+    if _insights_cache is not None:
+        stats['response_cache'] = _insights_cache.stats()
+    if _insights_governor is not None:
+        stats['governor'] = _insights_governor.stats()
+    if _circuit_breaker is not None:
+        stats['circuit_breaker'] = _circuit_breaker.stats()
+    return stats
+
+
+def get_insights_engine():
+    """Shared incremental insights engine."""
+    global _insights_engine
+    if _insights_engine is None:
+        _insights_engine = InsightsEngine(
+            get_insights_client(),
+            summary_tokens=int(getattr(settings, 'INSIGHTS_SUMMARY_TOKENS', 300)),
+            known_tokens=int(getattr(settings, 'INSIGHTS_KNOWN_TOKENS', 400)),
+            delta_tokens=int(getattr(settings, 'INSIGHTS_DELTA_TOKENS', 3000)),
+            max_output_tokens=int(getattr(settings, 'INSIGHTS_MAX_OUTPUT_TOKENS', 1024)),
+            max_parallel=int(getattr(settings, 'INSIGHTS_MAX_PARALLEL', 4))
+        )
+    return _insights_engine
+
+
+def get_circuit_breaker():
+    """Shared circuit breaker for insights requests."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker(
+            failure_threshold=int(getattr(settings, 'INSIGHTS_BREAKER_FAILURES', 3)),
+            reset_seconds=float(getattr(settings, 'INSIGHTS_BREAKER_RESET_SECONDS', 60.0))
+        )
+    return _circuit_breaker
+
+
+async def extract_meeting_insights(meeting_key, transcript_text):
+    """
+    Insights of new transcript text of a meeting through the incremental engine, each
+    call bounded by INSIGHTS_TIMEOUT_SECONDS. Failures and timeouts count against the
+    circuit breaker; while it is open, and whenever a call fails, the local extractor
+    answers instead.
+    """
+    engine = get_insights_engine()
+    breaker = get_circuit_breaker()
+    if breaker.allow():
+        try:
+            insights = await asyncio.wait_for(
+                engine.extract(meeting_key, transcript_text),
+                timeout=float(getattr(settings, 'INSIGHTS_TIMEOUT_SECONDS', 120.0))
+            )
+            breaker.record_success()
+            return insights
+        except Exception as e:
+            breaker.record_failure()
+            logger.error(f"[INSIGHTS] Gemini extraction failed ({type(e).__name__}: {e}), using local extractor")
+    else:
+        logger.info("[INSIGHTS] Circuit open, using local extractor")
+    return engine.record(meeting_key, extract_insights_locally(transcript_text))
+
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Bump when a prompt template changes meaning, so old responses are not reused
+PROMPT_TEMPLATE_VERSION = 1
+
+
+def tool_schema(tools):
+    """Stable text form of a function-calling tool set, for cache keys."""
+    declarations = getattr(tools, 'function_declarations', None)
+    if declarations is None:
+        return json.dumps(tools, sort_keys=True, default=str)
+    return '|'.join(
+        f"{getattr(d, 'name', '')}:{getattr(d, 'description', '')}:{getattr(d, 'parameters', '')}"
+        for d in declarations
+    )
+
+
+def response_key(model_name, prompt, tools, max_output_tokens, temperature):
+    """Content address of one insights request."""
+    material = json.dumps([
+        model_name,
+        PROMPT_TEMPLATE_VERSION,
+        tool_schema(tools),
+        prompt,
+        max_output_tokens,
+        temperature,
+    ], ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class InsightsResponseCache:
+    """
+    Content-addressed cache of insights responses (the function calls returned for
+    one request), with a TTL and a bounded in-memory LRU tier. With `path` set,
+    responses are also kept in a SQLite file that memory misses fall back to.
+    Safe to use from concurrent threads.
+    """
+
+    def __init__(self, max_entries=1000, ttl_seconds=7 * 24 * 3600, path=None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, calls)
+        self._lock = threading.Lock()
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL, calls TEXT)')
+                self._db.execute('DELETE FROM responses WHERE expires_at < ?', (time.time(),))
+                self._db.commit()
+                logger.info(f"[INSIGHTS CACHE] Persisting to {path}")
+            except Exception as e:
+                logger.error(f"[INSIGHTS CACHE] Failed to open {path}, memory only: {e}")
+                self._db = None
+
+    def get(self, key):
+        """Return the cached calls or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            if self._db is not None:
+                entry = self._load(key, now)
+                if entry is not None:
+                    self._insert(key, entry)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, calls):
+        entry = (time.time() + self.ttl, calls)
+        with self._lock:
+            self._insert(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?)', (key, entry[0], json.dumps(calls, default=str)))
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"[INSIGHTS CACHE] Failed to persist response: {e}")
+
+    def _insert(self, key, entry):
+        """Store in memory and evict down to the budget. Called with the lock held."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key, now):
+        try:
+            row = self._db.execute('SELECT expires_at, calls FROM responses WHERE key = ? AND expires_at >= ?', (key, now)).fetchone()
+            return (row[0], json.loads(row[1])) if row else None
+        except Exception as e:
+            logger.error(f"[INSIGHTS CACHE] Failed to read response: {e}")
+            return None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_hits': self.disk_hits,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class CachedInsightsClient:
+    """InsightsClient wrapper answering repeated requests from an InsightsResponseCache. Empty responses are not cached."""
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+        self.model_name = client.model_name
+
+    async def generate(self, prompt, tools, max_output_tokens=1024, temperature=0.1, meeting_key=None):
+        key = response_key(self.model_name, prompt, tools, max_output_tokens, temperature)
+        calls = self.cache.get(key)
+        if calls is not None:
+            logger.info(f"[INSIGHTS CACHE] Hit {key[:12]}")
+            return calls
+        calls = await self.client.generate(prompt, tools, max_output_tokens=max_output_tokens, temperature=temperature, meeting_key=meeting_key)
+        if calls:
+            # Empty responses are often transient (MAX_TOKENS, safety block), ask again next time
+            self.cache.put(key, calls)
+        return calls
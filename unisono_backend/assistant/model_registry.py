@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Lazily loaded models under a memory budget.
+
+    `load(key)` builds a model entry on first use and `size(entry)` returns its resident
+    size in bytes. Concurrent first requests for the same key wait on a per-key lock so
+    a model is loaded once. When the loaded models exceed `max_bytes` (0 = unlimited),
+    the least recently used ones are unloaded, except pinned keys. A key whose load
+    failed is unavailable until its retry time, which backs off exponentially from
+    `retry_seconds` up to `max_retry_seconds` with each further failure.
+    """
+
+    def __init__(self, name, keys, load, size, max_bytes=0, pinned=(), retry_seconds=30.0, max_retry_seconds=3600.0):
+        self.name = name
+        self.keys = set(keys)
+        self._load = load
+        self._size = size
+        self.max_bytes = max_bytes
+        self.pinned = set(pinned) & self.keys
+        self._entries = OrderedDict()  # key -> (entry, bytes), most recently used last
+        self._bytes = 0
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._failed = {}  # key -> (consecutive failures, monotonic time of the next attempt)
+        self._lock = threading.Lock()
+        self._key_locks = {key: threading.Lock() for key in self.keys}
+        # Metrics
+        self.loads = 0
+        self.unloads = 0
+
+    def supports(self, key):
+        if key not in self.keys:
+            return False
+        failed = self._failed.get(key)
+        return failed is None or time.monotonic() >= failed[1]
+
+    def get(self, key):
+        """Return the entry for `key`, loading it if needed. Raises KeyError for unknown or failed keys."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+        if not self.supports(key):
+            raise KeyError(f"{self.name} model {key} is not available")
+        with self._key_locks[key]:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key][0]
+            if not self.supports(key):
+                # Failed while this thread waited for the key lock
+                raise KeyError(f"{self.name} model {key} is not available")
+            try:
+                entry = self._load(key)
+                size = self._size(entry)
+            except Exception as e:
+                failures = self._failed.get(key, (0, 0.0))[0] + 1
+                delay = min(self.max_retry_seconds, self.retry_seconds * 2 ** (failures - 1))
+                self._failed[key] = (failures, time.monotonic() + delay)
+                logger.error(f"[MODELS] Failed to load {self.name} model {key} (attempt {failures}), retrying in {delay:.0f}s: {e}")
+                raise KeyError(f"{self.name} model {key} is not available") from e
+            with self._lock:
+                self._failed.pop(key, None)
+                self._entries[key] = (entry, size)
+                self._bytes += size
+                self.loads += 1
+                logger.info(f"[MODELS] Loaded {self.name} model {key} ({size / 2 ** 20:.0f} MB, {self._bytes / 2 ** 20:.0f} MB resident)")
+                self._evict(keep=key)
+            return entry
+
+    def preload(self, keys):
+        for key in keys:
+            try:
+                self.get(key)
+            except KeyError:
+                pass
+
+    def _evict(self, keep):
+        """Unload LRU unpinned models until under budget. Called with the lock held."""
+        if not self.max_bytes:
+            return
+        for key in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            if key == keep or key in self.pinned:
+                continue
+            _, size = self._entries.pop(key)
+            self._bytes -= size
+            self.unloads += 1
+            logger.info(f"[MODELS] Unloaded {self.name} model {key} ({size / 2 ** 20:.0f} MB)")
+        if self._bytes > self.max_bytes:
+            logger.warning(f"[MODELS] {self.name} models use {self._bytes / 2 ** 20:.0f} MB, over the budget of {self.max_bytes / 2 ** 20:.0f} MB")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': ['-'.join(key) for key in self._entries],
+                'pinned': ['-'.join(key) for key in self.pinned],
+                'failed': ['-'.join(key) for key in self._failed],
+                'resident_mb': round(self._bytes / 2 ** 20, 1),
+                'budget_mb': round(self.max_bytes / 2 ** 20, 1),
+                'loads': self.loads,
+                'unloads': self.unloads,
+            }
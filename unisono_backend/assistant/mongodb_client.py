@@ -7,6 +7,37 @@ from urllib.parse import quote_plus
 
 logger = logging.getLogger(__name__)
 
+
+def available_languages(transcripts: List[Dict], stored_language: Optional[str] = None) -> List[str]:
+    """Languages every segment of a recording has a translation for."""
+    if not transcripts:
+        return []
+    languages = None
+    for t in transcripts:
+        segment_languages = set(t.get('translations', {}))
+        if stored_language and 'translated_transcript' in t:
+            # Recordings saved before per-language storage only hold their target language
+            segment_languages.add(stored_language)
+        languages = segment_languages if languages is None else languages & segment_languages
+    return sorted(languages)
+
+
+def transcripts_in_language(transcripts: List[Dict], language: str, stored_language: Optional[str] = None) -> Optional[List[Dict]]:
+    """
+    Copies of the transcripts showing `language` as 'translated_transcript', or None
+    when some segment has no stored translation for it.
+    """
+    if language not in available_languages(transcripts, stored_language):
+        return None
+    selected = []
+    for t in transcripts:
+        translation = t.get('translations', {}).get(language)
+        if translation is None:
+            translation = t['translated_transcript']
+        selected.append(dict(t, translated_transcript=translation))
+    return selected
+
+
 class MongoDBClient:
     def __init__(self):
         # MongoDB Atlas connection string with properly encoded credentials
@@ -344,5 +375,59 @@ class MongoDBClient:
             logger.error(f"❌ Failed to update recording {recording_id}: {e}")
             return False
 
+    def update_recording_translation(self, recording_id: str, transcripts: List[Dict], target_language: str, display: bool = True) -> bool:
+        """
+        Store one language of a recording's translations and, with `display`, make it the
+        displayed one. Only that language's fields are written (per-segment targeted $set),
+        translations in other languages stay untouched.
+        """
+        try:
+            if self.recordings_collection is None:
+                if not self.connect():
+                    return False
+
+            updates = {'target_language': target_language} if display else {}
+            for i, t in enumerate(transcripts):
+                translation = t.get('translations', {}).get(target_language, t.get('translated_transcript', ''))
+                updates[f'transcripts.{i}.translations.{target_language}'] = translation
+                if display:
+                    updates[f'transcripts.{i}.translated_transcript'] = translation
+                if t.get('pivot_transcript') is not None:
+                    updates[f'transcripts.{i}.pivot_transcript'] = t['pivot_transcript']
+
+            from bson import ObjectId
+            result = self.recordings_collection.update_one({'_id': ObjectId(recording_id)}, {'$set': updates})
+            if result.matched_count > 0:
+                logger.info(f"✅ Stored {target_language} translation of recording {recording_id}")
+                return True
+            else:
+                logger.warning(f"❌ No recording found with ID {recording_id} to update")
+                return False
+        except Exception as e:
+            logger.error(f"❌ Failed to update recording {recording_id}: {e}")
+            return False
+
+    def update_recording_insights(self, recording_id: str, insights: List[Dict]) -> bool:
+        """Append insights that arrived after the recording was saved"""
+        try:
+            if self.recordings_collection is None:
+                if not self.connect():
+                    return False
+
+            from bson import ObjectId
+            result = self.recordings_collection.update_one(
+                {'_id': ObjectId(recording_id)},
+                {'$push': {'insights': {'$each': insights}}}
+            )
+            if result.matched_count > 0:
+                logger.info(f"✅ Added {len(insights)} insights to recording {recording_id}")
+                return True
+            else:
+                logger.warning(f"❌ No recording found with ID {recording_id} to update")
+                return False
+        except Exception as e:
+            logger.error(f"❌ Failed to update insights of recording {recording_id}: {e}")
+            return False
+
 # Global MongoDB client instance
 mongodb_client = MongoDBClient() 
\ No newline at end of file
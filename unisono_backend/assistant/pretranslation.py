@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PretranslationScheduler:
+    """
+    Speculative translation of finished recordings while the pipeline is idle.
+
+    Jobs translate a recording's transcripts into a few likely languages on one
+    background thread. Work advances `chunk_size` segments at a time and only while
+    `is_idle()` holds, so new foreground jobs take over the models within one chunk.
+    `on_done(transcripts, language)` is called with the translated transcripts of
+    each finished language.
+    """
+
+    def __init__(self, translate, is_idle, chunk_size=16, poll_seconds=0.2):
+        self.translate = translate
+        self.is_idle = is_idle
+        self.chunk_size = max(1, chunk_size)
+        self.poll_seconds = poll_seconds
+        self._jobs = deque()
+        self._running = None  # Owner of the job being translated
+        self._cancelled = set()  # Owners whose running job must stop
+        self._cond = threading.Condition()
+        self._worker = None
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.yields = 0
+
+    def submit(self, owner, transcripts, languages, on_done):
+        """Queue pre-translation of `transcripts` into `languages` on behalf of `owner` (a connection or meeting)."""
+        if not transcripts or not languages:
+            return
+        with self._cond:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='pretranslation', daemon=True)
+                self._worker.start()
+            for language in languages:
+                self._jobs.append((owner, transcripts, language, on_done))
+                self.submitted += 1
+            self._cond.notify()
+
+    def cancel(self, owner):
+        """Drop queued and running work of `owner`."""
+        with self._cond:
+            self._jobs = deque(job for job in self._jobs if job[0] != owner)
+            if self._running == owner:
+                self._cancelled.add(owner)
+
+    def _is_cancelled(self, owner):
+        with self._cond:
+            return owner in self._cancelled
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+                owner, transcripts, language, on_done = self._jobs.popleft()
+                self._running = owner
+            try:
+                self._translate_job(owner, transcripts, language, on_done)
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cancelled.discard(owner)
+
+    def _translate_job(self, owner, transcripts, language, on_done):
+        translated = []
+        for start in range(0, len(transcripts), self.chunk_size):
+            if not self.is_idle():
+                # Foreground work has priority, wait until the pipeline is idle again
+                self.yields += 1
+                while not self.is_idle():
+                    time.sleep(self.poll_seconds)
+            if self._is_cancelled(owner):
+                break
+            try:
+                translated.extend(self.translate(transcripts[start:start + self.chunk_size], language))
+            except Exception as e:
+                logger.error(f"[PRETRANSLATE] Failed to translate to {language}: {e}")
+                break
+        if len(translated) != len(transcripts) or self._is_cancelled(owner):
+            return
+        self.completed += 1
+        logger.info(f"[PRETRANSLATE] Pre-translated {len(transcripts)} segments to {language}")
+        try:
+            on_done(translated, language)
+        except Exception as e:
+            logger.error(f"[PRETRANSLATE] Failed to store {language} translation: {e}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queued': len(self._jobs),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'yields': self.yields,
+            }
@@ -0,0 +1,112 @@
+import logging
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Named quality/speed profiles understood by AudioProcessor and the consumer.
+# asr_num_beams / translation_num_beams: 1 is greedy decoding, more is beam search.
+# translation_batch_size: sentences per translation batch (the shared inference
+# service also caps batches at TRANSLATION_MAX_BATCH_SIZE).
+# diarization: run pyannote, otherwise the whole recording is one speaker.
+# asr_mode: default ASR mode for the profile when the meeting does not pick one.
+# insights: run Gemini insights extraction.
+PROCESSING_PROFILES = {
+    'fast': {
+        'asr_num_beams': 1,
+        'translation_num_beams': 1,
+        'translation_batch_size': 32,
+        'diarization': False,
+        'asr_mode': 'longform',
+        'insights': False,
+    },
+    'balanced': {
+        'asr_num_beams': 1,
+        'translation_num_beams': 2,
+        'translation_batch_size': 16,
+        'diarization': True,
+        'asr_mode': None,
+        'insights': True,
+    },
+    'accurate': {
+        'asr_num_beams': 4,
+        'translation_num_beams': 4,
+        'translation_batch_size': 8,
+        'diarization': True,
+        'asr_mode': None,
+        'insights': True,
+    },
+}
+
+# Cheapest last, automatic mode walks down this list under load
+PROFILE_ORDER = ['accurate', 'balanced', 'fast']
+AUTO_PROFILE = 'auto'
+
+
+def get_profile(name):
+    """Return the settings of a named profile; other names resolve like LoadMonitor.choose_profile."""
+    if name not in PROCESSING_PROFILES:
+        name = load_monitor.choose_profile(name)
+    return PROCESSING_PROFILES[name]
+
+
+class LoadMonitor:
+    """
+    Tracks pipeline load across all connections: jobs in flight and a smoothed
+    real-time factor (processing seconds per audio second). In automatic mode new
+    jobs are downgraded one profile step for each threshold that is crossed.
+    """
+
+    def __init__(self):
+        self.rtf_threshold = float(getattr(settings, 'AUTO_PROFILE_RTF_THRESHOLD', 0.5))
+        self.queue_threshold = int(getattr(settings, 'AUTO_PROFILE_QUEUE_THRESHOLD', 2))
+        self.smoothing = float(getattr(settings, 'AUTO_PROFILE_RTF_SMOOTHING', 0.3))
+        self.active_jobs = 0
+        self.rtf = 0.0
+        self._lock = threading.Lock()
+
+    def job_started(self):
+        with self._lock:
+            self.active_jobs += 1
+
+    def job_finished(self, audio_seconds, processing_seconds):
+        with self._lock:
+            self.active_jobs = max(0, self.active_jobs - 1)
+            if audio_seconds > 0:
+                rtf = processing_seconds / audio_seconds
+                self.rtf = rtf if self.rtf == 0.0 else self.smoothing * rtf + (1 - self.smoothing) * self.rtf
+
+    def is_idle(self):
+        """No foreground job is running or queued."""
+        with self._lock:
+            return self.active_jobs == 0
+
+    def choose_profile(self, requested):
+        """
+        Resolve the profile name for a new job. Explicit profiles are kept as requested,
+        anything else uses DEFAULT_PROCESSING_PROFILE, which may itself be 'auto'.
+        """
+        if requested not in PROCESSING_PROFILES and requested != AUTO_PROFILE:
+            requested = getattr(settings, 'DEFAULT_PROCESSING_PROFILE', 'balanced')
+        if requested in PROCESSING_PROFILES:
+            return requested
+        if requested != AUTO_PROFILE:
+            return 'balanced'
+        with self._lock:
+            rtf, queued = self.rtf, self.active_jobs
+        step = 0
+        if rtf > self.rtf_threshold:
+            step += 1
+        if queued >= self.queue_threshold:
+            step += 1
+        chosen = PROFILE_ORDER[min(step, len(PROFILE_ORDER) - 1)]
+        logger.info(f"[PROFILE] Automatic profile: {chosen} (rtf={rtf:.2f}, active_jobs={queued})")
+        return chosen
+
+    def stats(self):
+        with self._lock:
+            return {'active_jobs': self.active_jobs, 'rtf': round(self.rtf, 3)}
+
+
+# Global load monitor shared by all connections
+load_monitor = LoadMonitor()
@@ -0,0 +1,225 @@
+import bisect
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+def plan_segments(turns, merge_gap=0.5, min_duration=0.5):
+    """
+    Turn diarization turns into the segments that are sent to ASR.
+
+    Adjacent turns of the same speaker separated by less than `merge_gap` seconds are
+    merged. Segments still shorter than `min_duration` are absorbed into a neighbouring
+    segment that starts or ends within `merge_gap`, or dropped otherwise.
+
+    Returns (segments, stats). Each segment has start, end, speaker and the indices of
+    the diarization turns it covers.
+    """
+    order = sorted(range(len(turns)), key=lambda i: (turns[i]['start'], turns[i]['end']))
+    merged = []
+    for i in order:
+        turn = turns[i]
+        if merged and merged[-1]['speaker'] == turn['speaker'] and turn['start'] - merged[-1]['end'] < merge_gap:
+            merged[-1]['end'] = max(merged[-1]['end'], turn['end'])
+            merged[-1]['turns'].append(i)
+        else:
+            merged.append({
+                'start': turn['start'],
+                'end': turn['end'],
+                'speaker': turn['speaker'],
+                'turns': [i]
+            })
+
+    segments = []
+    absorbed = 0
+    dropped = 0
+    for k, seg in enumerate(merged):
+        if seg['end'] - seg['start'] >= min_duration:
+            segments.append(seg)
+            continue
+        # Nearest long-enough neighbour on either side, if it is close enough
+        prev_seg = segments[-1] if segments else None
+        next_seg = next((s for s in merged[k + 1:] if s['end'] - s['start'] >= min_duration), None)
+        prev_gap = seg['start'] - prev_seg['end'] if prev_seg else None
+        next_gap = next_seg['start'] - seg['end'] if next_seg else None
+        if prev_gap is not None and prev_gap < merge_gap and (next_gap is None or prev_gap <= next_gap):
+            prev_seg['end'] = max(prev_seg['end'], seg['end'])
+            prev_seg['turns'].extend(seg['turns'])
+            absorbed += 1
+        elif next_gap is not None and next_gap < merge_gap:
+            next_seg['start'] = min(next_seg['start'], seg['start'])
+            next_seg['turns'][:0] = seg['turns']
+            absorbed += 1
+        else:
+            dropped += 1
+
+    stats = {
+        'diarization_turns': len(turns),
+        'asr_segments': len(segments),
+        'merged_turns': len(turns) - len(merged),
+        'absorbed_fragments': absorbed,
+        'dropped_fragments': dropped,
+        'asr_calls_saved': len(turns) - len(segments),
+    }
+    return segments, stats
+
+
+def split_into_windows(num_samples, window_samples, overlap_samples):
+    """
+    Split [0, num_samples) into windows of at most `window_samples` that overlap by
+    `overlap_samples`. Returns a list of (start, end) sample offsets.
+    """
+    if num_samples <= 0:
+        return []
+    if num_samples <= window_samples:
+        return [(0, num_samples)]
+    step = max(1, window_samples - overlap_samples)
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window_samples, num_samples)
+        windows.append((start, end))
+        if end >= num_samples:
+            break
+        start += step
+    return windows
+
+
+def _overlap_tokens(text, spaced):
+    """Comparable tokens for overlap matching: words, or characters for unspaced scripts."""
+    if spaced:
+        return text.split(), ' '
+    return list(text), ''
+
+
+def _normalize_token(token):
+    return re.sub(r'[^\w]', '', token.lower())
+
+
+def stitch_chunk_texts(texts, max_overlap_tokens=30):
+    """
+    Join the transcripts of overlapping windows, dropping the words that the overlap
+    made Whisper transcribe twice. The longest run of tokens that ends the text so far
+    and starts the next window is removed from the next window.
+    """
+    stitched = ''
+    for text in texts:
+        text = text.strip()
+        if not text:
+            continue
+        if not stitched:
+            stitched = text
+            continue
+        # A one-word window of a spaced script still joins with a space
+        spaced = ' ' in stitched or ' ' in text
+        prev_tokens, _ = _overlap_tokens(stitched, spaced)
+        next_tokens, joiner = _overlap_tokens(text, spaced)
+        prev_norm = [_normalize_token(t) for t in prev_tokens[-max_overlap_tokens:]]
+        next_norm = [_normalize_token(t) for t in next_tokens[:max_overlap_tokens]]
+        overlap = 0
+        for size in range(min(len(prev_norm), len(next_norm)), 0, -1):
+            if prev_norm[-size:] == next_norm[:size]:
+                overlap = size
+                break
+        remainder = joiner.join(next_tokens[overlap:])
+        if remainder:
+            stitched = f"{stitched}{joiner}{remainder}"
+    return stitched
+
+
+def trailing_text(text, chunks):
+    """Text of a Whisper result after its last closed timestamp pair ('' when none)."""
+    position = 0
+    for chunk in chunks:
+        chunk_text = chunk['text'].strip()
+        found = text.find(chunk_text, position)
+        if found < 0:
+            return ''
+        position = found + len(chunk_text)
+    return text[position:].strip()
+
+
+def timestamped_window_chunks(windows, results, sample_rate=16000):
+    """
+    Timestamped text of overlapping long-form windows, in recording time.
+
+    `windows` are (start, end) sample offsets and `results` the Whisper result of each
+    window (None when it failed). Where two windows overlap, the earlier one keeps the
+    chunks that start before the middle of the overlap and the later one continues
+    with the chunks centred after the last kept chunk, so the overlap is transcribed
+    once. Text after a window's last closed timestamp runs to the window end; it is
+    dropped when the next window decodes that audio again.
+    Returns a list of (start, end, text, language) in time order.
+    """
+    timed = []
+    covered_until = float('-inf')
+    for k, ((start, end), result) in enumerate(zip(windows, results)):
+        if result is None:
+            continue
+        offset = start / sample_rate
+        window_end = end / sample_rate
+        has_next = k + 1 < len(windows) and results[k + 1] is not None
+        next_start = windows[k + 1][0] / sample_rate if has_next else float('inf')
+        handoff = (next_start + window_end) / 2 if has_next else float('inf')
+        chunks = [
+            (offset + chunk['timestamp'][0], offset + chunk['timestamp'][1] if chunk['timestamp'][1] is not None else window_end, chunk['text'].strip())
+            for chunk in result['offsets']
+        ]
+        rest = trailing_text(result['text'], result['offsets'])
+        rest_start = chunks[-1][1] if chunks else offset
+        if rest and rest_start < next_start:
+            chunks.append((rest_start, window_end, rest))
+        for chunk_start, chunk_end, text in chunks:
+            if text and (chunk_start + chunk_end) / 2 >= covered_until and chunk_start < handoff:
+                timed.append((chunk_start, chunk_end, text, result['language']))
+                covered_until = max(covered_until, chunk_end)
+    return timed
+
+
+class TurnIntervalIndex:
+    """
+    Sorted interval index over diarization turns for assigning timestamped text to
+    speakers. A lookup returns the turn with the largest overlap, or the nearest turn
+    when nothing overlaps.
+    """
+
+    def __init__(self, turns):
+        self.turns = sorted(turns, key=lambda t: t['start'])
+        self.starts = [t['start'] for t in self.turns]
+        # Running maximum of turn ends (and which turn holds it) lets an overlap
+        # scan stop early and finds the latest-ending turn before a point
+        self.max_ends = []
+        self.max_end_turns = []
+        for k, turn in enumerate(self.turns):
+            if not self.max_ends or turn['end'] > self.max_ends[-1]:
+                self.max_ends.append(turn['end'])
+                self.max_end_turns.append(k)
+            else:
+                self.max_ends.append(self.max_ends[-1])
+                self.max_end_turns.append(self.max_end_turns[-1])
+
+    def lookup(self, start, end):
+        if not self.turns:
+            return None
+        hi = bisect.bisect_left(self.starts, end)
+        best = None
+        best_overlap = 0.0
+        k = hi - 1
+        while k >= 0 and self.max_ends[k] > start:
+            turn = self.turns[k]
+            overlap = min(end, turn['end']) - max(start, turn['start'])
+            if overlap > best_overlap:
+                best, best_overlap = turn, overlap
+            k -= 1
+        if best is not None:
+            return best
+
+        # Nothing overlaps: nearest turn before or after the chunk
+        candidates = []
+        if hi > 0:
+            prev_turn = self.turns[self.max_end_turns[hi - 1]]
+            candidates.append((start - prev_turn['end'], prev_turn))
+        if hi < len(self.turns):
+            candidates.append((self.turns[hi]['start'] - end, self.turns[hi]))
+        return min(candidates, key=lambda c: c[0])[1]
@@ -0,0 +1,98 @@
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SpeakerRegistry:
+    """
+    Speaker identities of one meeting.
+
+    Each known speaker has a normalized embedding centroid, stored together as one
+    (speakers x dim) float32 matrix, and a persistent label (SPEAKER_1, SPEAKER_2, ...).
+    New diarization clusters are matched against all centroids with one matrix product.
+    Safe to use from concurrent pipeline threads.
+    """
+
+    def __init__(self, similarity_threshold=0.6):
+        self.similarity_threshold = similarity_threshold
+        self.labels = []
+        self.languages = {}  # Persistent label -> detected language, see LANGUAGE_ID_SCOPE
+        self._centroids = None
+        self._weights = np.zeros(0, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def assign(self, embeddings, durations=None):
+        """
+        Map diarization cluster labels to persistent labels.
+        `embeddings` maps cluster label -> embedding (or None); `durations` maps cluster
+        label -> seconds of speech and weights centroid updates. Matching is one-to-one:
+        the most similar (cluster, speaker) pairs above the threshold are taken first.
+        Unmatched clusters become new speakers.
+        """
+        durations = durations or {}
+        with self._lock:
+            mapping = {}
+            embedded = [label for label, e in embeddings.items() if e is not None]
+            if embedded and self._centroids is not None and len(self.labels):
+                vectors = self._normalize(np.stack([embeddings[label] for label in embedded]))
+                similarities = vectors @ self._centroids.T
+                taken = set()
+                for flat in np.argsort(similarities, axis=None)[::-1]:
+                    row, col = np.unravel_index(flat, similarities.shape)
+                    if similarities[row, col] < self.similarity_threshold:
+                        break
+                    label = embedded[row]
+                    if label in mapping or col in taken:
+                        continue
+                    mapping[label] = col
+                    taken.add(col)
+                    self._update(col, vectors[row], durations.get(label, 1.0))
+            for label, embedding in embeddings.items():
+                if label not in mapping:
+                    mapping[label] = self._add(embedding, durations.get(label, 1.0))
+            return {label: self.labels[k] for label, k in mapping.items()}
+
+    def _add(self, embedding, weight):
+        k = len(self.labels)
+        self.labels.append(f"SPEAKER_{k + 1}")
+        vector = None
+        if embedding is not None:
+            vector = self._normalize(np.asarray(embedding, dtype=np.float32)[None, :])
+        if self._centroids is None and vector is not None:
+            self._centroids = np.zeros((k, vector.shape[1]), dtype=np.float32)
+        if self._centroids is not None:
+            # Speakers without an embedding get a zero row (never matched) so rows stay aligned
+            row = vector if vector is not None else np.zeros((1, self._centroids.shape[1]), dtype=np.float32)
+            self._centroids = np.vstack((self._centroids, row))
+        self._weights = np.append(self._weights, np.float32(weight if vector is not None else 0.0))
+        return k
+
+    def _update(self, k, vector, weight):
+        merged = self._centroids[k] * self._weights[k] + vector * weight
+        self._centroids[k] = merged / (np.linalg.norm(merged) + 1e-8)
+        self._weights[k] += weight
+
+    @staticmethod
+    def _normalize(matrix):
+        return matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-8)
+
+
+class SpeakerRegistryStore:
+    """Per-meeting speaker registries, keyed by meeting id (or connection)."""
+
+    def __init__(self, similarity_threshold=0.6):
+        self.similarity_threshold = similarity_threshold
+        self._registries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._registries:
+                self._registries[key] = SpeakerRegistry(self.similarity_threshold)
+            return self._registries[key]
+
+    def discard(self, key):
+        with self._lock:
+            self._registries.pop(key, None)
@@ -1,3 +1,770 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
+import numpy as np
+import threading
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from .audio_processor import AudioProcessor, TimestampRemap, detect_speech_regions, split_sentences
+from .diarization import WindowedDiarizer
+from .gemini_governor import CircuitBreaker, InsightsGovernor
+from .inference_service import MicroBatcher
+from .insights import InsightsEngine, StubInsightsClient, chunk_lines, extract_insights_locally, merge_insights, summary_tools
+from .insights_cache import CachedInsightsClient, InsightsResponseCache
+from .model_registry import ModelRegistry
+from .mongodb_client import MongoDBClient, available_languages, transcripts_in_language
+from .pretranslation import PretranslationScheduler
+from .profiles import LoadMonitor, get_profile
+from .speaker_registry import SpeakerRegistry, SpeakerRegistryStore
+from .segments import TurnIntervalIndex, plan_segments, split_into_windows, stitch_chunk_texts, timestamped_window_chunks, trailing_text
+from .translation_cache import TranslationCache
 
-# Create your tests here.
+
+def turn(start, end, speaker):
+    return {'start': start, 'end': end, 'speaker': speaker}
+
+
+def insight(insight_type, field, text, **extra):
+    return {'type': 'insight', 'data': {'insight_type': insight_type, field: text, **extra}}
+
+
+def bare_processor(**attributes):
+    """An AudioProcessor without loaded models, for testing its planning stages."""
+    processor = AudioProcessor.__new__(AudioProcessor)
+    processor.supported_languages = {'en', 'es', 'fr', 'zh'}
+    processor.language_id_scope = 'speaker'
+    processor.asr_window_seconds = 30.0
+    processor.__dict__.update(attributes)
+    return processor
+
+
+class FakeTranslator:
+    """Translation backend stub: 'src>tgt: text' for its pairs, and a log of batches."""
+
+    name = 'fake'
+
+    def __init__(self, pairs):
+        self.pairs = set(pairs)
+        self.batches = []
+
+    def supports(self, translation_key):
+        return tuple(translation_key) in self.pairs
+
+    def load(self, translation_key):
+        return True
+
+    def translate_batch(self, texts, translation_key, num_beams=None):
+        self.batches.append((tuple(translation_key), list(texts)))
+        return [f"{translation_key[0]}>{translation_key[1]}: {text}" for text in texts]
+
+
+def translating_processor(pairs):
+    return bare_processor(
+        translation_backend=FakeTranslator(pairs),
+        translation_cache=None,
+        inference_service=None,
+        translation_max_sentence_chars=400
+    )
+
+
+class FakeLanguageID:
+    """ASR backend stub whose language ID reads the language off the first sample."""
+
+    def __init__(self, languages):
+        self.languages = languages
+        self.calls = 0
+
+    def detect_language(self, audio, sample_rate):
+        self.calls += 1
+        return self.languages.get(int(audio[0]))
+
+
+class PlanSegmentsTests(SimpleTestCase):
+    def test_merges_close_turns_of_the_same_speaker(self):
+        segments, stats = plan_segments([turn(0.0, 2.0, 'A'), turn(2.2, 4.0, 'A'), turn(5.0, 7.0, 'B')])
+        self.assertEqual([(s['start'], s['end'], s['speaker']) for s in segments], [(0.0, 4.0, 'A'), (5.0, 7.0, 'B')])
+        self.assertEqual(segments[0]['turns'], [0, 1])
+        self.assertEqual(stats['asr_calls_saved'], 1)
+
+    def test_keeps_turns_separated_by_a_long_gap(self):
+        segments, _ = plan_segments([turn(0.0, 2.0, 'A'), turn(3.0, 5.0, 'A')])
+        self.assertEqual(len(segments), 2)
+
+    def test_short_fragment_is_absorbed_into_a_close_neighbour(self):
+        segments, stats = plan_segments([turn(0.0, 2.0, 'A'), turn(2.1, 2.3, 'B'), turn(4.0, 6.0, 'A')])
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(segments[0]['end'], 2.3)
+        self.assertEqual(segments[0]['turns'], [0, 1])
+        self.assertEqual(stats['absorbed_fragments'], 1)
+
+    def test_isolated_short_fragment_is_dropped(self):
+        segments, stats = plan_segments([turn(0.0, 2.0, 'A'), turn(4.0, 4.2, 'B'), turn(8.0, 10.0, 'A')])
+        self.assertEqual([s['speaker'] for s in segments], ['A', 'A'])
+        self.assertEqual(stats['dropped_fragments'], 1)
+
+    def test_unsorted_turns(self):
+        segments, _ = plan_segments([turn(5.0, 7.0, 'B'), turn(0.0, 2.0, 'A')])
+        self.assertEqual([s['turns'] for s in segments], [[1], [0]])
+
+
+class WindowTests(SimpleTestCase):
+    def test_short_input_is_one_window(self):
+        self.assertEqual(split_into_windows(10, 30, 3), [(0, 10)])
+        self.assertEqual(split_into_windows(0, 30, 3), [])
+
+    def test_windows_overlap_and_cover_the_input(self):
+        windows = split_into_windows(70, 30, 5)
+        self.assertEqual(windows, [(0, 30), (25, 55), (50, 70)])
+
+
+class StitchTests(SimpleTestCase):
+    def test_drops_words_repeated_by_the_overlap(self):
+        text = stitch_chunk_texts(['we should ship the beta', 'the Beta on Friday'])
+        self.assertEqual(text, 'we should ship the beta on Friday')
+
+    def test_joins_texts_without_overlap(self):
+        self.assertEqual(stitch_chunk_texts(['hello there', '', 'general kenobi']), 'hello there general kenobi')
+
+    def test_single_word_window_keeps_the_space(self):
+        self.assertEqual(stitch_chunk_texts(['see you on', 'Friday.']), 'see you on Friday.')
+
+    def test_unspaced_scripts_match_characters(self):
+        self.assertEqual(stitch_chunk_texts(['我们明天发布', '明天发布测试版']), '我们明天发布测试版')
+
+
+class LongformChunkTests(SimpleTestCase):
+    @staticmethod
+    def result(text, offsets):
+        return {'text': text, 'language': 'en', 'offsets': [{'text': t, 'timestamp': ts} for t, ts in offsets]}
+
+    def test_trailing_text_after_the_last_timestamp(self):
+        result = self.result('Hello there. And then we', [(' Hello there.', (0.0, 2.0))])
+        self.assertEqual(trailing_text(result['text'], result['offsets']), 'And then we')
+
+    def test_overlap_is_kept_once_and_trailing_text_survives(self):
+        # Windows [0, 30) and [27, 57) seconds overlap by 3 s, midpoint 28.5 s
+        windows = [(0, 30), (27, 57)]
+        results = [
+            self.result('First part. Second part. Cut wo', [(' First part.', (0.0, 20.0)), (' Second part.', (20.0, 28.0))]),
+            self.result('Second part. Cut word here. Last', [(' Second part.', (0.0, 1.0)), (' Cut word here.', (1.6, 10.0))]),
+        ]
+        chunks = timestamped_window_chunks(windows, results, sample_rate=1)
+        self.assertEqual(
+            [(start, text) for start, _, text, _ in chunks],
+            [(0.0, 'First part.'), (20.0, 'Second part.'), (28.6, 'Cut word here.'), (37.0, 'Last')]
+        )
+
+    def test_failed_window_is_skipped(self):
+        chunks = timestamped_window_chunks([(0, 30)], [None], sample_rate=1)
+        self.assertEqual(chunks, [])
+
+
+class TurnIntervalIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = TurnIntervalIndex([turn(0.0, 10.0, 'A'), turn(8.0, 20.0, 'B'), turn(30.0, 40.0, 'C')])
+
+    def test_largest_overlap_wins(self):
+        self.assertEqual(self.index.lookup(7.0, 12.0)['speaker'], 'B')
+        self.assertEqual(self.index.lookup(1.0, 9.0)['speaker'], 'A')
+
+    def test_nearest_turn_when_nothing_overlaps(self):
+        self.assertEqual(self.index.lookup(21.0, 23.0)['speaker'], 'B')
+        self.assertEqual(self.index.lookup(27.0, 29.0)['speaker'], 'C')
+
+    def test_empty_index(self):
+        self.assertIsNone(TurnIntervalIndex([]).lookup(0.0, 1.0))
+
+
+class SpeechGateTests(SimpleTestCase):
+    def noise(self, seconds, dbfs):
+        return np.random.default_rng(0).normal(0, 10 ** (dbfs / 20), int(seconds * 16000)).astype(np.float32)
+
+    def test_keeps_a_quiet_speaker_next_to_a_loud_one(self):
+        silence = np.zeros(2 * 16000, dtype=np.float32)
+        audio = np.concatenate([self.noise(3, -6), silence, self.noise(3, -46), silence])
+        regions = detect_speech_regions(audio)
+        self.assertEqual(len(regions), 2)
+        self.assertLess(regions[1][0], 5 * 16000)
+        self.assertGreater(regions[1][1], 8 * 16000)
+
+    def test_silence_has_no_speech(self):
+        self.assertEqual(detect_speech_regions(np.zeros(16000, dtype=np.float32)), [])
+
+    def test_remap_to_original_time(self):
+        remap = TimestampRemap([(16000, 32000), (64000, 96000)])
+        self.assertEqual(remap.to_original(0.5), 1.5)
+        self.assertEqual(remap.to_original(1.5), 4.5)
+
+
+class SplitSentencesTests(SimpleTestCase):
+    def test_splits_at_terminators_followed_by_space(self):
+        self.assertEqual(split_sentences('We ship Friday. Any questions? Yes!'), ['We ship Friday.', 'Any questions?', 'Yes!'])
+
+    def test_keeps_numbers_urls_and_ellipses_whole(self):
+        self.assertEqual(
+            split_sentences('Revenue grew 3.5 percent, see www.example.com. Wait...'),
+            ['Revenue grew 3.5 percent, see www.example.com.', 'Wait...']
+        )
+
+    def test_splits_cjk_without_spaces(self):
+        self.assertEqual(split_sentences('我们周五发布。有问题吗？'), ['我们周五发布。', '有问题吗？'])
+
+    def test_cuts_long_sentences_at_words(self):
+        pieces = split_sentences('word ' * 30, max_chars=20)
+        self.assertTrue(all(len(piece) <= 20 for piece in pieces))
+        self.assertEqual(' '.join(pieces).split(), ['word'] * 30)
+
+
+class MergeInsightsTests(SimpleTestCase):
+    def test_drops_repeats_and_fills_missing_fields(self):
+        merged = merge_insights([
+            [insight('action_item', 'task', 'Update the docs')],
+            [insight('action_item', 'task', 'update the docs.', assignee='John')],
+        ])
+        self.assertEqual(len(merged), 1)
+        self.assertEqual(merged[0]['data']['assignee'], 'John')
+
+    def test_skips_known_insights(self):
+        seen = set()
+        merge_insights([[insight('decision', 'decision', 'Ship on Friday')]], seen)
+        self.assertEqual(merge_insights([[insight('decision', 'decision', 'Ship on Friday!')]], seen), [])
+
+
+class InsightsEngineTests(SimpleTestCase):
+    transcript = '\n'.join([
+        'SPEAKER_1: We agreed to ship the beta on Friday',
+        'SPEAKER_2: The dashboard is slow on Mondays',
+        'SPEAKER_1: Maria will update the release notes',
+        'SPEAKER_2: Customers asked for dark mode',
+    ])
+
+    def test_chunk_lines_splits_at_turns_within_budget(self):
+        chunks = chunk_lines(self.transcript, 20)
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual('\n'.join(chunks), self.transcript)
+
+    def test_map_reduce_matches_single_pass(self):
+        single = asyncio.run(InsightsEngine(StubInsightsClient(), delta_tokens=1000).extract('m', self.transcript))
+        client = StubInsightsClient()
+        engine = InsightsEngine(client, delta_tokens=20)
+        mapped = asyncio.run(engine.extract('m', self.transcript))
+        self.assertEqual(client.calls, 5)  # Four parts and the reduce-summary call
+        self.assertEqual([i['data'] for i in mapped], [i['data'] for i in single])
+        self.assertEqual(
+            [i['data']['insight_type'] for i in mapped],
+            ['decision', 'key_point', 'action_item', 'key_point']
+        )
+        self.assertTrue(engine.state('m').summary)
+
+    def test_repeated_text_yields_no_new_insights(self):
+        engine = InsightsEngine(StubInsightsClient(), delta_tokens=20)
+        self.assertEqual(len(asyncio.run(engine.extract('m', self.transcript))), 4)
+        self.assertEqual(asyncio.run(engine.extract('m', self.transcript)), [])
+        self.assertEqual(len(engine.state('m').insights), 4)
+
+    def test_failed_reduce_leaves_the_state_untouched(self):
+        class FailingSummaryClient(StubInsightsClient):
+            async def generate(self, prompt, tools, **kwargs):
+                if tools is summary_tools:
+                    raise RuntimeError('summary failed')
+                return await super().generate(prompt, tools, **kwargs)
+
+        engine = InsightsEngine(FailingSummaryClient(), delta_tokens=20)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(engine.extract('m', self.transcript))
+        self.assertEqual(engine.state('m').seen, set())
+        fallback = engine.record('m', [insight('decision', 'decision', 'SPEAKER_1: We agreed to ship the beta on Friday')])
+        self.assertEqual(len(fallback), 1)
+
+
+class LocalExtractorTests(SimpleTestCase):
+    def test_finds_decisions_and_action_items(self):
+        insights = extract_insights_locally('We agreed on a 3.5% raise. John will update the docs by Monday. Nice weather.')
+        self.assertEqual([i['data']['insight_type'] for i in insights], ['decision', 'action_item'])
+        self.assertEqual(insights[0]['data']['decision'], 'We agreed on a 3.5% raise.')
+        self.assertEqual(insights[1]['data']['assignee'], 'John')
+        self.assertEqual(insights[1]['data']['due_date'], 'Monday')
+        self.assertTrue(all(i['source'] == 'local' for i in insights))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_consecutive_failures_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'closed')
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        self.assertTrue(breaker.allow())  # Reset time passed: one trial call
+        self.assertEqual(breaker.state, 'half_open')
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_rejects_calls_while_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60.0)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.stats()['rejected'], 1)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def test_unloads_least_recently_used_models_over_budget(self):
+        registry = ModelRegistry('test', ['a', 'b', 'c'], lambda key: key, lambda entry: 10, max_bytes=20, pinned=['a'])
+        for key in ['a', 'b', 'c']:
+            registry.get(key)
+        self.assertEqual(registry.stats()['loaded'], ['a', 'c'])
+        self.assertEqual(registry.unloads, 1)
+
+    def test_failed_load_is_retried_after_backoff(self):
+        attempts = []
+
+        def load(key):
+            attempts.append(key)
+            if len(attempts) == 1:
+                raise OSError('network down')
+            return key
+
+        registry = ModelRegistry('test', ['a'], load, lambda entry: 1, retry_seconds=0.0)
+        with self.assertRaises(KeyError):
+            registry.get('a')
+        self.assertTrue(registry.supports('a'))
+        self.assertEqual(registry.get('a'), 'a')
+        self.assertEqual(registry.stats()['failed'], [])
+
+    def test_failed_key_is_unavailable_until_retry_time(self):
+        def load(key):
+            raise OSError('network down')
+
+        registry = ModelRegistry('test', ['a'], load, lambda entry: 1, retry_seconds=60.0)
+        with self.assertRaises(KeyError):
+            registry.get('a')
+        self.assertFalse(registry.supports('a'))
+
+
+class CachedInsightsClientTests(SimpleTestCase):
+    def test_repeated_request_is_served_from_the_cache(self):
+        stub = StubInsightsClient()
+        client = CachedInsightsClient(stub, InsightsResponseCache())
+        first = asyncio.run(client.generate('Transcript:\nWe agreed to ship', summary_tools))
+        second = asyncio.run(client.generate('Transcript:\nWe agreed to ship', summary_tools))
+        self.assertEqual(first, second)
+        self.assertEqual(stub.calls, 1)
+
+    def test_empty_response_is_not_cached(self):
+        stub = StubInsightsClient()
+        client = CachedInsightsClient(stub, InsightsResponseCache())
+        asyncio.run(client.generate('Transcript:\n', summary_tools))
+        asyncio.run(client.generate('Transcript:\n', summary_tools))
+        self.assertEqual(stub.calls, 2)
+
+
+class TranslationCacheTests(SimpleTestCase):
+    def test_hit_after_put_with_normalized_text(self):
+        cache = TranslationCache()
+        cache.put('Hello  world ', ('en', 'es'), 2, 'Hola mundo')
+        self.assertEqual(cache.get('Hello world', ('en', 'es'), 2), 'Hola mundo')
+        self.assertIsNone(cache.get('Hello world', ('en', 'fr'), 2))
+        self.assertIsNone(cache.get('Hello world', ('en', 'es'), 4))
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = TranslationCache(max_entries=2)
+        cache.put('a', ('en', 'es'), None, 'A')
+        cache.put('b', ('en', 'es'), None, 'B')
+        cache.get('a', ('en', 'es'))
+        cache.put('c', ('en', 'es'), None, 'C')
+        self.assertIsNone(cache.get('b', ('en', 'es')))
+        self.assertEqual(cache.get('a', ('en', 'es')), 'A')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_disk_tier_serves_memory_misses_and_keeps_newest_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'translations.sqlite3')
+            cache = TranslationCache(path=path, max_disk_entries=2)
+            cache.put_many([('a', 'A'), ('b', None), ('c', 'C')], ('en', 'es'), 1)
+            cache.put('d', ('en', 'es'), 1, 'D')
+            reopened = TranslationCache(path=path)
+            self.assertIsNone(reopened.get('a', ('en', 'es'), 1))
+            self.assertIsNone(reopened.get('b', ('en', 'es'), 1))
+            self.assertEqual(reopened.get('c', ('en', 'es'), 1), 'C')
+            self.assertEqual(reopened.get('d', ('en', 'es'), 1), 'D')
+            self.assertEqual(reopened.stats()['disk_hits'], 2)
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_batches_requests_of_similar_length(self):
+        batches = []
+
+        def run_batch(key, payloads):
+            batches.append(payloads)
+            return [payload.upper() for payload in payloads]
+
+        batcher = MicroBatcher('test', run_batch, max_batch_size=3, max_wait_ms=50)
+        futures = [batcher.submit('k', text) for text in ['aaaa', 'b', 'aaab', 'c', 'aaac']]
+        self.assertEqual([future.result(timeout=5) for future in futures], ['AAAA', 'B', 'AAAB', 'C', 'AAAC'])
+        self.assertEqual(batches, [['aaaa', 'aaab', 'aaac'], ['b', 'c']])
+
+    def test_request_batch_size_cap(self):
+        batches = []
+        batcher = MicroBatcher('test', lambda key, payloads: batches.append(payloads) or payloads, max_batch_size=8, max_wait_ms=50)
+        futures = [batcher.submit('k', 'solo', max_batch_size=1), batcher.submit('k', 'x'), batcher.submit('k', 'y')]
+        [future.result(timeout=5) for future in futures]
+        self.assertEqual(batches[0], ['solo'])
+
+    def test_padded_length_limit(self):
+        batcher = MicroBatcher('test', lambda key, payloads: payloads, max_batch_size=8, max_wait_ms=10, max_padded_length=60, min_padded_length=30)
+        futures = [batcher.submit('k', k, length=10) for k in range(4)]
+        self.assertEqual([future.result(timeout=5) for future in futures], [0, 1, 2, 3])
+        self.assertEqual(batcher.batches, 2)
+
+    def test_short_result_list_fails_the_batch(self):
+        batcher = MicroBatcher('test', lambda key, payloads: payloads[:1], max_batch_size=2, max_wait_ms=50)
+        futures = [batcher.submit('k', 'a'), batcher.submit('k', 'b')]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+
+class InsightsGovernorTests(SimpleTestCase):
+    def test_meetings_are_served_round_robin(self):
+        order = []
+
+        async def scenario():
+            governor = InsightsGovernor(rate_per_minute=60000, burst=100, max_concurrency=1, max_retries=0)
+
+            def request(meeting):
+                async def call():
+                    order.append(meeting)
+                    await asyncio.sleep(0)
+                return call
+
+            await asyncio.gather(*(governor.run(meeting, request(meeting)) for meeting in ['A', 'A', 'A', 'B', 'C']))
+
+        asyncio.run(scenario())
+        self.assertEqual(order, ['A', 'A', 'B', 'C', 'A'])
+
+    def test_retries_retryable_errors(self):
+        class ResourceExhausted(Exception):
+            pass
+
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ResourceExhausted()
+            return 'ok'
+
+        governor = InsightsGovernor(rate_per_minute=60000, burst=100, max_retries=3, base_delay=0.0)
+        self.assertEqual(asyncio.run(governor.run('A', call)), 'ok')
+        self.assertEqual(governor.retries, 2)
+
+    def test_other_errors_are_not_retried(self):
+        async def call():
+            raise ValueError('bad request')
+
+        governor = InsightsGovernor(max_retries=3, base_delay=0.0)
+        with self.assertRaises(ValueError):
+            asyncio.run(governor.run('A', call))
+        self.assertEqual(governor.failures, 1)
+
+
+class PretranslationSchedulerTests(SimpleTestCase):
+    def collector(self, count):
+        done = threading.Semaphore(0)
+        results = []
+
+        def on_done(transcripts, language):
+            results.append((language, transcripts))
+            done.release()
+
+        return results, on_done, lambda: [done.acquire(timeout=5) for _ in range(count)]
+
+    def test_translates_languages_in_submission_order(self):
+        scheduler = PretranslationScheduler(lambda texts, language: [f'{language}:{t}' for t in texts], lambda: True, chunk_size=2)
+        results, on_done, wait = self.collector(3)
+        scheduler.submit('A', ['a', 'b', 'c'], ['es', 'fr'], on_done)
+        scheduler.submit('B', ['d'], ['de'], on_done)
+        wait()
+        self.assertEqual(results, [('es', ['es:a', 'es:b', 'es:c']), ('fr', ['fr:a', 'fr:b', 'fr:c']), ('de', ['de:d'])])
+        self.assertEqual(scheduler.stats()['completed'], 3)
+
+    def test_cancel_stops_the_running_job_and_drops_queued_ones(self):
+        started, release = threading.Event(), threading.Event()
+
+        def translate(texts, language):
+            if language == 'es':
+                started.set()
+                release.wait(timeout=5)
+            return texts
+
+        scheduler = PretranslationScheduler(translate, lambda: True, chunk_size=1)
+        results, on_done, wait = self.collector(1)
+        scheduler.submit('A', ['a', 'b'], ['es', 'fr'], on_done)
+        started.wait(timeout=5)
+        scheduler.cancel('A')
+        scheduler.submit('B', ['c'], ['de'], on_done)
+        release.set()
+        wait()
+        self.assertEqual(results, [('de', ['c'])])
+        self.assertEqual(scheduler.stats()['queued'], 0)
+        self.assertEqual(scheduler._cancelled, set())
+
+    def test_cancel_without_running_work_leaves_no_state(self):
+        scheduler = PretranslationScheduler(lambda texts, language: texts, lambda: True)
+        scheduler.cancel('A')
+        self.assertEqual(scheduler._cancelled, set())
+
+
+class LoadMonitorTests(SimpleTestCase):
+    def monitor(self):
+        with override_settings(AUTO_PROFILE_RTF_THRESHOLD=0.5, AUTO_PROFILE_QUEUE_THRESHOLD=2, AUTO_PROFILE_RTF_SMOOTHING=1.0):
+            return LoadMonitor()
+
+    def test_explicit_profiles_are_kept(self):
+        monitor = self.monitor()
+        monitor.job_finished(10.0, 100.0)
+        self.assertEqual(monitor.choose_profile('accurate'), 'accurate')
+
+    def test_auto_steps_down_for_each_threshold_crossed(self):
+        monitor = self.monitor()
+        self.assertEqual(monitor.choose_profile('auto'), 'accurate')
+        monitor.job_started()
+        monitor.job_finished(10.0, 8.0)
+        self.assertEqual(monitor.choose_profile('auto'), 'balanced')
+        monitor.job_started()
+        monitor.job_started()
+        self.assertEqual(monitor.choose_profile('auto'), 'fast')
+
+    def test_unknown_or_missing_profile_uses_the_default(self):
+        monitor = self.monitor()
+        with override_settings(DEFAULT_PROCESSING_PROFILE='fast'):
+            self.assertEqual(monitor.choose_profile(None), 'fast')
+            self.assertEqual(monitor.choose_profile('turbo'), 'fast')
+        with override_settings(DEFAULT_PROCESSING_PROFILE='auto'):
+            monitor.job_started()
+            monitor.job_started()
+            self.assertEqual(monitor.choose_profile(None), 'balanced')
+
+    def test_get_profile_resolves_an_automatic_default(self):
+        with override_settings(DEFAULT_PROCESSING_PROFILE='auto'):
+            self.assertIn(get_profile(None), [get_profile('accurate'), get_profile('balanced'), get_profile('fast')])
+
+
+class SpeakerRegistryTests(SimpleTestCase):
+    def test_labels_persist_across_recordings(self):
+        registry = SpeakerRegistry(similarity_threshold=0.6)
+        first = registry.assign({'SPEAKER_00': np.array([1.0, 0.0]), 'SPEAKER_01': np.array([0.0, 1.0])})
+        second = registry.assign({'SPEAKER_00': np.array([0.1, 1.0]), 'SPEAKER_01': np.array([1.0, 0.1])})
+        self.assertEqual(first, {'SPEAKER_00': 'SPEAKER_1', 'SPEAKER_01': 'SPEAKER_2'})
+        self.assertEqual(second, {'SPEAKER_00': 'SPEAKER_2', 'SPEAKER_01': 'SPEAKER_1'})
+
+    def test_matching_is_one_to_one(self):
+        registry = SpeakerRegistry(similarity_threshold=0.6)
+        registry.assign({'A': np.array([1.0, 0.0])})
+        # Both clusters resemble SPEAKER_1; only the closer one gets it
+        mapping = registry.assign({'A': np.array([0.8, 0.6]), 'B': np.array([1.0, 0.05])})
+        self.assertEqual(mapping, {'A': 'SPEAKER_2', 'B': 'SPEAKER_1'})
+
+    def test_clusters_without_embedding_become_new_speakers(self):
+        registry = SpeakerRegistry()
+        registry.assign({'A': np.array([1.0, 0.0])})
+        self.assertEqual(registry.assign({'A': None, 'B': np.array([1.0, 0.0])}), {'A': 'SPEAKER_2', 'B': 'SPEAKER_1'})
+        self.assertEqual(registry.assign({'A': np.array([0.0, 1.0])}), {'A': 'SPEAKER_3'})
+
+    def test_store_discard_starts_a_fresh_registry(self):
+        store = SpeakerRegistryStore()
+        registry = store.get('meeting')
+        self.assertIs(store.get('meeting'), registry)
+        store.discard('meeting')
+        self.assertIsNot(store.get('meeting'), registry)
+
+
+class ResolveLanguagesTests(SimpleTestCase):
+    def setUp(self):
+        self.backend = FakeLanguageID({1: 'en', 2: 'es'})
+        self.segments = [{'speaker': 'A'}, {'speaker': 'B'}, {'speaker': 'A'}]
+        # Speaker A's second segment is its longest and sounds English
+        self.audio = [np.full(10, 2.0), np.full(10, 2.0), np.full(20, 1.0)]
+
+    def test_declared_language_skips_detection(self):
+        processor = bare_processor(asr_backend=self.backend)
+        self.assertEqual(processor._resolve_languages(self.segments, self.audio, 'fr'), ['fr'] * 3)
+        self.assertEqual(self.backend.calls, 0)
+
+    def test_speaker_scope_detects_once_per_speaker_on_its_longest_audio(self):
+        processor = bare_processor(asr_backend=self.backend)
+        cached = {}
+        self.assertEqual(processor._resolve_languages(self.segments, self.audio, None, speaker_languages=cached), ['en', 'es', 'en'])
+        self.assertEqual(self.backend.calls, 2)
+        self.assertEqual(cached, {'A': 'en', 'B': 'es'})
+        processor._resolve_languages(self.segments, self.audio, None, speaker_languages=cached)
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_failed_detection_is_not_cached(self):
+        processor = bare_processor(asr_backend=FakeLanguageID({}))
+        cached = {}
+        self.assertEqual(processor._resolve_languages([{'speaker': 'A'}], [np.ones(5)], None, speaker_languages=cached), [None])
+        self.assertEqual(cached, {})
+
+    def test_segment_and_recording_scopes(self):
+        processor = bare_processor(asr_backend=self.backend, language_id_scope='segment')
+        self.assertEqual(processor._resolve_languages(self.segments, self.audio, None), ['es', 'es', 'en'])
+        processor = bare_processor(asr_backend=self.backend, language_id_scope='recording')
+        self.assertEqual(processor._resolve_languages(self.segments, self.audio, None), ['en'] * 3)
+
+    def test_longform_windows_share_their_speakers_language(self):
+        processor = bare_processor(asr_backend=self.backend)
+        audio = np.concatenate([np.full(40, 1.0), np.full(40, 2.0)])
+        turns = [turn(0.0, 4.0, 'A'), turn(4.0, 8.0, 'B')]
+        windows = [(0, 30), (25, 55), (50, 80)]
+        self.assertEqual(processor._window_languages(windows, audio, turns, sample_rate=10), ['en', None, 'es'])
+        self.assertEqual(self.backend.calls, 2)
+
+
+class PlanAsrBatchesTests(SimpleTestCase):
+    def test_batches_are_length_sorted_and_capped_in_size(self):
+        processor = bare_processor(asr_max_batch_size=2, asr_max_padded_seconds=1000.0)
+        lengths = [5, 1, 4, 2, 3]
+        self.assertEqual(processor._plan_asr_batches([10, 11, 12, 13, 14], lengths, sample_rate=1), [[11, 13], [14, 12], [10]])
+
+    def test_padded_seconds_bound_counts_the_whisper_window(self):
+        # Every segment pads to at least 30 s, so 90 padded seconds fit three segments
+        processor = bare_processor(asr_max_batch_size=8, asr_max_padded_seconds=90.0)
+        self.assertEqual(processor._plan_asr_batches(list(range(4)), [10, 10, 10, 10], sample_rate=1), [[0, 1, 2], [3]])
+
+    def test_long_segment_starts_its_own_batch(self):
+        processor = bare_processor(asr_max_batch_size=8, asr_max_padded_seconds=100.0)
+        self.assertEqual(processor._plan_asr_batches([0, 1, 2], [10, 10, 60], sample_rate=1), [[0, 1], [2]])
+
+
+class WindowedDiarizerTests(SimpleTestCase):
+    def diarize(self, windows, samples, window_seconds=10.0, overlap_seconds=4.0):
+        """Run a WindowedDiarizer at 1 Hz whose pyannote windows return `windows` in order."""
+        results = iter(windows)
+
+        def run_pyannote(pipeline, audio, sample_rate):
+            turns, embeddings = next(results)
+            return turns, {label: np.array(vector, dtype=np.float32) for label, vector in embeddings.items()}
+
+        with mock.patch('assistant.diarization.run_pyannote', run_pyannote):
+            diarizer = WindowedDiarizer(None, sample_rate=1, window_seconds=window_seconds, overlap_seconds=overlap_seconds)
+            diarizer.feed(np.zeros(samples, dtype=np.float32))
+            return diarizer.finalize()
+
+    def test_stitches_local_labels_across_windows(self):
+        turns, embeddings = self.diarize([
+            ([(0.0, 5.0, 'A'), (5.0, 10.0, 'B')], {'A': [1.0, 0.0], 'B': [0.0, 1.0]}),
+            # Second window starts at 6 s and owns the audio from 8 s
+            ([(0.0, 4.0, 'X'), (4.0, 8.0, 'Y')], {'X': [0.0, 1.0], 'Y': [1.0, 0.1]}),
+        ], 14)
+        self.assertEqual(turns, [
+            (0.0, 5.0, 'SPEAKER_00'),
+            (5.0, 8.0, 'SPEAKER_01'),
+            (8.0, 10.0, 'SPEAKER_01'),
+            (10.0, 14.0, 'SPEAKER_00'),
+        ])
+        self.assertEqual(sorted(embeddings), ['SPEAKER_00', 'SPEAKER_01'])
+
+    def test_speakers_of_one_window_never_share_a_label(self):
+        turns, embeddings = self.diarize([
+            ([(0.0, 10.0, 'A')], {'A': [1.0, 0.0]}),
+            ([(2.0, 6.0, 'X'), (6.0, 8.0, 'Y')], {'X': [1.0, 0.0], 'Y': [0.9, 0.1]}),
+        ], 14)
+        self.assertEqual([label for _, _, label in turns], ['SPEAKER_00', 'SPEAKER_00', 'SPEAKER_01'])
+        self.assertEqual(len(embeddings), 2)
+
+
+class TranslateSegmentsTests(SimpleTestCase):
+    def test_sentences_are_batched_per_language_pair(self):
+        processor = translating_processor([('es', 'en'), ('fr', 'en')])
+        transcripts = [
+            {'original_transcript': 'Hola. Buenos días.', 'detected_language': 'es'},
+            {'original_transcript': 'Bonjour.', 'detected_language': 'fr'},
+            {'original_transcript': 'Adiós.', 'detected_language': 'es'},
+            {'original_transcript': 'Hello.', 'detected_language': 'en'},
+        ]
+        translations, _ = processor._translate_segments(transcripts, 'en')
+        self.assertEqual(translations, ['es>en: Hola. es>en: Buenos días.', 'fr>en: Bonjour.', 'es>en: Adiós.', 'Hello.'])
+        self.assertEqual(sorted(key for key, _ in processor.translation_backend.batches), [('es', 'en'), ('fr', 'en')])
+
+    def test_pairs_without_a_model_pivot_through_english(self):
+        processor = translating_processor([('zh', 'en'), ('en', 'es')])
+        translations, pivots = processor._translate_segments([{'original_transcript': '你好。', 'detected_language': 'zh'}], 'es')
+        self.assertEqual(translations, ['en>es: zh>en: 你好。'])
+        self.assertEqual(pivots, ['zh>en: 你好。'])
+
+    def test_english_is_the_fallback_when_the_second_hop_is_missing(self):
+        processor = translating_processor([('zh', 'en')])
+        translations, _ = processor._translate_segments([{'original_transcript': '你好。', 'detected_language': 'zh'}], 'fr')
+        self.assertEqual(translations, ['zh>en: 你好。'])
+
+    def test_known_pivot_skips_the_source_hop(self):
+        processor = translating_processor([('zh', 'en'), ('en', 'es'), ('en', 'fr')])
+        segment = {'original_transcript': '你好。', 'detected_language': 'zh', 'pivot_transcript': 'Hello.'}
+        translations, pivots = processor._translate_segments([segment], 'fr')
+        self.assertEqual(translations, ['en>fr: Hello.'])
+        self.assertEqual(pivots, ['Hello.'])
+        self.assertEqual(processor.translation_backend.batches, [(('en', 'fr'), ['Hello.'])])
+
+    def test_english_target_is_served_from_the_pivot(self):
+        processor = translating_processor([('zh', 'en')])
+        segment = {'original_transcript': '你好。', 'detected_language': 'zh', 'pivot_transcript': 'Hello.'}
+        self.assertEqual(processor._translate_segments([segment], 'en')[0], ['Hello.'])
+        self.assertEqual(processor.translation_backend.batches, [])
+
+
+class TranslateTranscriptsTests(SimpleTestCase):
+    def test_retranslation_reuses_the_pivot_and_keeps_earlier_languages(self):
+        processor = translating_processor([('zh', 'en'), ('en', 'es'), ('en', 'fr')])
+        original = [{'original_transcript': '你好。', 'detected_language': 'zh', 'speaker_label': 'SPEAKER_1'}]
+        spanish = processor.translate_transcripts(original, 'es')
+        french = processor.translate_transcripts(spanish, 'fr')
+        self.assertEqual(original, [{'original_transcript': '你好。', 'detected_language': 'zh', 'speaker_label': 'SPEAKER_1'}])
+        self.assertEqual(french[0]['translated_transcript'], 'en>fr: zh>en: 你好。')
+        self.assertEqual(french[0]['translations'], {'es': 'en>es: zh>en: 你好。', 'fr': 'en>fr: zh>en: 你好。'})
+        self.assertEqual(french[0]['pivot_transcript'], 'zh>en: 你好。')
+        # zh -> en ran once, for the first language only
+        self.assertEqual([key for key, _ in processor.translation_backend.batches], [('zh', 'en'), ('en', 'es'), ('en', 'fr')])
+
+
+class StoredTranslationsTests(SimpleTestCase):
+    def test_languages_every_segment_has(self):
+        transcripts = [
+            {'translated_transcript': 'Hola', 'translations': {'es': 'Hola', 'fr': 'Salut'}},
+            {'translated_transcript': 'Adiós', 'translations': {'es': 'Adiós'}},
+        ]
+        self.assertEqual(available_languages(transcripts), ['es'])
+        self.assertEqual(available_languages([{'translated_transcript': 'Hola'}], stored_language='es'), ['es'])
+        self.assertEqual(available_languages([]), [])
+
+    def test_transcripts_in_language_selects_the_stored_translation(self):
+        transcripts = [{'translated_transcript': 'Hola', 'translations': {'es': 'Hola', 'fr': 'Salut'}}]
+        selected = transcripts_in_language(transcripts, 'fr')
+        self.assertEqual(selected[0]['translated_transcript'], 'Salut')
+        self.assertEqual(transcripts[0]['translated_transcript'], 'Hola')
+        self.assertIsNone(transcripts_in_language(transcripts, 'zh'))
+
+    def test_older_recordings_serve_their_target_language(self):
+        transcripts = [{'translated_transcript': 'Hola'}]
+        self.assertEqual(transcripts_in_language(transcripts, 'es', stored_language='es')[0]['translated_transcript'], 'Hola')
+        self.assertIsNone(transcripts_in_language(transcripts, 'es'))
+
+    def test_update_recording_translation_sets_only_that_language(self):
+        client = MongoDBClient()
+        client.recordings_collection = mock.Mock()
+        client.recordings_collection.update_one.return_value = mock.Mock(matched_count=1)
+        transcripts = [{'translated_transcript': 'Salut', 'translations': {'es': 'Hola', 'fr': 'Salut'}, 'pivot_transcript': 'Hi'}]
+        recording_id = '0123456789abcdef01234567'
+        self.assertTrue(client.update_recording_translation(recording_id, transcripts, 'fr', display=False))
+        _, update = client.recordings_collection.update_one.call_args[0]
+        self.assertEqual(update, {'$set': {'transcripts.0.translations.fr': 'Salut', 'transcripts.0.pivot_transcript': 'Hi'}})
+        client.update_recording_translation(recording_id, transcripts, 'es')
+        _, update = client.recordings_collection.update_one.call_args[0]
+        self.assertEqual(update['$set']['target_language'], 'es')
+        self.assertEqual(update['$set']['transcripts.0.translated_transcript'], 'Hola')
+
+    def test_update_recording_translation_reports_a_missing_recording(self):
+        client = MongoDBClient()
+        client.recordings_collection = mock.Mock()
+        client.recordings_collection.update_one.return_value = mock.Mock(matched_count=0)
+        self.assertFalse(client.update_recording_translation('0123456789abcdef01234567', [{'translated_transcript': 'Hola'}], 'es'))
@@ -0,0 +1,146 @@
+import logging
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Cache key form of a text: NFC, surrounding whitespace stripped, inner runs collapsed."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+class TranslationCache:
+    """
+    Bounded LRU cache of translations keyed by (normalized text, translation_key, num_beams).
+
+    Both the number of entries and the approximate size of the stored strings are
+    bounded; the least recently used entries are evicted first. Safe to use from
+    concurrent pipeline threads. With `path` set, entries are also written to a
+    SQLite file and memory misses fall back to it, so the cache survives restarts.
+    The file keeps the `max_disk_entries` most recently written rows.
+    """
+
+    def __init__(self, max_entries=50000, max_bytes=64 * 1024 * 1024, path=None, max_disk_entries=500000):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.max_disk_entries = max(1, max_disk_entries)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # Disk I/O happens outside the memory lock
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS translations '
+                    '(text TEXT, pair TEXT, num_beams INTEGER, translation TEXT, '
+                    'PRIMARY KEY (text, pair, num_beams))'
+                )
+                self._db.commit()
+                logger.info(f"[TRANSLATION CACHE] Persisting to {path}")
+            except Exception as e:
+                logger.error(f"[TRANSLATION CACHE] Failed to open {path}, memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def _key(text, translation_key, num_beams):
+        return normalize_text(text), tuple(translation_key), num_beams or 0
+
+    @staticmethod
+    def _size(key, translation):
+        return len(key[0].encode('utf-8')) + len(translation.encode('utf-8'))
+
+    def get(self, text, translation_key, num_beams=None):
+        """Return the cached translation or None."""
+        key = self._key(text, translation_key, num_beams)
+        with self._lock:
+            translation = self._entries.get(key)
+            if translation is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return translation
+            if self._db is None:
+                self.misses += 1
+                return None
+        translation = self._load(key)
+        with self._lock:
+            if translation is None:
+                self.misses += 1
+                return None
+            self._insert(key, translation)
+            self.hits += 1
+            self.disk_hits += 1
+            return translation
+
+    def put(self, text, translation_key, num_beams, translation):
+        self.put_many([(text, translation)], translation_key, num_beams)
+
+    def put_many(self, items, translation_key, num_beams):
+        """Store (text, translation) pairs of one pair and beam width; one disk transaction for all of them."""
+        entries = [(self._key(text, translation_key, num_beams), translation) for text, translation in items if translation is not None]
+        if not entries:
+            return
+        with self._lock:
+            for key, translation in entries:
+                self._insert(key, translation)
+        if self._db is None:
+            return
+        with self._db_lock:
+            try:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)',
+                    [(key[0], '-'.join(key[1]), key[2], translation) for key, translation in entries]
+                )
+                # Replaced rows get a fresh rowid, so the lowest rowids are the oldest writes
+                self._db.execute(
+                    'DELETE FROM translations WHERE rowid <= (SELECT MAX(rowid) FROM translations) - ?',
+                    (self.max_disk_entries,)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"[TRANSLATION CACHE] Failed to persist {len(entries)} entries: {e}")
+
+    def _insert(self, key, translation):
+        """Store in memory and evict down to the budgets. Called with the lock held."""
+        if key in self._entries:
+            self._bytes -= self._size(key, self._entries.pop(key))
+        self._entries[key] = translation
+        self._bytes += self._size(key, translation)
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            old_key, old_translation = self._entries.popitem(last=False)
+            self._bytes -= self._size(old_key, old_translation)
+            self.evictions += 1
+
+    def _load(self, key):
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    'SELECT translation FROM translations WHERE text = ? AND pair = ? AND num_beams = ?',
+                    (key[0], '-'.join(key[1]), key[2])
+                ).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"[TRANSLATION CACHE] Failed to read entry: {e}")
+            return None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_hits': self.disk_hits,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -9,6 +9,7 @@ urlpatterns = [
     path('api/recordings/save/', views.save_recording, name='save_recording'),
     path('api/meetings/<str:meeting_id>/end/', views.end_meeting, name='end_meeting'),
     path('api/meetings/<str:meeting_id>/delete/', views.delete_meeting, name='delete_meeting'),
+    path('api/stats/', views.get_pipeline_stats, name='pipeline_stats'),
     
 
 ] 
\ No newline at end of file
@@ -3,7 +3,7 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
-from .mongodb_client import mongodb_client
+from .mongodb_client import available_languages, mongodb_client, transcripts_in_language
 
 import logging
 
@@ -31,7 +31,11 @@ def get_meeting_history(request):
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_meeting_detail(request, meeting_id):
-    """Get detailed information about a specific meeting"""
+    """
+    Get detailed information about a specific meeting.
+    With ?language=<code>, recordings that have a stored translation in that language
+    return it as translated_transcript.
+    """
     try:
         meeting = mongodb_client.get_meeting_by_id(meeting_id)
         if not meeting:
@@ -42,6 +46,15 @@ def get_meeting_detail(request, meeting_id):
         
         # Get recordings for this meeting
         recordings = mongodb_client.get_recordings_by_meeting_id(meeting_id)
+        language = request.GET.get('language')
+        for recording in recordings:
+            transcripts = recording.get('transcripts', [])
+            recording['available_languages'] = available_languages(transcripts, recording.get('target_language'))
+            if language:
+                selected = transcripts_in_language(transcripts, language, recording.get('target_language'))
+                if selected is not None:
+                    recording['transcripts'] = selected
+                    recording['target_language'] = language
         
         # Get manual insights for this meeting
         manual_insights = mongodb_client.get_manual_insights(meeting_id)
@@ -191,3 +204,25 @@ def end_meeting(request, meeting_id):
         }, status=500)
 
 
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def get_pipeline_stats(request):
+    """Runtime metrics of the shared audio pipeline (batching, load) and insights services"""
+    try:
+        from . import consumer
+        from .insights import insights_stats
+        from .profiles import load_monitor
+        processor = consumer.audio_processor_singleton
+        return JsonResponse({
+            'success': True,
+            'load': load_monitor.stats(),
+            'processor': processor.stats() if processor else {},
+            'insights': insights_stats()
+        })
+    except Exception as e:
+        logger.error(f"Error getting pipeline stats: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Timing harness for insights extraction on long transcripts.
+Runs single-prompt and map-reduce extraction against a local stub of the Gemini
+client (fixed latency per call) or, with --gemini, against the real API, and
+reports wall-clock time, number of calls and insights.
+
+Usage:
+    python benchmark_insights.py [--lines 2000] [--latency 1.0] [--parallel 4] [--gemini]
+"""
+
+import sys
+import os
+import time
+import asyncio
+import argparse
+import logging
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Configure Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'unisono_backend.settings')
+
+import django
+django.setup()
+
+from assistant.insights import (
+    InsightsEngine, StubInsightsClient, chunk_lines, get_insights_client, estimate_tokens
+)
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+TURNS = [
+    "Let's look at the budget for the next quarter.",
+    "We agreed to move the launch to March.",
+    "Maria will send the updated numbers before Friday.",
+    "The customer feedback on the new design was mostly positive.",
+    "We decided to hire two more engineers for the platform team.",
+    "Tom will schedule a follow-up with the vendor.",
+]
+
+
+def make_transcript(lines):
+    return '\n'.join(f"{TURNS[k % len(TURNS)]} (turn {k})" for k in range(lines))
+
+
+async def run(client, transcript, delta_tokens, parallel):
+    engine = InsightsEngine(client, delta_tokens=delta_tokens, max_parallel=parallel)
+    started = time.perf_counter()
+    insights = await engine.extract('benchmark', transcript)
+    return time.perf_counter() - started, len(insights)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=2000, help='Speaker turns in the synthetic transcript')
+    parser.add_argument('--latency', type=float, default=1.0, help='Stub latency per call in seconds')
+    parser.add_argument('--chunk-tokens', type=int, default=3000, help='Token budget per map chunk')
+    parser.add_argument('--parallel', type=int, default=4, help='Concurrent calls in map-reduce mode')
+    parser.add_argument('--gemini', action='store_true', help='Call the real Gemini API instead of the stub')
+    args = parser.parse_args()
+
+    transcript = make_transcript(args.lines)
+    chunks = chunk_lines(transcript, args.chunk_tokens)
+    print(f"Transcript: {args.lines} turns, ~{estimate_tokens(transcript)} tokens, {len(chunks)} chunks")
+
+    for label, parallel in [('sequential', 1), (f'map-reduce x{args.parallel}', args.parallel)]:
+        client = get_insights_client() if args.gemini else StubInsightsClient(latency=args.latency)
+        seconds, count = asyncio.run(run(client, transcript, args.chunk_tokens, parallel))
+        calls = getattr(client, 'calls', '-')
+        print(f"{label:<20} {seconds:8.2f} s  calls={calls}  insights={count}")
+
+
+if __name__ == '__main__':
+    main()
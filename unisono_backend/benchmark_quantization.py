@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Comparison harness for int8 dynamic quantization.
+Runs the Whisper model and one translation model in fp32 and in int8 on a fixed
+set of audio files and sentences, and reports latency, memory and output drift.
+Every model/precision runs in its own process. Django is configured with
+settings.configure() rather than django.setup(), so the app's ready() hook never
+builds the AudioProcessor singleton and the RSS figures are the footprint of the
+measured model alone (plus the interpreter and torch). HUGGINGFACE_API_KEY is read
+from the environment.
+
+The audio set defaults to the Narsil/asr_dummy clips on the Hugging Face hub
+(FIXED_AUDIO), downloaded on first use; --audio replaces it with local files.
+
+Usage:
+    python benchmark_quantization.py [--audio sample1.wav sample2.wav] [--translation-model Helsinki-NLP/opus-mt-en-es]
+"""
+
+import sys
+import os
+import io
+import gc
+import json
+import time
+import ctypes
+import argparse
+import difflib
+import logging
+import subprocess
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Only the settings the measured code reads; django.setup() would load every model via AssistantConfig.ready()
+from django.conf import settings
+settings.configure(HUGGINGFACE_API_KEY=os.getenv('HUGGINGFACE_API_KEY', ''))
+
+import librosa
+import torch
+from huggingface_hub import hf_hub_download
+from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, AutoTokenizer, AutoModelForSeq2SeqLM
+from assistant.inference_backends import quantize_dynamic_int8
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fixed audio set: (dataset repo, file) on the Hugging Face hub
+FIXED_AUDIO = [
+    ('Narsil/asr_dummy', '1.flac'),
+    ('Narsil/asr_dummy', 'mlk.flac'),
+]
+
+# Fixed text set for translation drift
+SENTENCES = [
+    "Yes.",
+    "Can you hear me?",
+    "Let's move on to the next item on the agenda.",
+    "We agreed to ship the new release by the end of next month.",
+    "Maria will send the updated budget to the finance team before Friday.",
+    "I think we should wait for the customer feedback before we change the design.",
+]
+
+
+def memory_mb(field):
+    """A /proc/self/status memory field (VmRSS, VmHWM) of this process in MB (Linux)."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(f'{field}:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def release_freed_memory():
+    """Collect garbage and hand freed heap pages back to the OS, so RSS shows live memory."""
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except OSError:
+        pass
+
+
+def reset_peak_memory():
+    """Reset VmHWM to the current RSS (Linux 4.0+), so later peaks exclude loading."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def model_size_mb(model):
+    """Serialized state dict size, which also counts packed int8 weights."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, a.split(), b.split()).ratio()
+
+
+def fixed_audio_paths():
+    hf_token = getattr(settings, 'HUGGINGFACE_API_KEY', None)
+    return [hf_hub_download(repo_id=repo, filename=filename, repo_type='dataset', token=hf_token) for repo, filename in FIXED_AUDIO]
+
+
+def run_whisper(processor, model, audios):
+    outputs = []
+    start = time.time()
+    for audio in audios:
+        inputs = processor(audio, sampling_rate=16000, return_tensors="pt")
+        with torch.no_grad():
+            ids = model.generate(**inputs, task="transcribe")
+        outputs.append(processor.batch_decode(ids, skip_special_tokens=True)[0].strip())
+    return outputs, time.time() - start
+
+
+def run_translation(tokenizer, model, sentences):
+    outputs = []
+    start = time.time()
+    for sentence in sentences:
+        inputs = tokenizer(sentence, return_tensors="pt", padding=True, truncation=True)
+        with torch.no_grad():
+            ids = model.generate(**inputs)
+        outputs.append(tokenizer.batch_decode(ids, skip_special_tokens=True)[0].strip())
+    return outputs, time.time() - start
+
+
+def worker(kind, precision, model_name, audio_paths):
+    """Load one model in one precision in this (fresh) process, run the fixed set and return the measurements."""
+    hf_token = getattr(settings, 'HUGGINGFACE_API_KEY', None)
+    torch.manual_seed(0)
+    if kind == 'whisper':
+        inputs = [librosa.load(path, sr=16000)[0] for path in audio_paths]
+        processor = AutoProcessor.from_pretrained(model_name, token=hf_token)
+        run = lambda model: run_whisper(processor, model, inputs)
+        load = lambda: AutoModelForSpeechSeq2Seq.from_pretrained(model_name, token=hf_token).eval()
+    else:
+        tokenizer = AutoTokenizer.from_pretrained(model_name, token=hf_token)
+        run = lambda model: run_translation(tokenizer, model, SENTENCES)
+        load = lambda: AutoModelForSeq2SeqLM.from_pretrained(model_name, token=hf_token).eval()
+
+    release_freed_memory()
+    before = memory_mb('VmRSS')
+    model = load()
+    if precision == 'int8':
+        # Quantized in place, the fp32 weights are dropped as in MODEL_QUANTIZATION='int8'
+        model = quantize_dynamic_int8(model)
+    release_freed_memory()
+    loaded_rss = memory_mb('VmRSS') - before
+    # int8 is quantized from a loaded fp32 model, so the load peak is about the same
+    # for both; the inference peak is what int8 saves
+    load_peak = memory_mb('VmHWM')
+    reset_peak_memory()
+    outputs, latency = run(model)
+    return {
+        'outputs': outputs,
+        'latency': latency,
+        'rss_mb': loaded_rss,
+        'load_peak_mb': load_peak,
+        'peak_mb': memory_mb('VmHWM'),
+        'size_mb': model_size_mb(model),
+    }
+
+
+def measure(kind, precision, model_name, audio_paths):
+    """Run worker() in a child process and return its measurements."""
+    command = [sys.executable, os.path.abspath(__file__), '--worker', kind, precision, model_name, '--audio', *audio_paths]
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(name, kind, model_name, audio_paths, count):
+    fp32 = measure(kind, 'fp32', model_name, audio_paths)
+    int8 = measure(kind, 'int8', model_name, audio_paths)
+    pairs = list(zip(fp32['outputs'], int8['outputs']))
+    drift = [similarity(a, b) for a, b in pairs]
+    exact = sum(1 for a, b in pairs if a == b)
+    logger.info(f"📊 {name}")
+    logger.info(f"   latency:  fp32 {fp32['latency']:.2f}s, int8 {int8['latency']:.2f}s ({fp32['latency'] / max(int8['latency'], 1e-9):.2f}x)")
+    logger.info(f"   size:     fp32 {fp32['size_mb']:.0f} MB, int8 {int8['size_mb']:.0f} MB")
+    logger.info(f"   RSS:      fp32 +{fp32['rss_mb']:.0f} MB, int8 +{int8['rss_mb']:.0f} MB (inference peak {fp32['peak_mb']:.0f} / {int8['peak_mb']:.0f} MB, load peak {fp32['load_peak_mb']:.0f} / {int8['load_peak_mb']:.0f} MB)")
+    logger.info(f"   drift:    {exact}/{count} identical, mean word similarity {sum(drift) / max(len(drift), 1):.3f}")
+    for a, b in pairs:
+        if a != b:
+            logger.info(f"   fp32: {a}")
+            logger.info(f"   int8: {b}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 inference")
+    parser.add_argument('--audio', nargs='*', default=None, help="Audio files for the Whisper comparison (default: FIXED_AUDIO)")
+    parser.add_argument('--whisper-model', default='distil-whisper/distil-large-v3')
+    parser.add_argument('--translation-model', default='Helsinki-NLP/opus-mt-en-es')
+    parser.add_argument('--worker', nargs=3, metavar=('KIND', 'PRECISION', 'MODEL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        kind, precision, model_name = args.worker
+        print(json.dumps(worker(kind, precision, model_name, args.audio or [])))
+        return 0
+
+    audio_paths = args.audio or fixed_audio_paths()
+    compare(f"Whisper {args.whisper_model}", 'whisper', args.whisper_model, audio_paths, len(audio_paths))
+    compare(f"Translation {args.translation_model}", 'translation', args.translation_model, [], len(SENTENCES))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -143,4 +143,156 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # For production, use environment variables instead of hardcoding
 import os
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')  # Get from environment variable
-HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY', '')  # Get from environment variable 
\ No newline at end of file
+HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY', '')  # Get from environment variable 
+
+# Audio pipeline tuning
+# ASR_MODE is 'segments' (transcribe each planned diarization segment) or
+# 'longform' (transcribe the whole recording once and align it to the turns).
+ASR_MODE = os.getenv('ASR_MODE', 'segments')
+
+# Whisper segments are decoded in length-sorted batches. A batch holds at most
+# ASR_MAX_BATCH_SIZE segments and at most ASR_MAX_PADDED_SECONDS of padded audio,
+# which keeps CPU memory bounded on long recordings.
+ASR_MAX_BATCH_SIZE = int(os.getenv('ASR_MAX_BATCH_SIZE', '8'))
+ASR_MAX_PADDED_SECONDS = float(os.getenv('ASR_MAX_PADDED_SECONDS', '240'))
+
+# Segment planning: adjacent turns of the same speaker closer than
+# ASR_MERGE_GAP_SECONDS are merged, and fragments shorter than
+# ASR_MIN_SEGMENT_SECONDS are absorbed into a neighbour or dropped.
+ASR_MERGE_GAP_SECONDS = float(os.getenv('ASR_MERGE_GAP_SECONDS', '0.5'))
+ASR_MIN_SEGMENT_SECONDS = float(os.getenv('ASR_MIN_SEGMENT_SECONDS', '0.5'))
+
+# Turns longer than Whisper's 30 second window are split into windows that
+# overlap by ASR_CHUNK_OVERLAP_SECONDS and stitched back together.
+ASR_CHUNK_OVERLAP_SECONDS = float(os.getenv('ASR_CHUNK_OVERLAP_SECONDS', '3.0'))
+
+# Language identification when the meeting does not declare a source language:
+# 'speaker' (once per speaker, cached across recordings), 'segment' (every ASR
+# segment) or 'recording' (once per recording, only for single-language meetings).
+# Long-form mode treats 'segment' like 'speaker'; 'window' detects once per 30
+# second window there, at the cost of an extra encoder pass per window.
+LANGUAGE_ID_SCOPE = os.getenv('LANGUAGE_ID_SCOPE', 'speaker')
+
+# Energy-based speech gate (opt-in): silences longer than VAD_MIN_SILENCE_SECONDS
+# are removed before diarization and ASR (keeping VAD_PADDING_SECONDS around speech).
+# A frame is speech when it is above VAD_FLOOR_DB (dBFS) and within
+# VAD_DYNAMIC_RANGE_DB of the loudest frame; removed audio cannot be recovered, so
+# check quiet speakers before narrowing the range.
+# Compaction is skipped when it would remove less than VAD_MIN_SKIP_FRACTION.
+VAD_ENABLED = os.getenv('VAD_ENABLED', 'false').lower() == 'true'
+VAD_FLOOR_DB = float(os.getenv('VAD_FLOOR_DB', '-55'))
+VAD_DYNAMIC_RANGE_DB = float(os.getenv('VAD_DYNAMIC_RANGE_DB', '50'))
+VAD_MIN_SILENCE_SECONDS = float(os.getenv('VAD_MIN_SILENCE_SECONDS', '1.0'))
+VAD_PADDING_SECONDS = float(os.getenv('VAD_PADDING_SECONDS', '0.25'))
+VAD_MIN_SKIP_FRACTION = float(os.getenv('VAD_MIN_SKIP_FRACTION', '0.05'))
+
+# Processing profiles ('fast', 'balanced', 'accurate', see assistant/profiles.py).
+# Meetings may request 'auto', which starts from 'accurate' and steps down one
+# profile for each threshold crossed: the smoothed real-time factor and the
+# number of jobs already in flight. DEFAULT_PROCESSING_PROFILE may be 'auto' too.
+DEFAULT_PROCESSING_PROFILE = os.getenv('DEFAULT_PROCESSING_PROFILE', 'balanced')
+AUTO_PROFILE_RTF_THRESHOLD = float(os.getenv('AUTO_PROFILE_RTF_THRESHOLD', '0.5'))
+AUTO_PROFILE_QUEUE_THRESHOLD = int(os.getenv('AUTO_PROFILE_QUEUE_THRESHOLD', '2'))
+AUTO_PROFILE_RTF_SMOOTHING = float(os.getenv('AUTO_PROFILE_RTF_SMOOTHING', '0.3'))
+
+# Model quantization for CPU-only nodes: '' keeps fp32, 'int8' applies dynamic
+# int8 quantization to the Linear layers of Whisper and the translation models.
+# Compare against fp32 with benchmark_quantization.py before enabling.
+MODEL_QUANTIZATION = os.getenv('MODEL_QUANTIZATION', '')
+
+# Inference backends: 'transformers' (default) or 'ctranslate2'. The CTranslate2
+# backends need models converted with ct2-transformers-converter.
+ASR_BACKEND = os.getenv('ASR_BACKEND', 'transformers')
+TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'transformers')
+CT2_WHISPER_MODEL_DIR = os.getenv('CT2_WHISPER_MODEL_DIR', '')
+# Map of 'src-tgt' to converted model directory, e.g. {'en-es': '/models/opus-mt-en-es-ct2'}
+CT2_TRANSLATION_MODEL_DIRS = {}
+
+# Cross-connection micro-batching: Whisper windows and translation requests from
+# all meetings are queued and batched together. A batch is run when it is full
+# or its oldest request has waited INFERENCE_MAX_WAIT_MS. Batches group requests of
+# similar length and keep the ASR_MAX_BATCH_SIZE / ASR_MAX_PADDED_SECONDS limits and
+# the profile's translation batch size.
+INFERENCE_SERVICE_ENABLED = os.getenv('INFERENCE_SERVICE_ENABLED', 'true').lower() == 'true'
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', '20'))
+TRANSLATION_MAX_BATCH_SIZE = int(os.getenv('TRANSLATION_MAX_BATCH_SIZE', '16'))
+
+# Recordings longer than DIARIZATION_WINDOW_SECONDS are diarized in windows that
+# overlap by DIARIZATION_OVERLAP_SECONDS. Window speakers whose embeddings have a
+# cosine similarity of at least DIARIZATION_SIMILARITY_THRESHOLD share a label.
+DIARIZATION_WINDOW_SECONDS = float(os.getenv('DIARIZATION_WINDOW_SECONDS', '600'))
+DIARIZATION_OVERLAP_SECONDS = float(os.getenv('DIARIZATION_OVERLAP_SECONDS', '30'))
+DIARIZATION_SIMILARITY_THRESHOLD = float(os.getenv('DIARIZATION_SIMILARITY_THRESHOLD', '0.6'))
+
+# Speakers of a meeting keep their labels across recordings: a new diarization
+# cluster reuses a known speaker when their embedding cosine similarity is at
+# least SPEAKER_SIMILARITY_THRESHOLD.
+SPEAKER_SIMILARITY_THRESHOLD = float(os.getenv('SPEAKER_SIMILARITY_THRESHOLD', '0.6'))
+
+# Translation splits segments into sentences; sentences longer than
+# TRANSLATION_MAX_SENTENCE_CHARS are cut further so MarianMT never truncates.
+TRANSLATION_MAX_SENTENCE_CHARS = int(os.getenv('TRANSLATION_MAX_SENTENCE_CHARS', '400'))
+
+# Bounded LRU cache of translations (entries and bytes). Set TRANSLATION_CACHE_PATH
+# to a SQLite file to keep the cache across restarts; the file keeps the
+# TRANSLATION_CACHE_MAX_DISK_ENTRIES most recently written translations.
+TRANSLATION_CACHE_ENABLED = os.getenv('TRANSLATION_CACHE_ENABLED', 'true').lower() == 'true'
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', '50000'))
+TRANSLATION_CACHE_MAX_BYTES = int(os.getenv('TRANSLATION_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+TRANSLATION_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH') or None
+TRANSLATION_CACHE_MAX_DISK_ENTRIES = int(os.getenv('TRANSLATION_CACHE_MAX_DISK_ENTRIES', '500000'))
+
+# Translation pairs load on first use. Least recently used pairs are unloaded when
+# the loaded models exceed TRANSLATION_MODEL_MEMORY_MB (0 = unlimited). Pinned pairs
+# ('src-tgt', comma separated) load at startup and stay resident.
+TRANSLATION_MODEL_MEMORY_MB = float(os.getenv('TRANSLATION_MODEL_MEMORY_MB', '0'))
+TRANSLATION_PINNED_PAIRS = [pair.strip() for pair in os.getenv('TRANSLATION_PINNED_PAIRS', '').split(',') if pair.strip()]
+
+# Idle-time pre-translation of finished recordings into the languages the meeting
+# already used, then PRETRANSLATION_LANGUAGES, at most PRETRANSLATION_MAX_LANGUAGES.
+# Work proceeds PRETRANSLATION_CHUNK_SEGMENTS segments at a time and pauses while
+# foreground jobs run.
+PRETRANSLATION_ENABLED = os.getenv('PRETRANSLATION_ENABLED', 'false').lower() == 'true'
+PRETRANSLATION_LANGUAGES = [lang.strip() for lang in os.getenv('PRETRANSLATION_LANGUAGES', 'en,es').split(',') if lang.strip()]
+PRETRANSLATION_MAX_LANGUAGES = int(os.getenv('PRETRANSLATION_MAX_LANGUAGES', '2'))
+PRETRANSLATION_CHUNK_SEGMENTS = int(os.getenv('PRETRANSLATION_CHUNK_SEGMENTS', '16'))
+
+# Incremental insights: each Gemini call carries the rolling meeting summary and the
+# latest known insights within these token budgets, plus at most
+# INSIGHTS_DELTA_TOKENS of new transcript.
+GEMINI_MODEL_NAME = os.getenv('GEMINI_MODEL_NAME', 'gemini-1.5-flash')
+INSIGHTS_SUMMARY_TOKENS = int(os.getenv('INSIGHTS_SUMMARY_TOKENS', '300'))
+INSIGHTS_KNOWN_TOKENS = int(os.getenv('INSIGHTS_KNOWN_TOKENS', '400'))
+INSIGHTS_DELTA_TOKENS = int(os.getenv('INSIGHTS_DELTA_TOKENS', '3000'))
+INSIGHTS_MAX_OUTPUT_TOKENS = int(os.getenv('INSIGHTS_MAX_OUTPUT_TOKENS', '1024'))
+
+# Transcript text over INSIGHTS_DELTA_TOKENS is split at speaker turns and the parts
+# are extracted concurrently, at most INSIGHTS_MAX_PARALLEL Gemini calls at once.
+INSIGHTS_MAX_PARALLEL = int(os.getenv('INSIGHTS_MAX_PARALLEL', '4'))
+
+# Content-addressed cache of Gemini insights responses (model, prompt template
+# version, tool schema and prompt), with a TTL. Set INSIGHTS_CACHE_PATH to a SQLite
+# file to keep responses across restarts.
+INSIGHTS_CACHE_ENABLED = os.getenv('INSIGHTS_CACHE_ENABLED', 'true').lower() == 'true'
+INSIGHTS_CACHE_MAX_ENTRIES = int(os.getenv('INSIGHTS_CACHE_MAX_ENTRIES', '1000'))
+INSIGHTS_CACHE_TTL_SECONDS = float(os.getenv('INSIGHTS_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+INSIGHTS_CACHE_PATH = os.getenv('INSIGHTS_CACHE_PATH') or None
+
+# Process-wide Gemini governor: token bucket of GEMINI_RATE_PER_MINUTE requests
+# (bursts up to GEMINI_BURST), at most GEMINI_MAX_CONCURRENCY in flight, fair
+# round robin across meetings, and jittered exponential backoff on 429/5xx errors.
+GEMINI_RATE_PER_MINUTE = float(os.getenv('GEMINI_RATE_PER_MINUTE', '60'))
+GEMINI_BURST = float(os.getenv('GEMINI_BURST', '5'))
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '4'))
+GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '4'))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv('GEMINI_BACKOFF_BASE_SECONDS', '1.0'))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv('GEMINI_BACKOFF_MAX_SECONDS', '30.0'))
+
+# Insights never hold back transcripts: results not ready INSIGHTS_DEADLINE_SECONDS
+# after ASR follow as a separate 'insights' message. Each Gemini extraction is cut
+# off after INSIGHTS_TIMEOUT_SECONDS; INSIGHTS_BREAKER_FAILURES consecutive failures
+# switch to the local extractor for INSIGHTS_BREAKER_RESET_SECONDS.
+INSIGHTS_DEADLINE_SECONDS = float(os.getenv('INSIGHTS_DEADLINE_SECONDS', '10'))
+INSIGHTS_TIMEOUT_SECONDS = float(os.getenv('INSIGHTS_TIMEOUT_SECONDS', '120'))
+INSIGHTS_BREAKER_FAILURES = int(os.getenv('INSIGHTS_BREAKER_FAILURES', '3'))
+INSIGHTS_BREAKER_RESET_SECONDS = float(os.getenv('INSIGHTS_BREAKER_RESET_SECONDS', '60'))